@@ -0,0 +1,183 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import sys
+import os
+from bundle import Bundle
+from predict import read_chunks
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+def _split_pipeline(model):
+    """
+    Splits a model pipeline into the featurizer and the random forest.
+    """
+
+    if hasattr(model, "named_steps"):
+        return model.named_steps["featurizer"], model.named_steps["model"]
+    return None, model
+
+def tree_predictions(model, X):
+    """
+    Predicts with every tree of a trained random forest separately. The
+    features are computed only once for all the trees.
+
+    Params:
+      model (Pipeline/RandomForestRegressor):  The trained model.
+      X (DataFrame):                           The reactions.
+    Returns:
+      (array):                                 The predictions, one row per tree.
+    """
+
+    featurizer, forest = _split_pipeline(model)
+    features = featurizer.transform(X) if featurizer is not None else X
+    return np.stack([tree.predict(features) for tree in forest.estimators_])
+
+def predict_with_uncertainty(model, X):
+    """
+    Predicts the activation energies with the per-tree spread of the random
+    forest as the uncertainty.
+
+    Params:
+      model (Pipeline/RandomForestRegressor):  The trained model.
+      X (DataFrame):                           The reactions.
+    Returns:
+      mean (array):                            The predictions.
+      std (array):                             The standard deviations over the trees.
+    """
+
+    preds = tree_predictions(model, X)
+    return preds.mean(axis=0), preds.std(axis=0)
+
+def expected_information_gain(std, noise_std=0.1):
+    """
+    Computes the expected information gain of labelling each candidate,
+    assuming a Gaussian predictive distribution and Gaussian DFT noise:
+    0.5 log(1 + std^2 / noise_std^2).
+
+    Params:
+      std (array):        The predictive standard deviations in eV.
+      noise_std (float):  The standard deviation of the labels in eV.
+    Returns:
+      (array):            The information gains in nats.
+    """
+
+    return 0.5 * np.log1p((np.asarray(std) / noise_std)**2)
+
+def rank_candidates(model, candidates, noise_std=0.1, top_k=None):
+    """
+    Ranks candidate reactions by the expected information gain of
+    computing their activation energy.
+
+    Params:
+      model (Pipeline/RandomForestRegressor):  The trained random forest.
+      candidates (DataFrame):                  The candidate reactions.
+      noise_std (float):                       The standard deviation of the labels in eV.
+      top_k (int):                             Number of returned candidates, all by default.
+    Returns:
+      (DataFrame):                             The candidates with the prediction,
+                                                uncertainty and information gain columns,
+                                                sorted by decreasing information gain.
+    """
+
+    mean, std = predict_with_uncertainty(model, candidates)
+    ranked = candidates.copy()
+    ranked["Predicted Activation Energy"] = mean
+    ranked["Uncertainty"] = std
+    ranked["Information Gain"] = expected_information_gain(std, noise_std)
+    ranked = ranked.sort_values("Information Gain", ascending=False, kind="mergesort")
+    if top_k is not None:
+        ranked = ranked.head(top_k)
+    return ranked
+
+def update_model(model, X, y, n_new_trees=50):
+    """
+    Updates a trained random forest with new labelled reactions by adding
+    trees fitted on the updated data, keeping the existing trees. The
+    featurizer is not refitted, so the feature width stays the same and new
+    categories fall into the unknown bucket.
+
+    Params:
+      model (Pipeline/RandomForestRegressor):  The trained random forest.
+      X (DataFrame):                           All labelled reactions, old and new.
+      y (array-like):                          Their activation energies.
+      n_new_trees (int):                       Number of trees added.
+    Returns:
+      model (Pipeline/RandomForestRegressor):  The updated model.
+    """
+
+    featurizer, forest = _split_pipeline(model)
+    features = featurizer.transform(X) if featurizer is not None else X
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees)
+    forest.fit(features, np.asarray(y))
+    # A later plain fit, e.g. a refit of update.py, retrains all the trees
+    forest.set_params(warm_start=False)
+    return model
+
+def screening_loop(model, candidates, oracle, n_rounds=5, batch_size=10, noise_std=0.1,
+                   n_new_trees=50, X_train=None, y_train=None):
+    """
+    Runs an active-learning loop: on each round the candidates with the
+    highest expected information gain are labelled with the oracle, e.g. a
+    lookup of finished DFT calculations, and the forest is updated with
+    them by adding trees.
+
+    Params:
+      model (Pipeline):        The trained random forest pipeline.
+      candidates (DataFrame):  The unlabelled candidate reactions.
+      oracle (callable):       Returns the activation energies of a DataFrame
+                                of reactions.
+      n_rounds (int):          Number of rounds.
+      batch_size (int):        Number of reactions labelled per round.
+      noise_std (float):       The standard deviation of the labels in eV.
+      n_new_trees (int):       Number of trees added per round.
+      X_train (DataFrame):     The reactions the model was trained on.
+      y_train (array-like):    Their activation energies.
+    Returns:
+      model (Pipeline):        The updated model.
+      labelled (DataFrame):    The labelled candidates with the round number.
+    """
+
+    X_train = X_train.copy() if X_train is not None else candidates.iloc[:0].copy()
+    y_train = list(y_train) if y_train is not None else []
+    remaining = candidates.copy()
+    labelled = []
+    for i in range(n_rounds):
+        if remaining.empty:
+            break
+        batch = rank_candidates(model, remaining, noise_std=noise_std, top_k=batch_size)
+        y_batch = np.asarray(oracle(batch[candidates.columns]))
+        remaining = remaining.drop(batch.index)
+        batch = batch.assign(**{"Activation Energy": y_batch, "Round": i})
+        labelled.append(batch)
+        X_train = pd.concat([X_train, batch[candidates.columns]], ignore_index=True)
+        y_train.extend(y_batch)
+        model = update_model(model, X_train, y_train, n_new_trees=n_new_trees)
+        print(f"Round {i}: labelled {len(batch)} reactions, mean uncertainty "
+              f"{batch['Uncertainty'].mean():.3f} eV")
+
+    return model, pd.concat(labelled) if labelled else candidates.iloc[:0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rank candidate reactions by the expected information gain of computing them.")
+    parser.add_argument("input", help="CSV or NDJSON file of candidate reactions")
+    parser.add_argument("-o", "--output", default="-", help="Output CSV file, stdout by default")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Model bundle directory")
+    parser.add_argument("-m", "--model", default="rfr_enc", help="Name of the random forest model")
+    parser.add_argument("-n", "--top-k", type=int, default=100, help="Number of ranked candidates")
+    parser.add_argument("--noise", type=float, default=0.1, help="Label noise standard deviation in eV")
+    args = parser.parse_args(argv)
+
+    bundle = Bundle(args.bundle)
+    model = bundle.load(args.model)
+    ranked = []
+    for chunk in read_chunks(args.input, 10000, bundle.schema):
+        ranked.append(rank_candidates(model, chunk, noise_std=args.noise, top_k=args.top_k))
+    ranked = pd.concat(ranked).sort_values("Information Gain", ascending=False, kind="mergesort")
+    ranked.head(args.top_k).to_csv(sys.stdout if args.output == "-" else args.output, index=False)
+
+if __name__ == "__main__":
+    main()
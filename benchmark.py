@@ -0,0 +1,260 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import platform
+import tracemalloc
+import json
+import time
+import sys
+import os
+from datetime import datetime
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.kernel_ridge import KernelRidge as KRR
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from gbm import CategoricalHGB
+from krr import ApproxKRR
+from encoding import CATEGORICAL_COLUMNS, COMPOSITION_COLUMNS, TARGET, make_model, split_target
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Benchmarked models, with the settings of model.ipynb
+MODELS = {
+    "krr": lambda: KRR(alpha=0.1, kernel="rbf", gamma=0.1),
+    "akrr": lambda: ApproxKRR(alpha=0.1, kernel="rbf", gamma=0.1, rank=500),
+    "rf": lambda: RandomForestRegressor(n_estimators=100, n_jobs=-1, random_state=0),
+    "hgb": lambda: CategoricalHGB(),
+}
+
+# Encodings supported by each model, all by default
+MODEL_ENCODINGS = {"hgb": ["enc"]}
+
+# Benchmarked encodings, see encoding.ReactionFeaturizer
+ENCODINGS = ["enc", "bin"]
+
+# Default dataset sizes
+SIZES = [500, 2000, 8000]
+
+# Categories of the synthetic reactions without a reference dataset
+SYNTHETIC_CATEGORIES = {
+    "Reactant 1": ["H*", "O*", "OH*", "CO*", "N*", "CH3*", "C*", "NH*"],
+    "Reactant 2": ["None", "H*", "O*", "H2O(g)", "OH*"],
+    "Reactant 3": ["None", "H*"],
+    "Product 1": ["OH*", "H2O*", "CO2*", "NH*", "CH4(g)", "H2(g)", "COOH*"],
+    "Product 2": ["None", "H*", "O*"],
+    "Facet": ["111", "100", "211", "0001", "110"],
+    "Adsorption Site": ["None", "fcc", "hcp", "top", "bridge"],
+    "Reaction Equation": ["None"],
+    "Chemical Composition": ["Pt", "Pd", "Cu", "Ni", "Au", "Ag", "Rh", "Ru", "Pt3Ni", "CuZn", "Ni3Fe"],
+    "Surface Composition": ["None", "Pt", "Cu", "Ni"],
+}
+
+def synthetic_reactions(n, reference=None, seed=0):
+    """
+    Generates a synthetic reaction table of the cleaned data layout. The
+    categories are sampled from the columns of a reference dataset if it is
+    given, and from a fixed list otherwise. The activation energy depends
+    on the reaction energy and on random effects of the categories, so the
+    models have something to learn.
+
+    Params:
+      n (int):                The number of reactions.
+      reference (DataFrame):  Optional cleaned reaction data.
+      seed (int):             The random seed.
+    Returns:
+      (DataFrame):            The synthetic reactions.
+    """
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(index=np.arange(n))
+    energy = np.zeros(n)
+    for col in CATEGORICAL_COLUMNS + COMPOSITION_COLUMNS:
+        if reference is not None and col in reference:
+            values = reference[col].astype(str).values
+        else:
+            values = np.array(SYNTHETIC_CATEGORIES[col])
+        df[col] = rng.choice(values, n)
+        categories, codes = np.unique(df[col].values, return_inverse=True)
+        energy += rng.normal(0, 0.15, len(categories))[codes]
+    df["Reaction Energy"] = rng.normal(0, 1, n)
+    df[TARGET] = np.maximum(df["Reaction Energy"], 0) + 0.5 + energy + rng.normal(0, 0.05, n)
+    return df
+
+def measure(model, X_train, y_train, X_test, y_test, repeat=1):
+    """
+    Measures the fitting and prediction time, the peak memory and the
+    accuracy of a model. The times are the best of repeat runs without
+    memory tracing, and the peak memory is traced on a separate run, since
+    tracing slows down the allocations.
+
+    Params:
+      model (Pipeline):  The unfitted model pipeline.
+      X_train, y_train:  The training data.
+      X_test, y_test:    The test data.
+      repeat (int):      Number of timed runs.
+    Returns:
+      (dict):            The times in seconds, the peak memory in MB, and
+                          the test MAE and R^2.
+    """
+
+    fit_times, predict_times = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        pred = model.predict(X_test)
+        predict_times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    model.fit(X_train, y_train)
+    model.predict(X_test)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "fit_time": min(fit_times),
+        "predict_time": min(predict_times),
+        "peak_memory_mb": peak / 2**20,
+        "mae": mean_absolute_error(y_test, pred),
+        "r2": r2_score(y_test, pred),
+    }
+
+def run_benchmarks(sizes=SIZES, models=MODELS, encodings=ENCODINGS, real=None, repeat=1, seed=0):
+    """
+    Runs the fit and predict benchmarks of every model and encoding on
+    synthetic datasets of the given sizes, and on random subsets of the real
+    data of the same sizes, if the real data is given. A fifth of each
+    dataset is held out for prediction.
+
+    Params:
+      sizes (list):      The dataset sizes.
+      models (dict):     Functions returning the unfitted estimators by name.
+      encodings (list):  The encodings.
+      real (DataFrame):  Optional cleaned reaction data.
+      repeat (int):      Number of timed runs per benchmark.
+      seed (int):        The random seed of the datasets and splits.
+    Returns:
+      (list):            The benchmark records.
+    """
+
+    datasets = []
+    for size in sizes:
+        datasets.append(("synthetic", size, synthetic_reactions(size, reference=real, seed=seed)))
+        if real is not None and size <= len(real):
+            datasets.append(("real", size, real.sample(size, random_state=seed).reset_index(drop=True)))
+
+    records = []
+    for dataset, size, df in datasets:
+        X, y = split_target(df)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+        for name, estimator in models.items():
+            for encoding in [e for e in encodings if e in MODEL_ENCODINGS.get(name, encodings)]:
+                record = {"dataset": dataset, "size": size, "model": name, "encoding": encoding}
+                record.update(measure(make_model(estimator(), encoding), X_train, y_train,
+                                      X_test, y_test, repeat=repeat))
+                records.append(record)
+                print(f"{dataset} {size} {name}_{encoding}: fit {record['fit_time']:.3f} s, "
+                      f"predict {record['predict_time']:.3f} s, peak {record['peak_memory_mb']:.1f} MB, "
+                      f"MAE {record['mae']:.3f} eV")
+    return records
+
+def save_results(filename, records):
+    """
+    Saves benchmark records into a Json file together with the versions
+    and the machine they were run on.
+
+    Params:
+      filename (string):  Name of the Json file.
+      records (list):     The benchmark records.
+    """
+
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "records": records,
+    }
+    with open(filename, "w") as file:
+        json.dump(results, file, indent=2)
+
+def load_results(filename):
+    with open(filename, "r") as file:
+        return json.load(file)
+
+def compare_to_baseline(records, baseline, tolerance=0.25, accuracy_tolerance=0.02):
+    """
+    Compares benchmark records to a stored baseline. A benchmark is
+    flagged as a regression if its time or peak memory grew by more than
+    the relative tolerance, or its MAE grew by more than the absolute
+    accuracy tolerance.
+
+    Params:
+      records (list):              The benchmark records.
+      baseline (dict):             The baseline results, see load_results.
+      tolerance (float):           Relative tolerance of the times and memory.
+      accuracy_tolerance (float):  Absolute tolerance of the MAE in eV.
+    Returns:
+      (list):                      Descriptions of the regressions.
+    """
+
+    def key(record):
+        return (record["dataset"], record["size"], record["model"], record["encoding"])
+
+    reference = {key(record): record for record in baseline["records"]}
+    regressions = []
+    for record in records:
+        base = reference.get(key(record))
+        if base is None:
+            continue
+        name = "{} {} {}_{}".format(*key(record))
+        for metric in ["fit_time", "predict_time", "peak_memory_mb"]:
+            if record[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {record[metric]:.3f} vs. baseline {base[metric]:.3f}")
+        if record["mae"] > base["mae"] + accuracy_tolerance:
+            regressions.append(f"{name}: mae {record['mae']:.3f} vs. baseline {base['mae']:.3f}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the training and prediction of the models.")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=SIZES, help="Dataset sizes")
+    parser.add_argument("-m", "--models", nargs="+", choices=list(MODELS), default=list(MODELS), help="Models")
+    parser.add_argument("-e", "--encodings", nargs="+", choices=ENCODINGS, default=ENCODINGS, help="Encodings")
+    parser.add_argument("-d", "--data", default=f"{ROOT_DIR}/data/data.csv", help="Cleaned reaction data")
+    parser.add_argument("--no-real", action="store_true", help="Benchmark only the synthetic data")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per benchmark")
+    parser.add_argument("-o", "--output", default=f"{ROOT_DIR}/data/benchmarks/results.json", help="Results file")
+    parser.add_argument("-b", "--baseline", default=f"{ROOT_DIR}/data/benchmarks/baseline.json", help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.25, help="Relative time and memory tolerance")
+    args = parser.parse_args(argv)
+
+    real = None
+    if not args.no_real and os.path.exists(args.data):
+        real = pd.read_pickle(args.data)
+    records = run_benchmarks(args.sizes, {name: MODELS[name] for name in args.models}, args.encodings,
+                             real=real, repeat=args.repeat)
+    save_results(args.output, records)
+    print(f"Saved the results into {args.output}")
+
+    if args.save_baseline:
+        save_results(args.baseline, records)
+        print(f"Saved the baseline into {args.baseline}")
+    elif os.path.exists(args.baseline):
+        regressions = compare_to_baseline(records, load_results(args.baseline), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
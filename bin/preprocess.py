@@ -1,49 +1,19 @@
-<<<<<<< HEAD
-=======
-#!/usr/bin/env python
-# coding: utf-8
-
-# # Data preprocessing
-# 
-# Functions for the catalysis reaction data preprocessing. The functions are quite ad hoc, and suited only for the raw data acquired from the Catalysis-hub and the CatApp catalysis reaction databases.
-
-# In[1]:
-
-
->>>>>>> 5bd43e0 (Update)
 # Imports
 import numpy as np
 import pandas as pd
 import json
-import sys
+import ast
 import os
-from ase.visualize import view
-from ase.io import read
-from ase import Atoms
-from dscribe.descriptors import LMBTR
 
 # Define the project root directory
-<<<<<<< HEAD
 # ROOT_DIR = os.path.join(os.getcwd(), os.pardir)
 ROOT_DIR = os.getcwd()
 
-=======
-ROOT_DIR = os.getcwd()
-
-
-# In[2]:
-
-
->>>>>>> 5bd43e0 (Update)
 def load_json(filename):
     """
     Loads data from a Json file into pandas DataFrame.
     
-<<<<<<< HEAD
-    Arguments:
-=======
     Params:
->>>>>>> 5bd43e0 (Update)
       filename (string):      Name of the Json datafile.
     Returns:
       df (pandas DataFrame):  The loaded data.
@@ -69,22 +39,11 @@ def load_json(filename):
     
     return df
 
-<<<<<<< HEAD
-=======
-
-# In[3]:
-
-
->>>>>>> 5bd43e0 (Update)
 def max_reactants_products(df, max_reactants, max_products):
     """
     Finds the maximum number of reactants and products in the reactions.
 
-<<<<<<< HEAD
-    Arguments:
-=======
     Params:
->>>>>>> 5bd43e0 (Update)
       df (DataFrame):       The reaction data.
       max_reactants (int):  The current maximum number of reactants.
       max_products (int):   The current maximum number of products.
@@ -104,22 +63,56 @@ def max_reactants_products(df, max_reactants, max_products):
     
     return max_reactants, max_products
 
-<<<<<<< HEAD
-=======
+def parse_site(sites):
+    """
+    Parses the adsorption site of a Catalysis-hub reaction, e.g.
+    '{"O": "fcc"}' into "O-fcc". Only the first site is used. The sites
+    are read as Json or as a Python literal, never evaluated as code.
 
-# In[4]:
+    Params:
+      sites (string/dict):  The sites keyvalue of the reaction.
+    Returns:
+      (string):             The adsorption site, or "None".
+    """
+
+    if sites in (None, "None"):
+        return "None"
+    if isinstance(sites, str):
+        try:
+            sites = json.loads(sites)
+        except ValueError:
+            sites = ast.literal_eval(sites)
+    sites = list(sites.items())
+    if len(sites) > 1:
+        print("WARNING: More than one site found!")
+    if len(sites) == 0:
+        return "None"
+    site = sites[0]
+    try:
+        return "-".join(site)
+    except TypeError:
+        prefix = "-".join(site[1])
+        return "-".join([site[0], prefix])
+
+def parse_catapp_surface(surface, facet):
+    """
+    Splits the surface and facet of a CatApp reaction, e.g. "Pt fcc(111)"
+    and "fcc(111)", into the catalyst composition and the facet "111".
+
+    Params:
+      surface (string):  The surface of the reaction.
+      facet (string):    The facet of the reaction.
+    Returns:
+      (tuple):           The catalyst composition and the facet.
+    """
 
+    return surface.replace(facet, ""), facet.split("(")[1].split(")")[0]
 
->>>>>>> 5bd43e0 (Update)
 def parse_reactants_products(df, db_name, max_reactants, max_products):
     """
     Parse the reaction data into a unified format.
     
-<<<<<<< HEAD
-    Arguments:
-=======
     Params:
->>>>>>> 5bd43e0 (Update)
       df (DataFrame):       The raw data from a database as a pandas DataFrame.
       df_name (string):     The name of the database.
       max_reactants (int):  The maximum number of reactants in the data.
@@ -151,9 +144,7 @@ def parse_reactants_products(df, db_name, max_reactants, max_products):
             df.at[i, "reactant1"] = row.reactant_a
             df.at[i, "reactant2"] = row.reactant_b
             df.at[i, "product1"] = row.product_ab
-            facet = row.reactant_facet
-            surface = row.reactant_surface.replace(facet, "")
-            facet = facet.split("(")[1].split(")")[0]
+            surface, facet = parse_catapp_surface(row.reactant_surface, row.reactant_facet)
             df.at[i, "facet"] = facet
             df.at[i, "chemicalComposition"] = surface
             df.at[i, "sites"] = row.site
@@ -174,19 +165,7 @@ def parse_reactants_products(df, db_name, max_reactants, max_products):
             # Drop the deprecated columns
             # Parse adsorption site
             if row.sites != "None":
-                sites = list(eval(row.sites).items())
-                if len(sites) > 1:
-                    print("WARNING: More than one site found!")
-                if len(sites) > 0:
-                    site = sites[0]
-                    try:
-                        site = "-".join(site)
-                    except TypeError:
-                        prefix = "-".join(site[1])
-                        site = "-".join([site[0], prefix])
-                else:
-                    site = "None"
-                df.at[i, "sites"] = site
+                df.at[i, "sites"] = parse_site(row.sites)
             # Parse coverage
             if row.coverages != "None":
                 coverage = list(eval(row.coverages).items())
@@ -209,93 +188,43 @@ def parse_reactants_products(df, db_name, max_reactants, max_products):
     
     return df
 
-<<<<<<< HEAD
-=======
-
-# In[5]:
-
-
-# Load the Catalysis-hub and CatApp raw data
-df_cathub_raw = load_json(f"{ROOT_DIR}/data/reactions_cathub.json")
-df_catapp_raw = load_json(f"{ROOT_DIR}/data/reactions_catapp.json")
-
-
-# In[6]:
-
-
-# Find the maximum number of reactants and products from the Catalysis-hub data.
-# Note: The number of reactants/products is fixed in the CatApp data. This is why Catalysis-hub data is used.
-max_reactants, max_products = max_reactants_products(df_cathub_raw, 0, 0)
-print(f"Max reactants: {max_reactants}, Max products: {max_products}")
-
-
-# In[7]:
-
-
-# Parse and combine the datasets
-df_cathub_copy = parse_reactants_products(df_cathub_raw, "Catalysis-hub", max_reactants, max_products)
-df_catapp_copy = parse_reactants_products(df_catapp_raw, "CatApp", max_reactants, max_products)
-df = df_cathub_copy.append(df_catapp_copy, ignore_index=True, sort=False)
-
-
-# In[8]:
-
-
-# Plot the data before cleaning
-import matplotlib.pyplot as plt
-
-plt.plot(df["reactionEnergy"], df["activationEnergy"], "b.")
-plt.xlabel("Reaction energy [eV]")
-plt.ylabel("Activation energy [eV]")
-plt.savefig(f"{ROOT_DIR}/data/images/er_ea_correlation_raw.png")
-plt.show()
-
-
-# ### Clean up the data
-
-# In[9]:
-
-
-# Unify notation
-df = df.replace({"star": "*"}, regex=True)
-df = df.replace({"gas": ""}, regex=True)
-df = df.replace(np.nan, "None")
-
-
-# In[10]:
-
-
-# Drop duplicate data points
-shape = df.shape
-df = df.drop_duplicates(ignore_index=True)
-print(f"Removed {shape[0] - df.shape[0]} data points")
-
-
-# In[11]:
+def unify_notation(df):
+    """
+    Unifies the notation of the parsed data: "star" is written as "*",
+    the "gas" suffix is dropped and the missing values are labeled 'None'.
 
+    Params:
+      df (DataFrame):  The parsed data.
+    Returns:
+      df (DataFrame):  The data in the unified notation.
+    """
 
-# Find and drop empty columns
-removed = []
-for col in df.keys():
-    if (df[col] == "None").all():
-        df = df.drop(col, axis=1)
-        removed.append(col)
-print(f"Removed empty columns: {[col for col in removed]}")
+    df = df.replace({"star": "*"}, regex=True)
+    df = df.replace({"gas": ""}, regex=True)
+    return df.replace(np.nan, "None")
 
+def unify_value(value):
+    """
+    Unifies the notation of a single value like unify_notation, e.g.
+    "COstar" into "CO*" and "H2gas" into "H2".
 
-# In[12]:
+    Params:
+      value:  A value of the parsed data.
+    Returns:
+      The value in the unified notation.
+    """
 
+    if value is None:
+        return "None"
+    if isinstance(value, str):
+        return value.replace("star", "*").replace("gas", "")
+    return value
 
->>>>>>> 5bd43e0 (Update)
 def rename_columns(df):
     """
     The function renames the columns into more readable form.
     
-<<<<<<< HEAD
-    Arguments:
-=======
     Params:
->>>>>>> 5bd43e0 (Update)
       df (DataFrame):  The data.
     Returns:
       df (DataFrame):  The data.
@@ -320,11 +249,10 @@ def rename_columns(df):
     
     return df
 
-<<<<<<< HEAD
-def main():
+def main(root_dir=ROOT_DIR):
     # Load the Catalysis-hub and CatApp raw data
-    df_cathub_raw = load_json(f"{ROOT_DIR}/data/reactions_cathub.json")
-    df_catapp_raw = load_json(f"{ROOT_DIR}/data/reactions_catapp.json")
+    df_cathub_raw = load_json(f"{root_dir}/data/reactions_cathub.json")
+    df_catapp_raw = load_json(f"{root_dir}/data/reactions_catapp.json")
 
     # Find the maximum number of reactants and products from the Catalysis-hub data.
     # Note: The number of reactants/products is fixed in the CatApp data. This is why Catalysis-hub data is used.
@@ -336,19 +264,18 @@ def main():
     df_catapp_copy = parse_reactants_products(df_catapp_raw, "CatApp", max_reactants, max_products)
     df = df_cathub_copy.append(df_catapp_copy, ignore_index=True, sort=False)
 
-    # Plot the data before cleaning
+    # Plot the data before cleaning. Matplotlib is imported only here,
+    # so that importing the functions of this module stays fast.
     import matplotlib.pyplot as plt
 
     plt.plot(df["reactionEnergy"], df["activationEnergy"], "b.")
     plt.xlabel("Reaction energy [eV]")
     plt.ylabel("Activation energy [eV]")
-    plt.savefig(f"{ROOT_DIR}/data/images/er_ea_correlation_raw.png")
+    plt.savefig(f"{root_dir}/data/images/er_ea_correlation_raw.png")
     plt.show()
 
     # Unify notation
-    df = df.replace({"star": "*"}, regex=True)
-    df = df.replace({"gas": ""}, regex=True)
-    df = df.replace(np.nan, "None")
+    df = unify_notation(df)
 
     # Drop duplicate data points
     shape = df.shape
@@ -413,93 +340,7 @@ def main():
 
     # Save the dataframe
     df = df.reset_index(drop=True)
-    df.to_pickle(f"{ROOT_DIR}/data/data.csv")
+    df.to_pickle(f"{root_dir}/data/data.csv")
 
 if __name__ == "__main__":
     main()
-=======
-
-# In[13]:
-
-
-# Rename the columns
-df = rename_columns(df)
-df.head()
-
-
-# ### Don't use reactions with improper activation energies
-
-# In[14]:
-
-
-# Drop reactions with negative activation energy
-negative_ea = df.iloc[np.where(df["Activation Energy"] < 0)]
-
-for i in negative_ea.index:
-    df = df.drop(i)
-print(f"Removed {len(negative_ea.index)} data points")
-print(f"Data shape: {df.shape}")
-    
-plt.plot(negative_ea["Reaction Energy"], negative_ea["Activation Energy"], "b.")
-plt.show()
-
-
-# In[15]:
-
-
-# Isolate the negatively linearly correlated data points
-df_neg_linear = df.iloc[np.where(df["Reaction Energy"] == -df["Activation Energy"])]
-
-for i in df_neg_linear.index:
-    df = df.drop(i)
-print(f"Removed {len(df_neg_linear.index)} data points")
-print(f"Data shape: {df.shape}")
-
-plt.plot(df_neg_linear["Reaction Energy"], df_neg_linear["Activation Energy"], "b.")
-plt.show()
-
-
-# In[16]:
-
-
-# Isolate the positively linearly correlated data points
-df_pos_linear = df.iloc[np.where(df["Reaction Energy"] == df["Activation Energy"])]
-
-for i in df_pos_linear.index:
-    df = df.drop(i)
-print(f"Removed {len(df_pos_linear.index)} data points")
-print(f"Data shape: {df.shape}")
-
-plt.plot(df_pos_linear["Reaction Energy"], df_pos_linear["Activation Energy"], "b.")
-plt.show()
-
-
-# In[17]:
-
-
-# Isolate the zero activation energy data points
-df_zeros = df.iloc[np.where(df["Activation Energy"] == 0)]
-
-for i in df_zeros.index:
-    df = df.drop(i)
-print(f"Removed {len(df_zeros.index)} data points")
-print(f"Data shape: {df.shape}")
-
-plt.plot(df_zeros["Reaction Energy"], df_zeros["Activation Energy"], "b.")
-plt.show()
-
-
-# In[18]:
-
-
-# Save the dataframe
-df = df.reset_index(drop=True)
-df.to_pickle(f"{ROOT_DIR}/data/data.csv")
-
-
-# In[ ]:
-
-
-
-
->>>>>>> 5bd43e0 (Update)
@@ -0,0 +1,155 @@
+# Imports
+import numpy as np
+import json
+import pickle
+import os
+from datetime import datetime
+import joblib
+from sklearn.pipeline import Pipeline
+from encoding import CATEGORICAL_COLUMNS, COMPOSITION_COLUMNS, NUMERIC_COLUMNS, TARGET
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Version of the bundle format
+BUNDLE_VERSION = 1
+
+def feature_schema():
+    """
+    Returns the input columns the model pipelines are trained on.
+
+    Returns:
+      (dict):  The categorical, composition and numerical columns, and the target.
+    """
+
+    return {
+        "categorical": list(CATEGORICAL_COLUMNS),
+        "composition": list(COMPOSITION_COLUMNS),
+        "numeric": list(NUMERIC_COLUMNS),
+        "target": TARGET,
+    }
+
+def save_bundle(path, models, data_hash=None, metrics=None, rows=None):
+    """
+    Saves trained model pipelines into a versioned bundle directory. The
+    bundle has a manifest.json with the format version, the feature schema,
+    the training data hash and the metrics of each model, and a
+    subdirectory per model with the fitted featurizer and the estimator.
+    The estimators are saved with joblib without compression, so that their
+    large arrays can be memory-mapped when loading. The row hashes of the
+    training and test reactions are saved into rows.npz, so that the
+    reactions added later can be found.
+
+    Params:
+      path (string):      The bundle directory.
+      models (dict):      The fitted pipelines by name, e.g. "rfr_enc".
+      data_hash (string): Hash of the training data, see encoding.data_hash.
+      metrics (dict):     Optional dictionary of metrics per model name.
+      rows (dict):        Optional row hashes of the "train" and "test"
+                           reactions, see encoding.row_hashes.
+    """
+
+    metrics = metrics or {}
+    os.makedirs(path, exist_ok=True)
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "schema": feature_schema(),
+        "data_hash": data_hash,
+        "models": {},
+    }
+    for name, model in models.items():
+        os.makedirs(os.path.join(path, name), exist_ok=True)
+        featurizer = model.named_steps["featurizer"]
+        estimator = model.named_steps["model"]
+        with open(os.path.join(path, name, "featurizer.pkl"), "wb") as file:
+            pickle.dump(featurizer, file)
+        joblib.dump(estimator, os.path.join(path, name, "estimator.joblib"))
+        manifest["models"][name] = {
+            "estimator": type(estimator).__name__,
+            "encoding": getattr(featurizer, "encoding", None),
+            "params": {k: v for k, v in estimator.get_params().items()
+                       if isinstance(v, (int, float, str, bool, type(None)))},
+            "metrics": metrics.get(name, {}),
+        }
+    if rows is not None:
+        np.savez(os.path.join(path, "rows.npz"), **rows)
+    with open(os.path.join(path, "manifest.json"), "w") as file:
+        json.dump(manifest, file, indent=2)
+
+    print(f"Saved {len(models)} models into bundle {path}")
+
+class Bundle:
+    """
+    A saved model bundle. Only the manifest is read when the bundle is
+    opened, and each model is loaded on first use, with its arrays
+    memory-mapped by default.
+
+    Params:
+      path (string):  The bundle directory.
+      mmap (bool):    Memory-map the estimator arrays instead of reading them.
+    """
+
+    def __init__(self, path=f"{ROOT_DIR}/data/models", mmap=True):
+        self.path = path
+        self.mmap = mmap
+        with open(os.path.join(path, "manifest.json"), "r") as file:
+            self.manifest = json.load(file)
+        if self.manifest.get("version", 0) > BUNDLE_VERSION:
+            raise ValueError(f"Bundle version {self.manifest['version']} is newer than "
+                             f"the supported version {BUNDLE_VERSION}")
+        self._models = {}
+
+    @property
+    def names(self):
+        return list(self.manifest["models"])
+
+    @property
+    def schema(self):
+        return self.manifest["schema"]
+
+    @property
+    def data_hash(self):
+        return self.manifest["data_hash"]
+
+    def metrics(self, name):
+        return self.manifest["models"][name]["metrics"]
+
+    def rows(self):
+        """
+        Returns the row hashes of the "train" and "test" reactions of the
+        bundle, or None for bundles saved without them.
+        """
+
+        filename = os.path.join(self.path, "rows.npz")
+        if not os.path.isfile(filename):
+            return None
+        with np.load(filename) as rows:
+            return {key: rows[key] for key in rows.files}
+
+    def load(self, name):
+        """
+        Loads a model pipeline from the bundle, or returns the already
+        loaded one.
+
+        Params:
+          name (string):  Name of the model.
+        Returns:
+          (Pipeline):     The fitted featurizer and estimator pipeline.
+        """
+
+        if name not in self._models:
+            if name not in self.manifest["models"]:
+                raise KeyError(f"No model {name} in bundle {self.path}. Available: {self.names}")
+            with open(os.path.join(self.path, name, "featurizer.pkl"), "rb") as file:
+                featurizer = pickle.load(file)
+            estimator = joblib.load(os.path.join(self.path, name, "estimator.joblib"),
+                                    mmap_mode="r" if self.mmap else None)
+            self._models[name] = Pipeline([("featurizer", featurizer), ("model", estimator)])
+        return self._models[name]
+
+    def __getitem__(self, name):
+        return self.load(name)
+
+    def __contains__(self, name):
+        return name in self.manifest["models"]
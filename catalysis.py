@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# Imports
+import argparse
+import importlib
+import os
+import sys
+
+# Subcommands whose options are forwarded to the main function of a module
+FORWARDED = {
+    "train": "train",
+    "predict": "predict",
+    "update": "update",
+    "synthesize": "synthetic",
+    "network": "network",
+}
+
+def _default_args(command, root_dir):
+    """
+    Returns the data path options of a forwarded subcommand. They are
+    placed before the user options, so the user options override them.
+    """
+
+    if command in ("train", "update", "network"):
+        return ["-d", f"{root_dir}/data/data.csv", "-b", f"{root_dir}/data/models"]
+    if command == "synthesize":
+        return ["-r", root_dir]
+    if command == "predict":
+        return ["-b", f"{root_dir}/data/models"]
+    return []
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="catalysis", description="Fetch, preprocess, featurize, train and predict catalysis reaction data.")
+    parser.add_argument("-r", "--data-root", default=os.environ.get("CATALYSIS_ROOT", os.getcwd()),
+                        help="Project root directory containing data/, $CATALYSIS_ROOT or the "
+                             "working directory by default")
+    parser.add_argument("-p", "--profile", action="store_true",
+                        help="Profile the featurization and training stages into data/profiles")
+    parser.add_argument("--profile-mode", default="sample", choices=["cprofile", "sample", "all"],
+                        help="Profiler of --profile, the sampling profiler by default")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+    subparsers.add_parser("synthesize", add_help=False,
+                          help="Generate synthetic reaction data in the layouts of the fetched data")
+    subparsers.add_parser("fetch-cathub", help="Fetch the Catalysis-hub reactions")
+    subparsers.add_parser("fetch-catapp", help="Fetch the CatApp reactions")
+    subparsers.add_parser("preprocess", help="Clean and combine the fetched reactions")
+    featurize = subparsers.add_parser("featurize", help="Build the structure descriptors")
+    featurize.add_argument("-d", "--descriptor", default="lmbtr", help="Name of a registered descriptor")
+    # The options of the forwarded subcommands, including -h, are parsed by the modules
+    subparsers.add_parser("train", add_help=False, help="Train the models and save them into a bundle")
+    subparsers.add_parser("predict", add_help=False, help="Predict the activation energies of candidates")
+    subparsers.add_parser("update", add_help=False, help="Update the model bundle with the new reactions")
+    subparsers.add_parser("network", add_help=False, help="Find the cheapest reaction pathways between two species")
+    return parser
+
+def main(argv=None):
+    """
+    Runs a subcommand. The modules of each subcommand are imported only
+    when it runs, so that e.g. the help and the predictions do not load the
+    structure and plotting libraries.
+    """
+
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    root_dir = os.path.abspath(args.data_root)
+    if args.profile:
+        from profiling import enable_profiling
+        enable_profiling(args.profile_mode, f"{root_dir}/data/profiles")
+
+    if args.command in FORWARDED:
+        module = importlib.import_module(FORWARDED[args.command])
+        return module.main(_default_args(args.command, root_dir) + rest)
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    if args.command == "fetch-cathub":
+        import cathub
+        os.makedirs(f"{root_dir}/data", exist_ok=True)
+        cathub.main(root_dir)
+    elif args.command == "fetch-catapp":
+        import catapp
+        os.makedirs(f"{root_dir}/data", exist_ok=True)
+        catapp.main(root_dir)
+    elif args.command == "preprocess":
+        import preprocess
+        os.makedirs(f"{root_dir}/data/images", exist_ok=True)
+        preprocess.main(root_dir)
+    elif args.command == "featurize":
+        import descriptors
+        descriptors.featurize_reactions(root_dir, descriptor=args.descriptor)
+
+if __name__ == "__main__":
+    sys.exit(main())
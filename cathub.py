@@ -2,10 +2,7 @@
 import numpy as np
 import requests
 import json
-import io
 import os
-import ase.io
-from ase.io import read
 
 # Define the Catalysis-hub API path and the project root directory
 GRAPHQL = "http://api.catalysis-hub.org/graphql"
@@ -117,10 +114,136 @@ def parse_reaction(reaction):
         struct["keyValuePairs"] = structure["keyValuePairs"]
         structures.append(struct)
     reaction_dict["structures"] = structures
+    reaction_dict["roles"] = build_role_index(key_value_pairs, structures)
     
     return reaction_dict
 
-def main():
+def _species_names(species):
+    """
+    Parses the reactants or products of a reaction into a set of species
+    names without the state suffix, e.g. '{"OHstar": 1}' into {"OH"}.
+    """
+    
+    if isinstance(species, str):
+        try:
+            species = json.loads(species)
+        except ValueError:
+            return set()
+    if not isinstance(species, dict):
+        return set()
+    names = set()
+    for name in species:
+        name = name.replace("star", "").replace("gas", "")
+        if name:
+            names.add(name)
+    return names
+
+def _energy(struct):
+    try:
+        return float(struct["energy"])
+    except (KeyError, TypeError, ValueError):
+        return np.nan
+
+def build_role_index(key_value_pairs, structures):
+    """
+    The function tags each structure of a reaction as a bare slab, a gas
+    phase reference, an initial state, a final state or a transition state.
+    The tagging is based on the keyValuePairs of the structures, matched
+    against the reactants and products of the reaction, and on the
+    structure energies: of the adsorbed structures, a transition state
+    lies between the initial and final states with an energy above both.
+    If the keyValuePairs are not available, the structures with less than
+    10 atoms are tagged as gas references, and the first and the last of
+    the other structures as the initial and final states, respectively,
+    like get_init_fin_structures does.
+    
+    Parameters:
+      key_value_pairs:  The parsed keyvalues of the reaction.
+      structures:       The parsed structures of the reaction.
+    Returns:
+      roles:            A dictionary of the structure indices per role.
+                        The indices keep the order of the structures, with
+                        the structures of 10 or more atoms first.
+    """
+    
+    roles = {"slab": [], "gas": [], "initial": [], "final": [], "ts": []}
+    reactants = _species_names(key_value_pairs.get("reactants"))
+    products = _species_names(key_value_pairs.get("products"))
+    n_atoms = []
+    untagged = []
+    for i, struct in enumerate(structures):
+        try:
+            n_atoms.append(int(struct["InputFile"].split("\n", 1)[0]))
+        except (AttributeError, ValueError):
+            n_atoms.append(0)
+        kvp = struct["keyValuePairs"]
+        if isinstance(kvp, str):
+            try:
+                kvp = json.loads(kvp)
+            except ValueError:
+                kvp = {}
+        if not isinstance(kvp, dict):
+            kvp = {}
+        name = str(kvp.get("name", ""))
+        state = str(kvp.get("state", ""))
+        species = str(kvp.get("species", "")).replace("star", "").replace("gas", "")
+        if "TS" in name or "TS" in species or kvp.get("TS") is not None:
+            roles["ts"].append(i)
+        elif state == "gas" or name.endswith("gas"):
+            roles["gas"].append(i)
+        elif state == "star" and not species and name in ("", "star"):
+            roles["slab"].append(i)
+        elif species and species in reactants:
+            roles["initial"].append(i)
+        elif species and species in products:
+            roles["final"].append(i)
+        else:
+            untagged.append(i)
+    
+    # Reactions from or into the gas phase start or end at the bare slab
+    for role in ("initial", "final"):
+        if not roles[role] and roles["slab"]:
+            roles[role] = list(roles["slab"])
+    # Fall back to the atom counts and the order of the structures
+    full = [i for i in untagged if n_atoms[i] >= 10]
+    roles["gas"] += [i for i in untagged if n_atoms[i] < 10]
+    if not roles["initial"] or not roles["final"]:
+        if len(full) > 1:
+            roles["initial"] = roles["initial"] or [full.pop(0)]
+            roles["final"] = roles["final"] or [full.pop(-1)]
+    # The transition state is the highest untagged adsorbed structure
+    # between the initial and final states, above both in energy
+    if not roles["ts"] and full and roles["initial"] and roles["final"]:
+        first, last = min(roles["initial"][0], roles["final"][0]), max(roles["initial"][0], roles["final"][0])
+        between = [i for i in full if first < i < last] or full
+        ts = max(between, key=lambda i: _energy(structures[i]))
+        barrier = _energy(structures[ts]) - max(_energy(structures[roles["initial"][0]]),
+                                                _energy(structures[roles["final"][0]]))
+        if barrier > 0:
+            roles["ts"].append(ts)
+    for role in roles:
+        roles[role].sort(key=lambda i: (n_atoms[i] < 10, i))
+    
+    return roles
+
+def index_roles(filename):
+    """
+    Adds the structure role index into an existing reaction data file
+    fetched without it.
+    
+    Parameters:
+      filename:  Name of the Catalysis-hub Json datafile.
+    """
+    
+    with open(filename, "r") as file:
+        reaction_list = json.load(file)
+    for reaction in reaction_list.values():
+        reaction["roles"] = build_role_index(reaction["key_value_pairs"], reaction["structures"])
+    with open(filename, "w") as file:
+        json.dump(reaction_list, file)
+    print(f"Indexed the structure roles of {len(reaction_list)} reactions")
+
+def main(root_dir=ROOT_DIR):
     # Run queries and save results to file
     reaction_list = {}
     N_fetched = 0
@@ -143,7 +266,7 @@ def main():
         n += 1
     print("Done!")
 
-    with open (f"{ROOT_DIR}/data/reactions_cathub.json", "w") as outfile:
+    with open (f"{root_dir}/data/reactions_cathub.json", "w") as outfile:
         json.dump(reaction_list, outfile)
 
 if __name__ == "__main__":
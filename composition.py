@@ -0,0 +1,188 @@
+# Imports
+import numpy as np
+import pandas as pd
+import re
+from ase.data import atomic_masses, covalent_radii, chemical_symbols
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# Pauling electronegativities for atomic numbers 1-86.
+# The values missing for the lightest noble gases are filled in below.
+ELECTRONEGATIVITY = [
+    2.20, np.nan,
+    0.98, 1.57, 2.04, 2.55, 3.04, 3.44, 3.98, np.nan,
+    0.93, 1.31, 1.61, 1.90, 2.19, 2.58, 3.16, np.nan,
+    0.82, 1.00, 1.36, 1.54, 1.63, 1.66, 1.55, 1.83, 1.88, 1.91, 1.90, 1.65,
+    1.81, 2.01, 2.18, 2.55, 2.96, 3.00,
+    0.82, 0.95, 1.22, 1.33, 1.60, 2.16, 1.90, 2.20, 2.28, 2.20, 1.93, 1.69,
+    1.78, 1.96, 2.05, 2.10, 2.66, 2.60,
+    0.79, 0.89, 1.10, 1.12, 1.13, 1.14, 1.13, 1.17, 1.20, 1.20, 1.10, 1.22,
+    1.23, 1.24, 1.25, 1.10, 1.27, 1.30, 1.50, 2.36, 1.90, 2.20, 2.20, 2.28,
+    2.54, 2.00, 1.62, 2.33, 2.02, 2.00, 2.20, 2.20,
+]
+
+# Names of the elemental properties in the lookup table
+PROPERTIES = [
+    "atomic_number",
+    "group",
+    "period",
+    "atomic_mass",
+    "covalent_radius",
+    "electronegativity",
+    "valence_electrons",
+]
+
+# Statistics of the elemental properties computed for each composition
+STATISTICS = ["mean", "std", "min", "max"]
+
+def _group_period(z):
+    """
+    Finds the group and the period of an element. Lanthanides are
+    assigned to group 3.
+
+    Params:
+      z (int):  The atomic number.
+    Returns:
+      (tuple of ints):  The group and the period.
+    """
+
+    period_ends = [2, 10, 18, 36, 54, 86]
+    period = next(i + 1 for i, end in enumerate(period_ends) if z <= end)
+    start = ([0] + period_ends)[period - 1]
+    pos = z - start
+    if period == 1:
+        group = 1 if pos == 1 else 18
+    elif period <= 3:
+        group = pos if pos <= 2 else pos + 10
+    elif period <= 5:
+        group = pos
+    else:
+        if pos <= 2:
+            group = pos
+        elif pos <= 17:
+            group = 3
+        else:
+            group = pos - 14
+
+    return group, period
+
+def build_property_table():
+    """
+    Builds the elemental property lookup table for atomic numbers 1-86.
+
+    Returns:
+      (DataFrame):  One row of properties per element symbol.
+    """
+
+    rows = []
+    for z in range(1, len(ELECTRONEGATIVITY) + 1):
+        group, period = _group_period(z)
+        valence = group if group <= 12 else group - 10
+        rows.append([
+            z,
+            group,
+            period,
+            atomic_masses[z],
+            covalent_radii[z],
+            ELECTRONEGATIVITY[z - 1],
+            valence,
+        ])
+    table = pd.DataFrame(rows, columns=PROPERTIES, index=chemical_symbols[1:len(rows) + 1])
+    table = table.fillna(table.mean())
+
+    return table
+
+# Precomputed lookup table and the column position of each element
+PROPERTY_TABLE = build_property_table()
+ELEMENT_INDEX = {symbol: i for i, symbol in enumerate(PROPERTY_TABLE.index)}
+
+def parse_composition(composition):
+    """
+    Parses a composition string, e.g. "Pt3Ni" or "Ag-fcc", into elemental
+    fractions. The crystal structure suffix after a dash is ignored.
+
+    Params:
+      composition (string):  The composition string.
+    Returns:
+      (dict):                The fraction of each element.
+      None:                  If the string is not a valid composition.
+    """
+
+    formula = str(composition).split("-")[0]
+    tokens = re.findall(r"([A-Z][a-z]?)((?:\d+(?:\.\d*)?|\.\d+)?)", formula)
+    if not tokens or "".join(el + n for el, n in tokens) != formula:
+        return None
+    counts = {}
+    for element, count in tokens:
+        if element not in ELEMENT_INDEX:
+            return None
+        counts[element] = counts.get(element, 0.0) + (float(count) if count else 1.0)
+    total = sum(counts.values())
+
+    return {element: count / total for element, count in counts.items()}
+
+def featurize_compositions(compositions, prefix=""):
+    """
+    Maps composition strings into a fixed-width block of elemental property
+    statistics. Each distinct string is parsed only once, and the statistics
+    are computed for all compositions at once with matrix operations on the
+    elemental fractions. Compositions that can not be parsed get zero
+    features and the unknown flag.
+
+    Params:
+      compositions (array-like):  The composition strings.
+      prefix (string):            Prefix of the column names.
+    Returns:
+      (DataFrame):                The composition features.
+    """
+
+    uniques, inverse = np.unique(np.asarray(compositions, dtype=str), return_inverse=True)
+
+    # Elemental fractions of the distinct compositions
+    fractions = np.zeros((len(uniques), len(ELEMENT_INDEX)))
+    unknown = np.zeros(len(uniques), dtype=bool)
+    for i, composition in enumerate(uniques):
+        parsed = parse_composition(composition)
+        if parsed is None:
+            unknown[i] = True
+            continue
+        for element, fraction in parsed.items():
+            fractions[i, ELEMENT_INDEX[element]] = fraction
+
+    props = PROPERTY_TABLE.values
+    present = fractions > 0
+    mean = fractions @ props
+    std = np.sqrt(np.maximum(fractions @ props**2 - mean**2, 0))
+    masked = np.where(present[:, :, None], props[None, :, :], np.nan)
+    with np.errstate(all="ignore"):
+        minimum = np.nanmin(np.where(unknown[:, None, None], 0, masked), axis=1)
+        maximum = np.nanmax(np.where(unknown[:, None, None], 0, masked), axis=1)
+
+    block = np.hstack([
+        mean,
+        std,
+        minimum,
+        maximum,
+        present.sum(axis=1, keepdims=True),
+        unknown[:, None],
+    ]).astype(np.float64)
+    columns = [f"{prefix}{stat}_{prop}" for stat in STATISTICS for prop in PROPERTIES]
+    columns += [f"{prefix}n_elements", f"{prefix}unknown"]
+
+    return pd.DataFrame(block[inverse], columns=columns)
+
+class CompositionFeaturizer(BaseEstimator, TransformerMixin):
+    """
+    Scikit-learn transformer wrapping featurize_compositions, so that it
+    can be used in a DataFrameMapper in place of a LabelBinarizer. The
+    transformer is stateless, so unseen compositions are handled the same
+    way as the ones in the training data.
+    """
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return featurize_compositions(np.asarray(X).ravel()).values
+
+    def get_feature_names(self):
+        return [f"{stat}_{prop}" for stat in STATISTICS for prop in PROPERTIES] + ["n_elements", "unknown"]
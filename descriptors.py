@@ -0,0 +1,650 @@
+# Imports
+import numpy as np
+import hashlib
+import json
+import io
+import os
+from collections import OrderedDict
+from scipy import sparse
+from ase.io import read
+from ase import Atoms
+from profiling import profile_stage
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Define the LMBTR settings used for the structure descriptors
+LMBTR_PARAMS = {
+    "k2": {
+        "geometry": {"function": "distance"},
+        "grid": {"min": 0, "max": 5, "n": 50, "sigma": 0.005},
+        "weighting": {"function": "exponential", "scale": 0.5, "cutoff": 1e-3},
+    },
+    "k3": {
+        "geometry": {"function": "angle"},
+        "grid": {"min": 0, "max": 180, "n": 50, "sigma": 0.005},
+        "weighting": {"function": "exponential", "scale": 0.5, "cutoff": 1e-3},
+    },
+    "normalization": "l2_each",
+}
+
+def _read_structure(struct):
+    """
+    Converts a structure of the Catalysis-hub data into a dictionary with
+    the ase.Atoms object and the energy.
+    """
+
+    return {
+        "atoms": read(io.StringIO(struct["InputFile"]), format="extxyz"),
+        "energy": struct["energy"],
+    }
+
+def load_structures(filename):
+    """
+    Loads the structure data of the Catalysis-hub reactions, and converts
+    the structures into lists of ase.Atoms objects, where each list
+    represents one reaction. The reactions and the corresponding
+    structures are in the same order as in the data file.
+
+    Params:
+      filename (string):  Name of the Catalysis-hub Json datafile.
+    Returns:
+      keys (list):        The reaction ids.
+      structures (list):  A list of structure dictionaries per reaction.
+    """
+
+    with open(filename, "r") as file:
+        struct_data = json.load(file)
+
+    keys = list(struct_data.keys())
+    structures = []
+    for key in keys:
+        reaction_structures = []
+        for struct in struct_data[key]["structures"]:
+            reaction_structures.append(_read_structure(struct))
+        structures.append(reaction_structures)
+
+    print(f"Loaded {len(structures)} corresponding structure lists.")
+
+    return keys, structures
+
+def get_init_fin_structures(structure):
+    """
+    The function finds the initial and final structures from a set of
+    structures describing the given reaction. Only structures comprising
+    more than 10 atoms are used to discard any structures that do not
+    describe the whole system. From these, the first and the last
+    structure are chosen as the initial and final structures, respectively.
+
+    Note: This method might be incorrect, as some structures might have
+    10 or more atoms, but still describe an incomplete adsorbed system.
+    Also, the order of the structures is not confirmed, so the first and
+    the last structures might not correctly represent the initial and
+    final configurations of the system.
+
+    Params:
+      structure (list):  A list of dictionaries describing the individual
+                          structures of the reaction.
+    Returns:
+      ret (list):        A list containing the dictionaries for the first
+                          and the last structure in the reaction.
+      None:              If there are less than two structures available.
+    """
+
+    struct_list = []
+    # Select only structures that have at least 10 atoms
+    for i,struct in enumerate(structure):
+        if len(struct["atoms"]) >= 10:
+            struct_list.append(struct)
+    # Return the first and the last structure only if more than two
+    # structures are found
+    if len(struct_list) > 1:
+        ret = [struct_list[0], struct_list[-1]]
+    else:
+        ret = None
+
+    return ret
+
+def load_init_fin_structures(filename):
+    """
+    Loads only the initial and final structures of the Catalysis-hub
+    reactions, using the structure role index built at fetch time. The
+    role index is built on the fly for data files fetched without it.
+    The structures of the other roles are never parsed.
+
+    Params:
+      filename (string):  Name of the Catalysis-hub Json datafile.
+    Returns:
+      keys (list):        The reaction ids of the selected reactions.
+      indices (list):     Positions of the selected reactions in the datafile.
+      structures (list):  The dictionaries for the initial and the final
+                           configuration of each selected reaction.
+    """
+
+    with open(filename, "r") as file:
+        struct_data = json.load(file)
+
+    keys = []
+    indices = []
+    structures = []
+    for i, (key, reaction) in enumerate(struct_data.items()):
+        roles = reaction.get("roles")
+        if roles is None:
+            from cathub import build_role_index
+            roles = build_role_index(reaction["key_value_pairs"], reaction["structures"])
+        if not roles["initial"] or not roles["final"]:
+            continue
+        init_struct = reaction["structures"][roles["initial"][0]]
+        fin_struct = reaction["structures"][roles["final"][0]]
+        keys.append(key)
+        indices.append(i)
+        structures.append([_read_structure(init_struct), _read_structure(fin_struct)])
+
+    print(f"Found {len(structures)} reactions with initial and final configurations.")
+
+    return keys, indices, structures
+
+def hash_structure(structure):
+    """
+    Computes a hash of the geometry of the initial and final configurations,
+    i.e. the atomic numbers, positions, cell and periodicity of both.
+
+    Params:
+      structure (list):  The dictionaries for the first and the last configuration.
+    Returns:
+      (string):          Hexadecimal SHA-1 digest of the geometry.
+    """
+
+    sha = hashlib.sha1()
+    for struct in structure:
+        atoms = struct["atoms"]
+        sha.update(np.ascontiguousarray(atoms.get_atomic_numbers(), dtype=np.int64).tobytes())
+        sha.update(np.ascontiguousarray(atoms.get_positions(), dtype=np.float64).tobytes())
+        sha.update(np.ascontiguousarray(atoms.get_cell()[:], dtype=np.float64).tobytes())
+        sha.update(np.ascontiguousarray(atoms.get_pbc(), dtype=np.bool_).tobytes())
+
+    return sha.hexdigest()
+
+def hash_params(params):
+    """
+    Computes a hash of a descriptor configuration.
+
+    Params:
+      params (dict):  The descriptor settings. Must be Json serializable.
+    Returns:
+      (string):       Hexadecimal SHA-1 digest of the settings.
+    """
+
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+class DescriptorCache:
+    """
+    An on-disk cache for structure descriptors. Each descriptor is saved
+    as a .npy file keyed by the geometry hash of the structures and the
+    hash of the descriptor settings. The total size of the cache is capped,
+    and the least recently used entries are evicted first.
+
+    Params:
+      cache_dir (string):  Directory of the cache files.
+      max_size (int):      Maximum total size of the cached arrays in bytes.
+    """
+
+    def __init__(self, cache_dir=f"{ROOT_DIR}/data/descriptor_cache", max_size=2**30):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        # The index maps keys to array sizes in the order of last access
+        self.index = OrderedDict()
+        index_file = os.path.join(cache_dir, "index.json")
+        if os.path.isfile(index_file):
+            with open(index_file, "r") as file:
+                for key, size in json.load(file):
+                    if os.path.isfile(self._path(key)):
+                        self.index[key] = size
+        self.size = sum(self.index.values())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def key(self, structure, params):
+        """
+        Builds the cache key of a reaction.
+
+        Params:
+          structure (list):  The dictionaries for the first and the last configuration.
+          params (dict):     The descriptor settings.
+        Returns:
+          (string):          The cache key.
+        """
+
+        return f"{hash_structure(structure)}-{hash_params(params)}"
+
+    def get(self, key):
+        """
+        Looks up a descriptor from the cache.
+
+        Params:
+          key (string):  The cache key.
+        Returns:
+          (array):       The cached descriptor.
+          None:          If the key is not in the cache.
+        """
+
+        if key not in self.index:
+            self.misses += 1
+            return None
+        try:
+            descr = np.load(self._path(key))
+        except (OSError, ValueError):
+            # The file has been removed or corrupted outside the cache
+            self.size -= self.index.pop(key)
+            self.misses += 1
+            return None
+        self.index.move_to_end(key)
+        self.hits += 1
+
+        return descr
+
+    def put(self, key, descr):
+        """
+        Saves a descriptor into the cache, and evicts the least recently
+        used entries if the size cap is exceeded.
+
+        Params:
+          key (string):  The cache key.
+          descr (array): The descriptor.
+        """
+
+        descr = np.asarray(descr)
+        if descr.nbytes > self.max_size:
+            return
+        if key in self.index:
+            self.size -= self.index.pop(key)
+        np.save(self._path(key), descr)
+        self.index[key] = descr.nbytes
+        self.size += descr.nbytes
+        # Evict the least recently used entries
+        while self.size > self.max_size:
+            old_key, old_size = self.index.popitem(last=False)
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+            self.size -= old_size
+            self.evictions += 1
+
+    def save(self):
+        """
+        Writes the cache index, including the access order, to disk.
+        """
+
+        with open(os.path.join(self.cache_dir, "index.json"), "w") as file:
+            json.dump(list(self.index.items()), file)
+
+    def stats(self):
+        """
+        Returns the cache statistics of the current session.
+
+        Returns:
+          (dict):  Hits, misses, hit rate, evictions, entries and size in bytes.
+        """
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.index),
+            "size": self.size,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.save()
+
+# Registry of the structure descriptors by name
+DESCRIPTORS = {}
+
+def register_descriptor(name):
+    """
+    Class decorator that adds a structure descriptor into the registry.
+
+    Params:
+      name (string):  Name of the descriptor.
+    """
+
+    def decorator(cls):
+        cls.name = name
+        DESCRIPTORS[name] = cls
+        return cls
+
+    return decorator
+
+def get_descriptor(name, **params):
+    """
+    Creates a registered structure descriptor.
+
+    Params:
+      name (string):  Name of the descriptor.
+      params:         Settings overriding the defaults of the descriptor.
+    Returns:
+      (StructureDescriptor):  The descriptor.
+    """
+
+    try:
+        return DESCRIPTORS[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown descriptor: {name}. Available: {list(DESCRIPTORS)}")
+
+class StructureDescriptor:
+    """
+    Base class of the structure descriptors. A descriptor turns the initial
+    and final configurations of a reaction into a single 1D array by
+    concatenating the descriptors of the two configurations. Subclasses
+    define the default settings and the descriptor of a single configuration.
+
+    Params:
+      params:  Settings overriding the defaults of the descriptor.
+    """
+
+    name = None
+    defaults = {}
+
+    def __init__(self, **params):
+        self.params = {**self.defaults, **params}
+
+    def config(self):
+        """
+        Returns the settings identifying the descriptor, used as the
+        descriptor part of the cache key.
+        """
+
+        return {"descriptor": self.name, **self.params}
+
+    def create_single(self, atoms, species, periodic):
+        raise NotImplementedError
+
+    def create(self, structure):
+        """
+        Builds the combined descriptor of the initial and final configurations.
+
+        Params:
+          structure (list):  The dictionaries for the first and the last configuration.
+        Returns:
+          (array):           The concatenated descriptors.
+        """
+
+        init_struct = Atoms(structure[0]["atoms"])
+        fin_struct  = Atoms(structure[1]["atoms"])
+        species = []
+        species.extend(init_struct.get_chemical_symbols())
+        species.extend(fin_struct.get_chemical_symbols())
+        species = list(dict.fromkeys(species))
+        periodic = init_struct.get_pbc().any()
+        init_descr = self.create_single(init_struct, species, periodic)
+        fin_descr = self.create_single(fin_struct, species, periodic)
+
+        return np.concatenate((init_descr, fin_descr), axis=None)
+
+@register_descriptor("lmbtr")
+class LMBTRDescriptor(StructureDescriptor):
+    """
+    Local many-body tensor representation with k2 distance and k3 angle
+    terms, computed for every atom of the configuration.
+    """
+
+    defaults = LMBTR_PARAMS
+
+    def create_single(self, atoms, species, periodic):
+        from dscribe.descriptors import LMBTR
+
+        lmbtr = LMBTR(species=species, periodic=periodic, **self.params)
+        return lmbtr.create(atoms).flatten()
+
+@register_descriptor("mbtr")
+class MBTRDescriptor(StructureDescriptor):
+    """
+    Global many-body tensor representation with the same k2 and k3 terms
+    as the LMBTR descriptor.
+    """
+
+    defaults = {
+        "k2": LMBTR_PARAMS["k2"],
+        "k3": LMBTR_PARAMS["k3"],
+        "normalization": "l2_each",
+    }
+
+    def create_single(self, atoms, species, periodic):
+        from dscribe.descriptors import MBTR
+
+        mbtr = MBTR(species=species, periodic=periodic, flatten=True, **self.params)
+        return mbtr.create(atoms).flatten()
+
+@register_descriptor("soap")
+class SOAPDescriptor(StructureDescriptor):
+    """
+    Smooth overlap of atomic positions, averaged over the atoms of the
+    configuration.
+    """
+
+    defaults = {"rcut": 5.0, "nmax": 6, "lmax": 4, "average": "inner"}
+
+    def create_single(self, atoms, species, periodic):
+        from dscribe.descriptors import SOAP
+
+        soap = SOAP(species=species, periodic=periodic, **self.params)
+        return soap.create(atoms).flatten()
+
+@register_descriptor("composition")
+class CompositionDescriptor(StructureDescriptor):
+    """
+    Elemental fractions of the configuration over a fixed range of atomic
+    numbers. Cheap to compute and independent of the geometry.
+    """
+
+    defaults = {"max_number": 94}
+
+    def create_single(self, atoms, species, periodic):
+        counts = np.bincount(atoms.get_atomic_numbers(), minlength=self.params["max_number"] + 1)
+        counts = counts[1:self.params["max_number"] + 1]
+        return counts / max(len(atoms), 1)
+
+def build_struct_descriptor(structure, cache=None, descriptor="lmbtr"):
+    """
+    The function builds a combined descriptor for a given reaction. By
+    default, the descriptor consists of two individual LMBTR descriptors
+    that are concatenated into a single 1D array.
+
+    Params:
+      structure (list):         The dictionaries for the first and the last configuration.
+      cache (DescriptorCache):  Optional cache to look up and store the descriptor.
+      descriptor (string/StructureDescriptor):
+                                The descriptor, or the name of a registered descriptor.
+    Returns:
+      total_descr (array):      Numpy array of the combined descriptors.
+    """
+
+    if isinstance(descriptor, str):
+        descriptor = get_descriptor(descriptor)
+
+    if cache is not None:
+        key = cache.key(structure, descriptor.config())
+        total_descr = cache.get(key)
+        if total_descr is not None:
+            return total_descr
+
+    total_descr = descriptor.create(structure)
+
+    if cache is not None:
+        cache.put(key, total_descr)
+
+    return total_descr
+
+def benchmark_descriptors(structures, targets, names=None, model=None, cv=5):
+    """
+    Benchmarks the registered descriptors on the same set of reactions.
+    For each descriptor, the featurization time per structure, the memory
+    per feature row and the cross-validated activation energy error of a
+    downstream model are reported.
+
+    Params:
+      structures (list):  The initial and final configurations of the reactions.
+      targets (list):     The activation energies of the reactions.
+      names (list):       Names of the descriptors. All registered by default.
+      model (estimator):  The downstream regression model. A random forest
+                           by default.
+      cv (int):           Number of cross-validation folds.
+    Returns:
+      (DataFrame):        One row of results per descriptor.
+    """
+
+    import time
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor as RFR
+    from sklearn.model_selection import KFold, cross_val_predict
+
+    if names is None:
+        names = list(DESCRIPTORS)
+    if model is None:
+        model = RFR(n_estimators=100, n_jobs=-1, random_state=0)
+    targets = np.asarray(targets, dtype=np.float64)
+    folds = KFold(n_splits=cv, shuffle=True, random_state=0)
+
+    results = []
+    for name in names:
+        descriptor = get_descriptor(name)
+        start = time.perf_counter()
+        descrs = [descriptor.create(structure) for structure in structures]
+        elapsed = time.perf_counter() - start
+
+        # Pad the ragged descriptors into a sparse matrix
+        n_features = max(len(descr) for descr in descrs)
+        X = sparse.lil_matrix((len(descrs), n_features))
+        for i, descr in enumerate(descrs):
+            X[i, :len(descr)] = descr
+        X = X.tocsr()
+
+        pred = cross_val_predict(model, X, targets, cv=folds)
+        results.append({
+            "descriptor": name,
+            "n_features": n_features,
+            "time_per_structure": elapsed / len(structures),
+            "dense_bytes_per_row": n_features * 8,
+            "sparse_bytes_per_row": (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / X.shape[0],
+            "mae": np.mean(np.abs(pred - targets)),
+            "rmse": np.sqrt(np.mean((pred - targets)**2)),
+        })
+        print(f"{name}: {results[-1]['time_per_structure']*1e3:.2f} ms per structure, "
+              f"{n_features} features, MAE {results[-1]['mae']:.3f} eV")
+
+    return pd.DataFrame(results)
+
+def save_descriptors(filename, descriptors, targets, reaction_ids):
+    """
+    Saves the structure descriptors into a compressed .npz file in the
+    CSR sparse format, together with the targets and the reaction ids.
+    Ragged descriptors are padded with implicit zeros, so the padding is
+    never stored.
+
+    Params:
+      filename (string):    Name of the .npz file.
+      descriptors (list):   The descriptor arrays, one per reaction.
+      targets (list):       The activation energies, one per reaction.
+      reaction_ids (list):  The reaction ids, one per reaction.
+    """
+
+    n_features = max(len(descr) for descr in descriptors)
+    data = []
+    indices = []
+    indptr = [0]
+    for descr in descriptors:
+        descr = np.asarray(descr, dtype=np.float64).ravel()
+        nonzero = np.flatnonzero(descr)
+        data.append(descr[nonzero])
+        indices.append(nonzero.astype(np.int32))
+        indptr.append(indptr[-1] + len(nonzero))
+    np.savez_compressed(
+        filename,
+        data=np.concatenate(data),
+        indices=np.concatenate(indices),
+        indptr=np.array(indptr, dtype=np.int64),
+        shape=np.array([len(descriptors), n_features]),
+        targets=np.asarray(targets, dtype=np.float64),
+        reaction_ids=np.asarray(reaction_ids, dtype=str),
+    )
+
+def load_descriptors(filename, dense=False):
+    """
+    Loads the structure descriptors saved with save_descriptors.
+
+    With dense=True, the matrix is expanded once into a .npy file next to
+    the .npz file, and returned as a read-only memory-mapped array. The
+    .npy file is reused as long as it is newer than the .npz file.
+
+    Params:
+      filename (string):     Name of the .npz file.
+      dense (bool):          Return a memory-mapped dense array instead
+                              of a sparse matrix.
+    Returns:
+      X (csr_matrix/array):  The descriptors.
+      y (array):             The activation energies.
+      ids (array):           The reaction ids.
+    """
+
+    with np.load(filename) as npz:
+        X = sparse.csr_matrix(
+            (npz["data"], npz["indices"], npz["indptr"]),
+            shape=tuple(npz["shape"]),
+        )
+        y = npz["targets"]
+        ids = npz["reaction_ids"]
+
+    if dense:
+        dense_file = os.path.splitext(filename)[0] + ".npy"
+        if not os.path.isfile(dense_file) or os.path.getmtime(dense_file) < os.path.getmtime(filename):
+            out = np.lib.format.open_memmap(dense_file, mode="w+", dtype=X.dtype, shape=X.shape)
+            # Expand the matrix in chunks to keep the memory usage bounded
+            for start in range(0, X.shape[0], 1000):
+                out[start:start + 1000] = X[start:start + 1000].toarray()
+            out.flush()
+            del out
+        X = np.load(dense_file, mmap_mode="r")
+
+    return X, y, ids
+
+def featurize_reactions(root_dir=ROOT_DIR, descriptor="lmbtr"):
+    """
+    Builds the structure descriptors of the fetched Catalysis-hub
+    reactions, like lmbtr_descriptors.ipynb, and saves them with the
+    activation energies into data/structure_descriptors.npz. Descriptors of
+    unchanged structures are read from the on-disk cache.
+
+    Params:
+      root_dir (string):    The project root directory.
+      descriptor (string):  Name of a registered descriptor.
+    Returns:
+      (string):             Name of the saved .npz file.
+    """
+
+    filename = f"{root_dir}/data/reactions_cathub.json"
+    keys, _, structures = load_init_fin_structures(filename)
+    with open(filename, "r") as file:
+        reactions = json.load(file)
+    targets = [float(reactions[key]["key_value_pairs"]["activationEnergy"]) for key in keys]
+
+    descrs = []
+    with DescriptorCache(f"{root_dir}/data/descriptor_cache") as cache, profile_stage(f"featurize_{descriptor}"):
+        for structure in structures:
+            descrs.append(build_struct_descriptor(structure, cache=cache, descriptor=descriptor))
+        print(f"Built {len(descrs)} descriptors with corresponding targets")
+        print(f"Descriptor cache: {cache.stats()}")
+
+    output = f"{root_dir}/data/structure_descriptors.npz"
+    save_descriptors(output, descrs, targets, keys)
+    return output
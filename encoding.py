@@ -0,0 +1,260 @@
+# Imports
+import numpy as np
+import pandas as pd
+import hashlib
+import pickle
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.pipeline import Pipeline
+from composition import featurize_compositions
+
+# Categorical columns of the cleaned data used as features
+CATEGORICAL_COLUMNS = [
+    "Reactant 1",
+    "Reactant 2",
+    "Reactant 3",
+    "Product 1",
+    "Product 2",
+    "Facet",
+    "Adsorption Site",
+    "Reaction Equation",
+]
+
+# Catalyst composition columns, mapped to elemental property statistics
+COMPOSITION_COLUMNS = ["Chemical Composition", "Surface Composition"]
+
+# Numerical columns used as features as such
+NUMERIC_COLUMNS = ["Reaction Energy"]
+
+# The target column
+TARGET = "Activation Energy"
+
+# Label of the unknown category bucket
+UNKNOWN = "<unknown>"
+
+def split_target(df):
+    """
+    Splits the reaction data into the features and the target.
+
+    Params:
+      df (DataFrame):  The reaction data.
+    Returns:
+      X (DataFrame):   The data without the target column.
+      y (Series):      The activation energies.
+    """
+
+    return df.drop(TARGET, axis=1), df[TARGET]
+
+def data_hash(X, y=None):
+    """
+    Computes a hash of a dataset, used to recognize the training data of
+    cached search trials and saved models.
+
+    Params:
+      X (DataFrame/array/csr_matrix):  The features.
+      y (array-like):                  Optional targets.
+    Returns:
+      (string):                        Hexadecimal SHA-1 digest of the data.
+    """
+
+    sha = hashlib.sha1()
+    if isinstance(X, pd.DataFrame):
+        sha.update(",".join(map(str, X.columns)).encode())
+        sha.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    elif sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+        for arr in (X.data, X.indices, X.indptr, np.array(X.shape)):
+            sha.update(np.ascontiguousarray(arr).tobytes())
+    else:
+        sha.update(np.ascontiguousarray(X).tobytes())
+    if y is not None:
+        sha.update(np.ascontiguousarray(np.asarray(y, dtype=np.float64)).tobytes())
+
+    return sha.hexdigest()
+
+def row_hashes(df):
+    """
+    Computes a hash of each row of the reaction data, used to find the
+    reactions that are new since a model bundle was trained.
+
+    Params:
+      df (DataFrame):  The reaction data.
+    Returns:
+      (array):         The 64-bit row hashes.
+    """
+
+    return pd.util.hash_pandas_object(df, index=False).values
+
+class CategoryEncoder(BaseEstimator, TransformerMixin):
+    """
+    Encodes categorical columns with a vocabulary learned in fitting.
+    Code 0 of each column is an explicit unknown bucket, so categories
+    not seen in fitting are still encoded. The output is either a sparse
+    one-hot matrix or a dense matrix of integer codes.
+
+    Params:
+      columns (list):   Names of the categorical columns.
+      output (string):  "onehot" for a CSR one-hot matrix, or "ordinal"
+                         for integer codes.
+    """
+
+    def __init__(self, columns=CATEGORICAL_COLUMNS, output="onehot"):
+        self.columns = columns
+        self.output = output
+
+    def fit(self, X, y=None):
+        self.vocabulary_ = {}
+        for col in self.columns:
+            values = X[col].astype(str) if col in X else pd.Series(dtype=str)
+            self.vocabulary_[col] = list(pd.unique(values))
+        return self
+
+    def extend(self, X):
+        """
+        Appends the categories not seen in fitting to the vocabulary. The
+        codes of the known categories do not change, so the ordinal codes
+        stay valid for models trained before, while the one-hot width grows.
+
+        Params:
+          X (DataFrame):  The new data.
+        Returns:
+          (int):          Number of added categories.
+        """
+
+        n_added = 0
+        for col in self.columns:
+            if col not in X:
+                continue
+            known = set(self.vocabulary_[col])
+            new = [value for value in pd.unique(X[col].astype(str)) if value not in known]
+            self.vocabulary_[col].extend(new)
+            n_added += len(new)
+        return n_added
+
+    def codes(self, X):
+        """
+        Maps the categories into integer codes, 0 for the unknown bucket.
+
+        Params:
+          X (DataFrame):  The data.
+        Returns:
+          (array):        The codes, one column per categorical column.
+        """
+
+        codes = np.zeros((X.shape[0], len(self.columns)), dtype=np.int64)
+        for j, col in enumerate(self.columns):
+            if col not in X:
+                continue
+            # The unknown categories are not found, -1, and shift into code 0
+            codes[:, j] = pd.Index(self.vocabulary_[col]).get_indexer(X[col].astype(str)) + 1
+        return codes
+
+    def transform(self, X):
+        codes = self.codes(X)
+        if self.output == "ordinal":
+            return codes
+        # Offset the codes of each column into its own block of columns
+        sizes = [len(self.vocabulary_[col]) + 1 for col in self.columns]
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        indices = (codes + offsets).ravel()
+        indptr = np.arange(0, len(indices) + 1, len(self.columns))
+        data = np.ones(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(X.shape[0], sum(sizes)))
+
+    def get_feature_names(self):
+        if self.output == "ordinal":
+            return list(self.columns)
+        names = []
+        for col in self.columns:
+            names.extend(f"{col}_{value}" for value in [UNKNOWN] + self.vocabulary_[col])
+        return names
+
+class ReactionFeaturizer(BaseEstimator, TransformerMixin):
+    """
+    Turns the cleaned reaction data into the model features: encoded
+    categorical columns, elemental property statistics of the catalyst
+    compositions, and the numerical columns.
+
+    With the "bin" encoding the output is a sparse CSR matrix with one-hot
+    categories, and with the "enc" encoding a dense matrix of integer codes.
+
+    Params:
+      encoding (string):  "bin" for one-hot, or "enc" for integer codes.
+    """
+
+    def __init__(self, encoding="bin"):
+        self.encoding = encoding
+
+    def fit(self, X, y=None):
+        output = "onehot" if self.encoding == "bin" else "ordinal"
+        self.encoder_ = CategoryEncoder(columns=CATEGORICAL_COLUMNS, output=output).fit(X)
+        return self
+
+    def transform(self, X):
+        blocks = [self.encoder_.transform(X)]
+        for col in COMPOSITION_COLUMNS:
+            values = X[col] if col in X else np.full(X.shape[0], "None")
+            blocks.append(featurize_compositions(values).values)
+        blocks.append(X[NUMERIC_COLUMNS].values.astype(np.float64))
+        if self.encoding == "bin":
+            return sparse.hstack([sparse.csr_matrix(block) for block in blocks], format="csr")
+        return np.hstack(blocks).astype(np.float64)
+
+    def extend(self, X):
+        """
+        Extends the category vocabulary with new data, see CategoryEncoder.extend.
+
+        Returns:
+          (int):  Number of added categories.
+        """
+
+        return self.encoder_.extend(X)
+
+    def get_feature_names(self):
+        names = self.encoder_.get_feature_names()
+        for col in COMPOSITION_COLUMNS:
+            names.extend(f"{col}_{name}" for name in featurize_compositions([]).columns)
+        return names + list(NUMERIC_COLUMNS)
+
+def make_model(estimator, encoding="bin"):
+    """
+    Builds a model pipeline of a reaction featurizer and an estimator, so
+    that the fitted featurizer is saved and loaded together with the
+    estimator. The estimator parameters are prefixed with "model__".
+
+    Params:
+      estimator (estimator):  The regression model.
+      encoding (string):      "bin" or "enc", see ReactionFeaturizer.
+    Returns:
+      (Pipeline):             The model pipeline.
+    """
+
+    return Pipeline([
+        ("featurizer", ReactionFeaturizer(encoding=encoding)),
+        ("model", estimator),
+    ])
+
+def save_model(model, filename):
+    """
+    Saves a fitted model pipeline into a pickle file.
+
+    Params:
+      model (Pipeline):   The fitted model pipeline.
+      filename (string):  Name of the pickle file.
+    """
+
+    with open(filename, "wb") as file:
+        pickle.dump(model, file)
+
+def load_model(filename):
+    """
+    Loads a model pipeline saved with save_model.
+
+    Params:
+      filename (string):  Name of the pickle file.
+    Returns:
+      (Pipeline):         The fitted model pipeline.
+    """
+
+    with open(filename, "rb") as file:
+        return pickle.load(file)
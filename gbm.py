@@ -0,0 +1,79 @@
+# Imports
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, RegressorMixin
+try:
+    from sklearn.ensemble import HistGradientBoostingRegressor
+except ImportError:
+    # Needed with scikit-learn < 1.0
+    from sklearn.experimental import enable_hist_gradient_boosting
+    from sklearn.ensemble import HistGradientBoostingRegressor
+from encoding import CATEGORICAL_COLUMNS
+
+class CategoricalHGB(BaseEstimator, RegressorMixin):
+    """
+    Histogram-based gradient boosting on the label encoded reaction
+    features, with native handling of the categorical columns, so no
+    binarization is needed, and early stopping on a validation split. The
+    first n_categorical columns are the category codes of
+    ReactionFeaturizer("enc"). Columns with more categories than histogram
+    bins are treated as ordinal codes instead.
+
+    Params:
+      learning_rate (float):        The shrinkage of each tree.
+      max_iter (int):               Maximum number of boosting iterations.
+      max_leaf_nodes (int):         Maximum number of leaves per tree.
+      min_samples_leaf (int):       Minimum number of samples per leaf.
+      l2_regularization (float):    The L2 regularization of the leaf values.
+      max_bins (int):               Number of histogram bins, at most 255.
+      early_stopping (bool):        Stop when the validation loss stops improving.
+      validation_fraction (float):  Fraction of the data held out for early stopping.
+      n_iter_no_change (int):       Number of iterations without improvement.
+      n_categorical (int):          Number of leading categorical columns.
+      random_state (int):           Seed of the validation split.
+    """
+
+    def __init__(self, learning_rate=0.1, max_iter=500, max_leaf_nodes=31, min_samples_leaf=20,
+                 l2_regularization=0.0, max_bins=255, early_stopping=True, validation_fraction=0.1,
+                 n_iter_no_change=20, n_categorical=len(CATEGORICAL_COLUMNS), random_state=0):
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.l2_regularization = l2_regularization
+        self.max_bins = max_bins
+        self.early_stopping = early_stopping
+        self.validation_fraction = validation_fraction
+        self.n_iter_no_change = n_iter_no_change
+        self.n_categorical = n_categorical
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = X.toarray() if sparse.issparse(X) else np.asarray(X)
+        categorical = np.zeros(X.shape[1], dtype=bool)
+        n_categorical = min(self.n_categorical, X.shape[1])
+        # The category codes have to be below the number of bins
+        categorical[:n_categorical] = X[:, :n_categorical].max(axis=0) < self.max_bins
+        self.categorical_features_ = categorical
+        self.model_ = HistGradientBoostingRegressor(
+            learning_rate=self.learning_rate,
+            max_iter=self.max_iter,
+            max_leaf_nodes=self.max_leaf_nodes,
+            min_samples_leaf=self.min_samples_leaf,
+            l2_regularization=self.l2_regularization,
+            max_bins=self.max_bins,
+            categorical_features=categorical if categorical.any() else None,
+            early_stopping=self.early_stopping,
+            validation_fraction=self.validation_fraction,
+            n_iter_no_change=self.n_iter_no_change,
+            random_state=self.random_state,
+        )
+        self.model_.fit(X, y)
+        self.n_iter_ = self.model_.n_iter_
+        return self
+
+    def predict(self, X):
+        X = X.toarray() if sparse.issparse(X) else np.asarray(X)
+        # Categories unseen in fitting, e.g. the unknown bucket, are
+        # handled as missing values by the trees
+        return self.model_.predict(X)
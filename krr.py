@@ -0,0 +1,207 @@
+# Imports
+import numpy as np
+import time
+from scipy.linalg import eigh
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.kernel_ridge import KernelRidge as KRR
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.metrics.pairwise import pairwise_kernels
+from sklearn.model_selection import check_cv
+from sklearn.pipeline import Pipeline
+
+# Kernels that do not depend on gamma
+GAMMA_FREE_KERNELS = ["linear", "cosine"]
+
+class KRRSearch(BaseEstimator, RegressorMixin):
+    """
+    Grid search of the KernelRidge hyperparameters alpha, gamma and kernel
+    that reuses the kernel matrices. The kernel is computed once per
+    (kernel, gamma, fold), and eigendecomposed once, after which the
+    solutions for all the alphas follow from
+
+      dual_coef = V (V^T y / (w + alpha)),  K = V diag(w) V^T,
+
+    instead of refitting KernelRidge for every alpha. The folds are scored
+    with R^2 like GridSearchCV, and the best model is refitted on all data.
+
+    Params:
+      alphas (list):           The regularization strengths.
+      gammas (list):           The kernel coefficients.
+      kernels (list):          The kernel names.
+      cv (int/splitter):       The cross-validation folds.
+      featurizer (transformer): Optional unfitted featurizer, e.g.
+                                ReactionFeaturizer, fitted on each training
+                                fold. The best estimator is then a pipeline
+                                like the ones built with encoding.make_model.
+    """
+
+    def __init__(self, alphas=(1e0, 1e-1, 1e-2, 1e-3), gammas=tuple(np.logspace(-2, 2, 5)),
+                 kernels=("rbf", "linear"), cv=5, featurizer=None):
+        self.alphas = alphas
+        self.gammas = gammas
+        self.kernels = kernels
+        self.cv = cv
+        self.featurizer = featurizer
+
+    def _candidates(self):
+        # The order of the candidates follows the sorted grid of GridSearchCV
+        return [
+            {"alpha": alpha, "gamma": gamma, "kernel": kernel}
+            for alpha in self.alphas
+            for gamma in self.gammas
+            for kernel in self.kernels
+        ]
+
+    def fit(self, X, y):
+        y = np.asarray(y, dtype=np.float64)
+        alphas = np.asarray(self.alphas, dtype=np.float64)
+        candidates = self._candidates()
+        position = {(c["alpha"], c["gamma"], c["kernel"]): i for i, c in enumerate(candidates)}
+        cv = check_cv(self.cv)
+        splits = list(cv.split(X, y))
+        scores = np.zeros((len(candidates), len(splits)))
+
+        for j, (train, test) in enumerate(splits):
+            X_train = X.iloc[train] if hasattr(X, "iloc") else X[train]
+            X_test = X.iloc[test] if hasattr(X, "iloc") else X[test]
+            if self.featurizer is not None:
+                featurizer = clone(self.featurizer).fit(X_train, y[train])
+                X_train = featurizer.transform(X_train)
+                X_test = featurizer.transform(X_test)
+            for kernel in self.kernels:
+                gammas = self.gammas[:1] if kernel in GAMMA_FREE_KERNELS else self.gammas
+                for gamma in gammas:
+                    params = {} if kernel in GAMMA_FREE_KERNELS else {"gamma": gamma}
+                    K_train = pairwise_kernels(X_train, metric=kernel, **params)
+                    K_test = pairwise_kernels(X_test, X_train, metric=kernel, **params)
+                    w, V = eigh(K_train)
+                    Vty = V.T @ y[train]
+                    # Dual coefficients for all alphas at once
+                    dual = V @ (Vty[:, None] / (w[:, None] + alphas[None, :]))
+                    pred = K_test @ dual
+                    for a, alpha in enumerate(self.alphas):
+                        score = r2_score(y[test], pred[:, a])
+                        # Kernels without gamma give the same score for all gammas
+                        for g in (self.gammas if kernel in GAMMA_FREE_KERNELS else [gamma]):
+                            scores[position[(alpha, g, kernel)], j] = score
+
+        mean_scores = scores.mean(axis=1)
+        best = int(np.argmax(mean_scores))
+        self.cv_results_ = {
+            "params": candidates,
+            "mean_test_score": mean_scores,
+            "std_test_score": scores.std(axis=1),
+            "rank_test_score": np.argsort(np.argsort(-mean_scores)) + 1,
+        }
+        for j in range(len(splits)):
+            self.cv_results_[f"split{j}_test_score"] = scores[:, j]
+        self.best_index_ = best
+        self.best_params_ = candidates[best]
+        self.best_score_ = mean_scores[best]
+
+        if self.featurizer is not None:
+            self.best_estimator_ = Pipeline([
+                ("featurizer", clone(self.featurizer)),
+                ("model", KRR(**self.best_params_)),
+            ])
+        else:
+            self.best_estimator_ = KRR(**self.best_params_)
+        self.best_estimator_.fit(X, y)
+
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+class ApproxKRR(BaseEstimator, RegressorMixin):
+    """
+    Approximate kernel ridge regression with the same interface as
+    KernelRidge. The kernel is approximated with an explicit feature map of
+    the given rank, either Nystroem features or random Fourier features,
+    and a linear ridge regression is fitted on the features. This costs
+    O(n rank^2) time and O(n rank) memory instead of O(n^3) and O(n^2).
+
+    Params:
+      alpha (float):       The regularization strength.
+      kernel (string):     The kernel name. Random Fourier features only
+                            support the "rbf" kernel.
+      gamma (float):       The kernel coefficient, 1/n_features by default.
+      method (string):     "nystroem" or "rff".
+      rank (int):          Number of approximate kernel features.
+      random_state (int):  Seed of the feature map.
+    """
+
+    def __init__(self, alpha=1.0, kernel="rbf", gamma=None, method="nystroem", rank=500, random_state=0):
+        self.alpha = alpha
+        self.kernel = kernel
+        self.gamma = gamma
+        self.method = method
+        self.rank = rank
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        gamma = 1.0 / X.shape[1] if self.gamma is None else self.gamma
+        rank = min(self.rank, X.shape[0]) if self.method == "nystroem" else self.rank
+        if self.method == "nystroem":
+            params = {} if self.kernel in GAMMA_FREE_KERNELS else {"gamma": gamma}
+            self.feature_map_ = Nystroem(kernel=self.kernel, n_components=rank,
+                                         random_state=self.random_state, **params)
+        elif self.method == "rff":
+            if self.kernel != "rbf":
+                raise ValueError("Random Fourier features only support the rbf kernel")
+            self.feature_map_ = RBFSampler(gamma=gamma, n_components=rank, random_state=self.random_state)
+        else:
+            raise ValueError(f"Unknown approximation method: {self.method}")
+        features = self.feature_map_.fit_transform(X)
+        # No intercept, like in KernelRidge
+        self.ridge_ = Ridge(alpha=self.alpha, fit_intercept=False).fit(features, y)
+        return self
+
+    def predict(self, X):
+        return self.ridge_.predict(self.feature_map_.transform(X))
+
+def compare_to_exact(X_train, y_train, X_test, y_test, alpha=1.0, kernel="rbf", gamma=None,
+                     method="nystroem", rank=500, n_exact=None):
+    """
+    Reports the accuracy gap between the approximate and the exact kernel
+    ridge regression on a held-out set. The exact model can be fitted on
+    the first n_exact training samples only, if the full training set does
+    not fit into memory.
+
+    Params:
+      X_train, y_train:  The training data.
+      X_test, y_test:    The held-out data.
+      alpha, kernel, gamma, method, rank:
+                         The model settings, see ApproxKRR.
+      n_exact (int):     Number of training samples for the exact model,
+                          all by default.
+    Returns:
+      (dict):            Test errors, fitting times and the error gap.
+    """
+
+    gamma = 1.0 / X_train.shape[1] if gamma is None else gamma
+    results = {"rank": rank, "method": method}
+
+    t0 = time.perf_counter()
+    approx = ApproxKRR(alpha=alpha, kernel=kernel, gamma=gamma, method=method, rank=rank).fit(X_train, y_train)
+    results["approx_fit_time"] = time.perf_counter() - t0
+    pred = approx.predict(X_test)
+    results["approx_mae"] = mean_absolute_error(y_test, pred)
+    results["approx_r2"] = r2_score(y_test, pred)
+
+    if n_exact is not None:
+        X_train, y_train = X_train[:n_exact], y_train[:n_exact]
+    t0 = time.perf_counter()
+    exact = KRR(alpha=alpha, kernel=kernel, gamma=gamma).fit(X_train, y_train)
+    results["exact_fit_time"] = time.perf_counter() - t0
+    pred = exact.predict(X_test)
+    results["exact_mae"] = mean_absolute_error(y_test, pred)
+    results["exact_r2"] = r2_score(y_test, pred)
+    results["mae_gap"] = results["approx_mae"] - results["exact_mae"]
+
+    print(f"{method} rank {rank}: MAE {results['approx_mae']:.4f} eV vs. exact {results['exact_mae']:.4f} eV, "
+          f"fit {results['approx_fit_time']:.2f} s vs. {results['exact_fit_time']:.2f} s")
+
+    return results
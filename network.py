@@ -0,0 +1,352 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import heapq
+import re
+import sys
+import os
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from encoding import TARGET
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Reactant and product columns of the cleaned data
+REACTANT_COLUMNS = ["Reactant 1", "Reactant 2", "Reactant 3"]
+PRODUCT_COLUMNS = ["Product 1", "Product 2", "Product 3"]
+
+# Species consumed or released alongside the intermediates, e.g. H* in
+# CO* + H* -> HCO*. They are nodes only in the reactions without other species.
+CO_REACTANTS = ["H", "O", "OH", "H2", "H2O"]
+
+# Added to the edge weights, so that barrierless steps stay edges
+EPS = 1e-9
+
+def species_name(species):
+    """
+    Converts a reactant or product of the cleaned data into a network node
+    by dropping the count and the state, e.g. "2H*", "H2(g)" and "H2" into
+    "H" and "H2". The bare site "*" and missing values are not nodes.
+
+    Params:
+      species (string):  The reactant or product.
+    Returns:
+      (string):          The species, or None.
+    """
+
+    species = str(species).strip()
+    if species in ("", "None", "nan", "*"):
+        return None
+    species = re.sub(r"^\d+", "", species)
+    species = re.sub(r"(\*|\(g\)|gas|star)$", "", species)
+    return species or None
+
+def _main_species(species, co_reactants):
+    """
+    Masks the co-reactants of the reactions that have other species on
+    the same side of the equation.
+    """
+
+    co = species.isin(co_reactants)
+    has_main = (species.notna() & ~co).any(axis=1)
+    return species.where(~co.values | ~has_main.values[:, None])
+
+def surface_names(df):
+    """
+    Returns the surfaces of the reactions, the surface composition or, if
+    it is missing, the chemical composition.
+    """
+
+    chemical = df.get("Chemical Composition", pd.Series("None", index=df.index)).astype(str)
+    if "Surface Composition" not in df:
+        return chemical
+    surface = df["Surface Composition"].astype(str)
+    return surface.where(surface != "None", chemical)
+
+class ReactionNetwork:
+    """
+    A reaction network index over the cleaned reaction data. The reactions
+    of each surface and facet are compiled into a compressed sparse row
+    adjacency, with the species as nodes and an edge from every reactant to
+    every product of a reaction, weighted by the activation and reaction
+    energies. The co-reactants, e.g. H* in CO* + H* -> HCO*, get no edges
+    unless they are the only species of a side, so they do not shortcut
+    the pathways. Of parallel edges, the one with the lowest barrier is kept.
+    The reverse steps are added with the barrier Ea - Er by default.
+
+    Reactions without an activation energy, e.g. hypothetical steps, get
+    the barrier predicted by a model, and are flagged as predicted.
+
+    Params:
+      df (DataFrame):    The cleaned reaction data, activation energies may be missing.
+      model (Pipeline):  Optional model predicting the missing activation energies.
+      reversible (bool): Whether to add the reverse steps.
+      co_reactants (list): The co-reactant species.
+    """
+
+    def __init__(self, df, model=None, reversible=True, co_reactants=CO_REACTANTS):
+        df = df.reset_index(drop=True)
+        ea = df[TARGET].astype(float).values if TARGET in df else np.full(len(df), np.nan)
+        er = df["Reaction Energy"].astype(float).values
+        predicted = np.isnan(ea) & ~np.isnan(er)
+        if predicted.any() and model is not None:
+            ea = ea.copy()
+            X = df.loc[predicted, [col for col in df if col != TARGET]]
+            ea[predicted] = np.maximum(model.predict(X), 0)
+            print(f"Predicted the activation energies of {predicted.sum()} reactions")
+        elif predicted.any():
+            print(f"Skipped {predicted.sum()} reactions without activation energies, pass a model to predict them")
+        self.n_predicted = int(predicted.sum()) if model is not None else 0
+
+        # Collect the edges of every reactant and product pair
+        # Parse each distinct reactant and product once
+        columns = [col for col in REACTANT_COLUMNS + PRODUCT_COLUMNS if col in df]
+        names = {value: species_name(value) for value in pd.unique(df[columns].astype(str).values.ravel())}
+        reactants = pd.DataFrame({col: df[col].astype(str).map(names) for col in REACTANT_COLUMNS if col in df})
+        products = pd.DataFrame({col: df[col].astype(str).map(names) for col in PRODUCT_COLUMNS if col in df})
+        reactants, products = _main_species(reactants, co_reactants), _main_species(products, co_reactants)
+        surfaces = surface_names(df)
+        edges = []
+        for r in reactants:
+            for p in products:
+                edges.append(pd.DataFrame({
+                    "surface": surfaces.values, "facet": df["Facet"].astype(str).values,
+                    "source": reactants[r].values, "target": products[p].values,
+                    "ea": ea, "er": er, "row": np.arange(len(df)), "predicted": predicted,
+                }))
+        edges = pd.concat(edges, ignore_index=True) if edges else pd.DataFrame(
+            columns=["surface", "facet", "source", "target", "ea", "er", "row", "predicted"])
+        edges = edges.dropna(subset=["source", "target", "ea", "er"])
+        edges = edges[edges["source"] != edges["target"]]
+        edges = edges.assign(ea=edges["ea"].clip(lower=0))
+        if reversible:
+            reverse = edges.rename(columns={"source": "target", "target": "source"})
+            reverse = reverse.assign(ea=np.maximum(reverse["ea"] - reverse["er"], 0), er=-reverse["er"])
+            edges = pd.concat([edges, reverse], ignore_index=True)
+        edges = edges.sort_values("ea", kind="stable").drop_duplicates(["surface", "facet", "source", "target"])
+
+        self.species = sorted(set(edges["source"]) | set(edges["target"]))
+        self.codes = codes = {name: i for i, name in enumerate(self.species)}
+        self.graphs = {}
+        for (surface, facet), group in edges.groupby(["surface", "facet"], sort=True):
+            source = group["source"].map(codes).values
+            target = group["target"].map(codes).values
+            nodes = np.unique(np.concatenate([source, target]))
+            source, target = np.searchsorted(nodes, source), np.searchsorted(nodes, target)
+            order = np.lexsort((target, source))
+            self.graphs[(surface, facet)] = {
+                "nodes": nodes,
+                "indptr": np.concatenate([[0], np.cumsum(np.bincount(source, minlength=len(nodes)))]),
+                "indices": target[order],
+                "ea": group["ea"].values[order],
+                "er": group["er"].values[order],
+                "row": group["row"].values[order],
+                "predicted": group["predicted"].values[order],
+            }
+        self.df = df
+        print(f"Compiled {len(edges)} edges between {len(self.species)} species on {len(self.graphs)} surfaces")
+
+    def surfaces(self):
+        """
+        Lists the indexed surfaces as (surface, facet) pairs.
+        """
+
+        return list(self.graphs)
+
+    def _graph(self, surface, facet):
+        try:
+            return self.graphs[(str(surface), str(facet))]
+        except KeyError:
+            raise KeyError(f"No reactions on {surface}({facet})") from None
+
+    def _node(self, graph, species):
+        code = self.codes.get(species_name(species), -1)
+        i = np.searchsorted(graph["nodes"], code)
+        if i == len(graph["nodes"]) or graph["nodes"][i] != code:
+            raise KeyError(f"Species {species} does not react on this surface")
+        return i
+
+    def _weights(self, graph, alpha):
+        # Endothermic steps are penalized by alpha times the reaction energy
+        return graph["ea"] + alpha * np.maximum(graph["er"], 0) + EPS
+
+    def adjacency(self, surface, facet, alpha=0.0):
+        """
+        Returns the weighted adjacency of a surface and the species of its
+        nodes.
+
+        Params:
+          surface (string):  The surface composition, e.g. "Cu".
+          facet (string):    The facet, e.g. "211".
+          alpha (float):     Weight of the positive reaction energies.
+        Returns:
+          (csr_matrix):      The adjacency matrix.
+          (list):            The species of the nodes.
+        """
+
+        graph = self._graph(surface, facet)
+        n = len(graph["nodes"])
+        matrix = csr_matrix((self._weights(graph, alpha), graph["indices"], graph["indptr"]), shape=(n, n))
+        return matrix, [self.species[i] for i in graph["nodes"]]
+
+    def _edge(self, graph, u, v):
+        start = graph["indptr"][u]
+        return start + np.flatnonzero(graph["indices"][start:graph["indptr"][u + 1]] == v)[0]
+
+    def _dijkstra(self, graph, weights, source, target):
+        n = len(graph["nodes"])
+        matrix = csr_matrix((weights, graph["indices"], graph["indptr"]), shape=(n, n))
+        dist, pred = dijkstra(matrix, indices=source, return_predecessors=True)
+        if not np.isfinite(dist[target]):
+            return None
+        path = [target]
+        while path[-1] != source and pred[path[-1]] >= 0:
+            path.append(pred[path[-1]])
+        return path[::-1]
+
+    def _path(self, graph, path, weights):
+        """
+        Summarizes a path of node positions into the species, the steps and
+        the total energies.
+        """
+
+        edges = np.array([self._edge(graph, u, v) for u, v in zip(path[:-1], path[1:])], dtype=int)
+        steps = pd.DataFrame({
+            "From": [self.species[graph["nodes"][u]] for u in path[:-1]],
+            "To": [self.species[graph["nodes"][v]] for v in path[1:]],
+            "Activation Energy": graph["ea"][edges],
+            "Reaction Energy": graph["er"][edges],
+            "Predicted": graph["predicted"][edges],
+            "Row": graph["row"][edges],
+        })
+        return {
+            "species": [self.species[graph["nodes"][u]] for u in path],
+            "cost": float(weights[edges].sum() - EPS * len(edges)),
+            "barrier": float(steps["Activation Energy"].sum()),
+            "max_barrier": float(steps["Activation Energy"].max()),
+            "energy": float(steps["Reaction Energy"].sum()),
+            "steps": steps,
+        }
+
+    def shortest_path(self, source, target, surface, facet, alpha=0.0):
+        """
+        Finds the cheapest pathway between two species on a surface with
+        Dijkstra's algorithm, e.g.
+        network.shortest_path("CO2", "CH3OH", "Cu", "211").
+
+        Params:
+          source (string):   The initial species.
+          target (string):   The final species.
+          surface (string):  The surface composition.
+          facet (string):    The facet.
+          alpha (float):     Weight of the positive reaction energies in the cost,
+                              the cost is the sum of the barriers by default.
+        Returns:
+          (dict):            The species, cost, barrier sum, highest barrier,
+                              reaction energy and steps of the pathway, or None.
+        """
+
+        paths = self.k_shortest_paths(source, target, surface, facet, k=1, alpha=alpha)
+        return paths[0] if paths else None
+
+    def k_shortest_paths(self, source, target, surface, facet, k=3, alpha=0.0):
+        """
+        Finds the k cheapest loopless pathways between two species on a
+        surface with Yen's algorithm.
+
+        Params:
+          source (string):   The initial species.
+          target (string):   The final species.
+          surface (string):  The surface composition.
+          facet (string):    The facet.
+          k (int):           Number of pathways.
+          alpha (float):     Weight of the positive reaction energies, see shortest_path.
+        Returns:
+          (list):            The pathways in increasing cost, see shortest_path.
+        """
+
+        graph = self._graph(surface, facet)
+        source, target = self._node(graph, source), self._node(graph, target)
+        weights = self._weights(graph, alpha)
+        path = self._dijkstra(graph, weights, source, target)
+        if path is None:
+            return []
+
+        def cost(path):
+            return sum(weights[self._edge(graph, u, v)] for u, v in zip(path[:-1], path[1:]))
+
+        paths, candidates, seen = [path], [], {tuple(path)}
+        while len(paths) < k:
+            previous = paths[-1]
+            for i in range(len(previous) - 1):
+                spur, root = previous[i], previous[:i + 1]
+                removed = weights.copy()
+                # Remove the next edges of the found paths sharing the root
+                for p in paths:
+                    if p[:i + 1] == root:
+                        removed[self._edge(graph, p[i], p[i + 1])] = np.inf
+                # Remove the root nodes, so the pathways stay loopless
+                for node in root[:-1]:
+                    removed[graph["indptr"][node]:graph["indptr"][node + 1]] = np.inf
+                    removed[graph["indices"] == node] = np.inf
+                spur_path = self._dijkstra(graph, removed, spur, target)
+                if spur_path is None:
+                    continue
+                candidate = root[:-1] + spur_path
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(candidates, (cost(candidate), candidate))
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[1])
+
+        return [self._path(graph, path, weights) for path in paths]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the cheapest reaction pathways between two species.")
+    parser.add_argument("source", help="Initial species, e.g. CO2")
+    parser.add_argument("target", help="Final species, e.g. CH3OH")
+    parser.add_argument("-s", "--surface", required=True, help="Surface composition, e.g. Cu")
+    parser.add_argument("-f", "--facet", required=True, help="Facet, e.g. 211")
+    parser.add_argument("-k", type=int, default=3, help="Number of pathways")
+    parser.add_argument("-a", "--alpha", type=float, default=0.0,
+                        help="Weight of the positive reaction energies in the pathway cost")
+    parser.add_argument("-d", "--data", default=f"{ROOT_DIR}/data/data.csv", help="Cleaned reaction data")
+    parser.add_argument("-c", "--candidates", help="CSV file of reactions without activation energies")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Model bundle directory")
+    parser.add_argument("-m", "--model", help="Model predicting the missing activation energies, e.g. rfr_enc")
+    parser.add_argument("--irreversible", action="store_true", help="Do not add the reverse steps")
+    args = parser.parse_args(argv)
+
+    df = pd.read_pickle(args.data)
+    model = None
+    if args.candidates:
+        df = pd.concat([df, pd.read_csv(args.candidates, keep_default_na=False, na_values={TARGET: [""]})],
+                       ignore_index=True)
+    if args.model:
+        from bundle import Bundle
+        from predict import normalize_reactions
+        bundle = Bundle(args.bundle)
+        model = bundle.load(args.model)
+        df = normalize_reactions(df, bundle.schema)
+
+    network = ReactionNetwork(df, model=model, reversible=not args.irreversible)
+    try:
+        paths = network.k_shortest_paths(args.source, args.target, args.surface, args.facet,
+                                         k=args.k, alpha=args.alpha)
+    except KeyError as e:
+        # Unknown surfaces and species of the command line
+        print(e.args[0], file=sys.stderr)
+        sys.exit(1)
+    if not paths:
+        print(f"No pathway from {args.source} to {args.target} on {args.surface}({args.facet})")
+    for i, path in enumerate(paths):
+        print(f"\nPathway {i + 1}: {' -> '.join(path['species'])}")
+        print(f"Cost {path['cost']:.3f} eV, barriers {path['barrier']:.3f} eV, highest barrier "
+              f"{path['max_barrier']:.3f} eV, reaction energy {path['energy']:.3f} eV")
+        print(path["steps"].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import time
+import sys
+import os
+from bundle import Bundle
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+def read_chunks(filename, chunk_size, schema, fmt=None):
+    """
+    Reads candidate reactions from a CSV or NDJSON file in chunks. The
+    categorical columns are read as strings, and missing columns and
+    values are filled with "None" like in the cleaned data.
+
+    Params:
+      filename (string):  Name of the input file, or "-" for stdin.
+      chunk_size (int):   Number of reactions per chunk.
+      schema (dict):      The feature schema of the model bundle.
+      fmt (string):       "csv" or "ndjson". Guessed from the file
+                           extension by default.
+    Yields:
+      (DataFrame):        A chunk of reactions.
+    """
+
+    if fmt is None:
+        fmt = "ndjson" if filename.endswith((".ndjson", ".jsonl", ".json")) else "csv"
+    source = sys.stdin if filename == "-" else filename
+    text_columns = schema["categorical"] + schema["composition"]
+    if fmt == "csv":
+        reader = pd.read_csv(source, chunksize=chunk_size, keep_default_na=False,
+                             dtype={col: str for col in text_columns})
+    elif fmt == "ndjson":
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size,
+                              dtype={col: str for col in text_columns})
+    else:
+        raise ValueError(f"Unknown input format: {fmt}")
+
+    for chunk in reader:
+        yield normalize_reactions(chunk, schema)
+
+def normalize_reactions(df, schema):
+    """
+    Fills in the missing categorical columns and values of candidate
+    reactions with "None", and converts the categories into strings.
+
+    Params:
+      df (DataFrame):  The reactions.
+      schema (dict):   The feature schema of the model bundle.
+    Returns:
+      (DataFrame):     The reactions.
+    """
+
+    for col in schema["categorical"] + schema["composition"]:
+        if col not in df:
+            df[col] = "None"
+        df[col] = df[col].fillna("None").astype(str).replace("", "None")
+    return df
+
+def predict_chunk(models, chunk):
+    """
+    Predicts the activation energies of a chunk of reactions with one or
+    more models. Each model featurizes and predicts the whole chunk at once.
+
+    Params:
+      models (dict):     The model pipelines by name.
+      chunk (DataFrame): The reactions.
+    Returns:
+      (DataFrame):       The predictions, one column per model.
+    """
+
+    predictions = pd.DataFrame(index=chunk.index)
+    for name, model in models.items():
+        predictions[f"{name}_prediction"] = model.predict(chunk)
+    return predictions
+
+def predict_file(filename, output, bundle, names=None, chunk_size=10000, keep=None, fmt=None):
+    """
+    Streams the predictions of the candidate reactions in a file into an
+    output CSV file chunk by chunk, so the memory usage does not depend on
+    the number of candidates.
+
+    Params:
+      filename (string):  Name of the input file, or "-" for stdin.
+      output (file):      The output stream.
+      bundle (Bundle):    The model bundle.
+      names (list):       Names of the models, all models by default.
+      chunk_size (int):   Number of reactions per chunk.
+      keep (list):        Input columns copied into the output.
+      fmt (string):       "csv" or "ndjson", see read_chunks.
+    Returns:
+      (int):              Number of predicted reactions.
+    """
+
+    names = names or bundle.names
+    models = {name: bundle.load(name) for name in names}
+    keep = keep or []
+    n_rows = 0
+    for chunk in read_chunks(filename, chunk_size, bundle.schema, fmt=fmt):
+        predictions = predict_chunk(models, chunk)
+        out = pd.concat([chunk[[col for col in keep if col in chunk]], predictions], axis=1)
+        out.insert(0, "row", np.arange(n_rows, n_rows + len(chunk)))
+        out.to_csv(output, header=(n_rows == 0), index=False)
+        n_rows += len(chunk)
+    return n_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Predict activation energies of candidate reactions in batches.")
+    parser.add_argument("input", help="CSV or NDJSON file of candidate reactions, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output CSV file, stdout by default")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Model bundle directory")
+    parser.add_argument("-m", "--models", nargs="+", help="Names of the models, all by default")
+    parser.add_argument("-c", "--chunk-size", type=int, default=10000, help="Reactions per chunk")
+    parser.add_argument("-k", "--keep", nargs="+", help="Input columns copied into the output")
+    parser.add_argument("-f", "--format", choices=["csv", "ndjson"], help="Input format")
+    args = parser.parse_args(argv)
+
+    bundle = Bundle(args.bundle)
+    start = time.perf_counter()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        n_rows = predict_file(args.input, output, bundle, names=args.models, chunk_size=args.chunk_size,
+                              keep=args.keep, fmt=args.format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print(f"Predicted {n_rows} reactions in {elapsed:.2f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
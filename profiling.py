@@ -0,0 +1,184 @@
+# Imports
+import cProfile
+import contextlib
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Environment variables of the profiling mode and the output directory.
+# The mode is "cprofile", "sample" or "all", and profiling is off if unset.
+PROFILE_ENV = "CATALYSIS_PROFILE"
+PROFILE_DIR_ENV = "CATALYSIS_PROFILE_DIR"
+
+# Profiling modes
+MODES = ["cprofile", "sample", "all"]
+
+def profile_mode():
+    """
+    Returns the profiling mode set in the environment, or None if
+    profiling is off. A value of "1" selects the sampling profiler.
+    """
+
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if mode in ("", "0", "false", "off"):
+        return None
+    if mode in ("1", "true", "on"):
+        return "sample"
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode} in ${PROFILE_ENV}, use one of {MODES}")
+    return mode
+
+def enable_profiling(mode="sample", output_dir=None):
+    """
+    Enables profiling through the environment, so that the worker
+    processes started afterwards profile their stages too.
+
+    Params:
+      mode (string):        "cprofile", "sample" or "all".
+      output_dir (string):  Directory of the profile files.
+    """
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode}, use one of {MODES}")
+    os.environ[PROFILE_ENV] = mode
+    if output_dir is not None:
+        os.environ[PROFILE_DIR_ENV] = os.path.abspath(output_dir)
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+class SamplingProfiler:
+    """
+    A statistical profiler that samples the call stack of one thread at a
+    fixed interval from a background thread. The stacks are counted in the
+    collapsed format "root;...;leaf count" of flamegraph.pl and speedscope.
+
+    Params:
+      interval (float):  The sampling interval in seconds.
+      thread_id (int):   Identifier of the sampled thread, the current thread by default.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.stacks = Counter()
+        self.n_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.n_samples += 1
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def collapsed(self):
+        """
+        Returns the sampled stacks in the collapsed format, one stack and
+        its sample count per line.
+        """
+
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def hotspots(self, top_n=25):
+        """
+        Summarizes the functions with the most samples, both on top of the
+        stack (self) and anywhere in the stack (total).
+
+        Params:
+          top_n (int):  Number of listed functions.
+        Returns:
+          (string):     The summary table.
+        """
+
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        n = max(self.n_samples, 1)
+        lines = [f"{self.n_samples} samples every {self.interval * 1e3:.1f} ms",
+                 f"{'self %':>8} {'total %':>8}  function"]
+        for name, count in own.most_common(top_n):
+            lines.append(f"{100 * count / n:8.1f} {100 * total[name] / n:8.1f}  {name}")
+        return "\n".join(lines) + "\n"
+
+@contextlib.contextmanager
+def profile_stage(stage, mode=None, output_dir=None, top_n=25):
+    """
+    Profiles a stage, e.g. the featurization or a model search, if
+    profiling is enabled by the mode argument or the environment. The
+    sampling profiler writes <stage>-<time>-<pid>.collapsed with the
+    collapsed stacks for flamegraphs, and cProfile writes a .prof file for
+    e.g. snakeviz. Both write a .txt summary of the top_n hotspots, which
+    is also printed.
+
+    Params:
+      stage (string):       Name of the stage.
+      mode (string):        "cprofile", "sample" or "all", by default the
+                             mode set in the environment.
+      output_dir (string):  Directory of the profile files.
+      top_n (int):          Number of hotspots in the summary.
+    """
+
+    mode = mode or profile_mode()
+    if mode is None:
+        yield
+        return
+
+    output_dir = output_dir or os.environ.get(PROFILE_DIR_ENV, f"{ROOT_DIR}/data/profiles")
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{stage}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+    sampler = SamplingProfiler().start() if mode in ("sample", "all") else None
+    profiler = cProfile.Profile() if mode in ("cprofile", "all") else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+        summary = [f"Stage {stage}: {elapsed:.2f} s\n"]
+        if sampler is not None:
+            sampler.stop()
+            with open(f"{prefix}.collapsed", "w") as file:
+                file.write(sampler.collapsed())
+            summary.append(sampler.hotspots(top_n))
+        if profiler is not None:
+            profiler.dump_stats(f"{prefix}.prof")
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("tottime").print_stats(top_n)
+            summary.append(stream.getvalue())
+        with open(f"{prefix}.txt", "w") as file:
+            file.write("\n".join(summary))
+        print("\n".join(summary))
+        print(f"Saved the profile of stage {stage} into {prefix}.*")
@@ -0,0 +1,153 @@
+# Imports
+import numpy as np
+from composition import parse_composition
+
+# Metals considered for the pure metal catalyst surfaces
+METALS = [
+    "Sc", "Ti", "V", "Cr", "Mn", "Fe", "Co", "Ni", "Cu", "Zn",
+    "Y", "Zr", "Nb", "Mo", "Tc", "Ru", "Rh", "Pd", "Ag", "Cd",
+    "Hf", "Ta", "W", "Re", "Os", "Ir", "Pt", "Au", "Hg",
+    "Rf", "Db", "Sg", "Bh", "Hs", "Mt", "Ds", "Rg", "Cn",
+    "Al", "Ga", "In", "Sn", "Tl", "Pb", "Bi", "Nh", "Fl", "Mc", "Lv",
+    "Y-fcc", "Zr-fcc", "Nb-fcc", "Mo-fcc", "Tc-fcc", "Ru-fcc", "Rh-fcc", "Pd-fcc", "Ag-fcc", "Cd-fcc",
+    "Sc-fcc", "Ti-fcc", "V-fcc", "Cr-fcc", "Mn-fcc", "Fe-fcc", "Co-fcc", "Ni-fcc", "Cu-fcc", "Zn-fcc",
+    "Hf-fcc", "Ta-fcc", "W-fcc", "Re-fcc", "Os-fcc", "Ir-fcc", "Pt-fcc", "Au-fcc", "Hg-fcc",
+    "Rf-fcc", "Db-fcc", "Sg-fcc", "Bh-fcc", "Hs-fcc", "Mt-fcc", "Ds-fcc", "Rg-fcc", "Cn-fcc",
+    "Al-fcc", "Ga-fcc", "In-fcc", "Sn-fcc", "Tl-fcc", "Pb-fcc", "Bi-fcc", "Nh-fcc", "Fl-fcc", "Mc-fcc", "Lv-fcc",
+]
+
+# Columns of the cleaned data indexed under each field
+FIELDS = {
+    "composition": ["Chemical Composition", "Surface Composition"],
+    "facet": ["Facet"],
+    "site": ["Adsorption Site"],
+    "functional": ["DFT Functional"],
+    "equation": ["Reaction Equation"],
+    "species": ["Reactant 1", "Reactant 2", "Reactant 3",
+                "Product 1", "Product 2", "Product 3"],
+}
+
+class ReactionIndex:
+    """
+    An inverted index over the cleaned reaction data. Each indexed value is
+    mapped to a packed bitmap of the rows containing it, so that subsets
+    are selected with bitwise intersections instead of scanning the rows.
+
+    The indexed fields are composition, element, facet, site, functional,
+    equation and species (reactants and products), and the pure_metal flag
+    of the rows whose chemical or surface composition is exactly a metal
+    or its fcc bulk, e.g. "Pt" or "Pt-fcc".
+
+    Params:
+      df (DataFrame):  The cleaned reaction data.
+    """
+
+    def __init__(self, df):
+        self.n_rows = df.shape[0]
+        self.bitmaps = {field: {} for field in list(FIELDS) + ["element"]}
+
+        for field, columns in FIELDS.items():
+            rows = {}
+            for col in columns:
+                if col not in df:
+                    continue
+                for i, value in enumerate(df[col].astype(str).values):
+                    if value != "None":
+                        rows.setdefault(value, set()).add(i)
+            self.bitmaps[field] = {value: self._pack(ids) for value, ids in rows.items()}
+
+        # Parse each distinct composition once to index the elements
+        metals = set(METALS)
+        element_rows = {}
+        pure_metal_rows = set()
+        for composition, bitmap in self.bitmaps["composition"].items():
+            ids = self._unpack(bitmap)
+            # Like the filter of model.ipynb, a pure metal composition is
+            # exactly a metal symbol or its fcc bulk, e.g. "Pt" and "Pt-fcc"
+            # but not "Pt16" or "Pt-hcp"
+            if composition in metals:
+                pure_metal_rows.update(ids)
+            parsed = parse_composition(composition)
+            if parsed is None:
+                continue
+            for element in parsed:
+                element_rows.setdefault(element, set()).update(ids)
+        self.bitmaps["element"] = {el: self._pack(ids) for el, ids in element_rows.items()}
+        self.pure_metal = self._pack(pure_metal_rows)
+
+    def _pack(self, ids):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[list(ids)] = True
+        return np.packbits(mask)
+
+    def _unpack(self, bitmap):
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def values(self, field):
+        """
+        Lists the indexed values of a field.
+
+        Params:
+          field (string):  Name of the field.
+        Returns:
+          (list):          The sorted values.
+        """
+
+        return sorted(self.bitmaps[field])
+
+    def bitmap(self, **query):
+        """
+        Builds the packed bitmap of the rows matching a query. Each keyword
+        is a field name with a value or a list of values, and the rows
+        match if they contain any of the values of every given field.
+
+        Params:
+          query:  The field values, e.g. facet="111", species="O*",
+                   pure_metal=True.
+        Returns:
+          (array):  The packed bitmap of the matching rows.
+        """
+
+        result = np.packbits(np.ones(self.n_rows, dtype=bool))
+        for field, values in query.items():
+            if field == "pure_metal":
+                field_bitmap = self.pure_metal if values else ~self.pure_metal
+            elif field in self.bitmaps:
+                if isinstance(values, str) or not np.iterable(values):
+                    values = [values]
+                field_bitmap = np.zeros_like(result)
+                for value in values:
+                    bitmap = self.bitmaps[field].get(str(value))
+                    if bitmap is not None:
+                        field_bitmap |= bitmap
+            else:
+                raise ValueError(f"Unknown query field: {field}. Available: {list(self.bitmaps) + ['pure_metal']}")
+            result &= field_bitmap
+
+        return result
+
+    def query(self, **query):
+        """
+        Finds the positions of the rows matching a query, e.g.
+        index.query(pure_metal=True, facet="111", species="O*").
+
+        Params:
+          query:  The field values, see bitmap.
+        Returns:
+          (array):  The row positions in the indexed data.
+        """
+
+        return self._unpack(self.bitmap(**query))
+
+    def subset(self, df, **query):
+        """
+        Selects the rows matching a query from the indexed data.
+
+        Params:
+          df (DataFrame):  The data the index was built from.
+          query:           The field values, see bitmap.
+        Returns:
+          (DataFrame):     The matching rows.
+        """
+
+        return df.iloc[self.query(**query)]
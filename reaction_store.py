@@ -0,0 +1,388 @@
+# Imports
+import pandas as pd
+import argparse
+import ast
+import hashlib
+import sqlite3
+import json
+import os
+from preprocess import parse_site, parse_catapp_surface, unify_value
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# The tables and indexes of the store
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reactions (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    equation TEXT,
+    chemical_composition TEXT,
+    surface_composition TEXT,
+    facet TEXT,
+    site TEXT,
+    coverages TEXT,
+    dft_code TEXT,
+    dft_functional TEXT,
+    reaction_energy REAL,
+    activation_energy REAL,
+    pub_id TEXT,
+    UNIQUE (source, source_id)
+);
+CREATE TABLE IF NOT EXISTS species (
+    reaction_id INTEGER NOT NULL REFERENCES reactions (id) ON DELETE CASCADE,
+    side TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    count REAL,
+    PRIMARY KEY (reaction_id, side, position)
+);
+CREATE TABLE IF NOT EXISTS structures (
+    reaction_id INTEGER NOT NULL REFERENCES reactions (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    energy REAL,
+    n_atoms INTEGER,
+    xyz TEXT,
+    key_value_pairs TEXT,
+    PRIMARY KEY (reaction_id, position)
+);
+CREATE TABLE IF NOT EXISTS roles (
+    reaction_id INTEGER NOT NULL REFERENCES reactions (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (reaction_id, role, rank)
+);
+CREATE INDEX IF NOT EXISTS reactions_chemical_composition ON reactions (chemical_composition);
+CREATE INDEX IF NOT EXISTS reactions_surface_composition ON reactions (surface_composition);
+CREATE INDEX IF NOT EXISTS reactions_facet ON reactions (facet);
+CREATE INDEX IF NOT EXISTS reactions_site ON reactions (site);
+CREATE INDEX IF NOT EXISTS reactions_dft_functional ON reactions (dft_functional);
+CREATE INDEX IF NOT EXISTS reactions_reaction_energy ON reactions (reaction_energy);
+CREATE INDEX IF NOT EXISTS reactions_activation_energy ON reactions (activation_energy);
+CREATE INDEX IF NOT EXISTS species_name ON species (name, side);
+CREATE INDEX IF NOT EXISTS roles_role ON roles (role);
+"""
+
+# Columns of the reactions table set by the upserts
+REACTION_COLUMNS = [
+    "source", "source_id", "equation", "chemical_composition", "surface_composition", "facet",
+    "site", "coverages", "dft_code", "dft_functional", "reaction_energy", "activation_energy", "pub_id",
+]
+
+# Query keywords mapped to the indexed columns
+QUERY_COLUMNS = {
+    "source": "source",
+    "composition": "chemical_composition",
+    "surface": "surface_composition",
+    "facet": "facet",
+    "site": "site",
+    "functional": "dft_functional",
+    "equation": "equation",
+}
+
+# Reaction columns in the notation of the cleaned data, see preprocess.unify_notation
+UNIFIED_COLUMNS = ["equation", "chemical_composition", "surface_composition", "facet", "site", "dft_functional"]
+
+def _parse_species(species):
+    """
+    Parses the reactants or products of a Catalysis-hub reaction, e.g.
+    '{"OHstar": 1}', into a list of (name, count) tuples.
+    """
+
+    if species in (None, "None"):
+        return []
+    if isinstance(species, str):
+        try:
+            species = json.loads(species)
+        except ValueError:
+            species = ast.literal_eval(species)
+    return [(unify_value(name), float(count)) for name, count in species.items()]
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class ReactionStore:
+    """
+    An SQLite store of the reactions of both Catalysis-hub and CatApp.
+    The reactions, their species and their structures are kept in separate
+    tables, with indexes on the composition, facet, site, functional and
+    energy columns. The upserts are idempotent: a reaction is identified by
+    its source and source id, so reloading the same data replaces the
+    reactions instead of duplicating them.
+
+    Params:
+      filename (string):  Name of the SQLite database file.
+    """
+
+    def __init__(self, filename=f"{ROOT_DIR}/data/reactions.db"):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _upsert(self, values, reactants, products, structures=(), roles=()):
+        values = {**values, **{col: unify_value(values.get(col)) for col in UNIFIED_COLUMNS}}
+        columns = ", ".join(REACTION_COLUMNS)
+        placeholders = ", ".join("?" for _ in REACTION_COLUMNS)
+        updates = ", ".join(f"{col} = excluded.{col}" for col in REACTION_COLUMNS[2:])
+        self.conn.execute(
+            f"INSERT INTO reactions ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (source, source_id) DO UPDATE SET {updates}",
+            [values.get(col) for col in REACTION_COLUMNS],
+        )
+        reaction_id = self.conn.execute(
+            "SELECT id FROM reactions WHERE source = ? AND source_id = ?",
+            (values["source"], values["source_id"]),
+        ).fetchone()[0]
+
+        # Replace the species, structures and roles of an updated reaction
+        for table in ("species", "structures", "roles"):
+            self.conn.execute(f"DELETE FROM {table} WHERE reaction_id = ?", (reaction_id,))
+        self.conn.executemany(
+            "INSERT INTO species VALUES (?, ?, ?, ?, ?)",
+            [(reaction_id, side, i, name, count)
+             for side, species in (("reactant", reactants), ("product", products))
+             for i, (name, count) in enumerate(species)],
+        )
+        self.conn.executemany("INSERT INTO structures VALUES (?, ?, ?, ?, ?, ?)",
+                              [(reaction_id,) + tuple(row) for row in structures])
+        self.conn.executemany("INSERT INTO roles VALUES (?, ?, ?, ?)",
+                              [(reaction_id,) + tuple(row) for row in roles])
+        return reaction_id
+
+    def upsert_cathub(self, reaction):
+        """
+        Inserts or updates a Catalysis-hub reaction.
+
+        Params:
+          reaction (dict):  A reaction parsed with cathub.parse_reaction.
+        Returns:
+          (int):            The row id of the reaction.
+        """
+
+        kvp = reaction["key_value_pairs"]
+        try:
+            site = parse_site(kvp.get("sites", "None"))
+            reactants, products = _parse_species(kvp.get("reactants")), _parse_species(kvp.get("products"))
+        except (SyntaxError, ValueError, AttributeError) as e:
+            raise ValueError(f"Malformed sites or species in the Catalysis-hub reaction {kvp.get('id')}: {e}") from None
+        values = {
+            "source": "cathub",
+            "source_id": str(kvp["id"]),
+            "equation": kvp.get("Equation"),
+            "chemical_composition": kvp.get("chemicalComposition"),
+            "surface_composition": kvp.get("surfaceComposition"),
+            "facet": kvp.get("facet"),
+            "site": site,
+            "coverages": str(kvp.get("coverages", "None")),
+            "dft_code": kvp.get("dftCode"),
+            "dft_functional": kvp.get("dftFunctional"),
+            "reaction_energy": _float(kvp.get("reactionEnergy")),
+            "activation_energy": _float(kvp.get("activationEnergy")),
+            "pub_id": kvp.get("pubId"),
+        }
+        roles = [(role, rank, i) for role, positions in reaction.get("roles", {}).items()
+                 for rank, i in enumerate(positions)]
+        structures = []
+        for i, struct in enumerate(reaction["structures"]):
+            xyz = struct.get("InputFile")
+            try:
+                n_atoms = int(xyz.split("\n", 1)[0])
+            except (AttributeError, ValueError):
+                n_atoms = None
+            structures.append((i, _float(struct.get("energy")), n_atoms, xyz,
+                               json.dumps(struct.get("keyValuePairs"))))
+        return self._upsert(values, reactants, products, structures, roles)
+
+    def upsert_catapp(self, reaction):
+        """
+        Inserts or updates a CatApp reaction. CatApp has no reaction ids,
+        so the reaction is identified by a hash of its species, surface,
+        site and functional.
+
+        Params:
+          reaction (dict):  A reaction extracted with catapp.extract_reaction.
+        Returns:
+          (int):            The row id of the reaction.
+        """
+
+        key = [reaction[k] for k in ("reactant_a", "reactant_b", "product_ab", "reactant_surface",
+                                     "reactant_facet", "site", "dft_functional")]
+        composition, facet = parse_catapp_surface(reaction["reactant_surface"], reaction["reactant_facet"])
+        # Like preprocess.parse_reactants_products, CatApp has no equation or surface composition
+        values = {
+            "source": "catapp",
+            "source_id": hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest(),
+            "equation": None,
+            "chemical_composition": composition,
+            "surface_composition": None,
+            "facet": facet,
+            "site": reaction["site"],
+            "dft_functional": reaction["dft_functional"],
+            "reaction_energy": _float(reaction["reaction_energy"]),
+            "activation_energy": _float(reaction["activation_energy"]),
+        }
+        reactants = [(unify_value(reaction["reactant_a"]), 1.0), (unify_value(reaction["reactant_b"]), 1.0)]
+        return self._upsert(values, reactants, [(unify_value(reaction["product_ab"]), 1.0)])
+
+    def load_json(self, filename):
+        """
+        Upserts all reactions of a reactions_cathub.json or
+        reactions_catapp.json file in one transaction.
+
+        Params:
+          filename (string):  Name of the Json datafile.
+        Returns:
+          (int):              Number of upserted reactions.
+        """
+
+        with open(filename, "r") as file:
+            data = json.load(file)
+        upsert = self.upsert_catapp if "catapp" in os.path.basename(filename) else self.upsert_cathub
+        with self.conn:
+            for reaction in data.values():
+                upsert(reaction)
+        print(f"Upserted {len(data)} reactions from file {filename}")
+        return len(data)
+
+    def _where(self, species=None, min_ea=None, max_ea=None, min_er=None, max_er=None, **query):
+        clauses, params = [], []
+        for key, value in query.items():
+            if key not in QUERY_COLUMNS:
+                raise KeyError(f"Unknown query field: {key}. Available: {list(QUERY_COLUMNS)}")
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            if not values:
+                # An empty list of values matches no reaction
+                return " WHERE 0", []
+            clauses.append(f"r.{QUERY_COLUMNS[key]} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        for column, bound, op in [("activation_energy", min_ea, ">="), ("activation_energy", max_ea, "<="),
+                                  ("reaction_energy", min_er, ">="), ("reaction_energy", max_er, "<=")]:
+            if bound is not None:
+                clauses.append(f"r.{column} {op} ?")
+                params.append(bound)
+        if species is not None and not isinstance(species, str) and not list(species):
+            return " WHERE 0", []
+        for name in ([species] if isinstance(species, str) else species or []):
+            clauses.append("r.id IN (SELECT reaction_id FROM species WHERE name = ?)")
+            params.append(name)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, chunk_size=None, **query):
+        """
+        Selects reactions with an indexed query, e.g.
+        store.query(composition="Pt", facet="111", max_ea=1.0, species="O*").
+        Each keyword is a field with a value or a list of values, and the
+        energies are bounded with min_ea, max_ea, min_er and max_er.
+
+        Params:
+          chunk_size (int):  Return an iterator of chunks of this size instead.
+          query:             The query fields.
+        Returns:
+          (DataFrame):       The rows of the reactions table.
+        """
+
+        where, params = self._where(**query)
+        sql = f"SELECT r.* FROM reactions r{where} ORDER BY r.id"
+        return pd.read_sql_query(sql, self.conn, params=params, chunksize=chunk_size)
+
+    def dataframe(self, **query):
+        """
+        Selects reactions like query, in the column layout and the notation
+        of the cleaned data, with the reactants and products in numbered
+        columns. The rows are not filtered like in preprocess.main, and the
+        DFT functional of the CatApp reactions is kept.
+
+        Returns:
+          (DataFrame):  The reactions.
+        """
+
+        reactions = self.query(**query)
+        where, params = self._where(**query)
+        species = pd.read_sql_query(
+            f"SELECT s.reaction_id, s.side, s.position, s.name FROM species s "
+            f"JOIN reactions r ON r.id = s.reaction_id{where}", self.conn, params=params)
+        species["column"] = (species["side"].str.capitalize() + " " + (species["position"] + 1).astype(str))
+        species = species.pivot(index="reaction_id", columns="column", values="name")
+
+        df = pd.DataFrame({"id": reactions["id"]}).join(species, on="id")
+        for col in ["Reactant 1", "Reactant 2", "Reactant 3", "Product 1", "Product 2", "Product 3"]:
+            if col not in df:
+                df[col] = "None"
+        df = df[["Reactant 1", "Reactant 2", "Reactant 3", "Product 1", "Product 2", "Product 3"]].fillna("None")
+        for col, source in [("Chemical Composition", "chemical_composition"),
+                            ("Surface Composition", "surface_composition"),
+                            ("Facet", "facet"), ("Adsorption Site", "site"),
+                            ("Reaction Equation", "equation"), ("DFT Functional", "dft_functional")]:
+            df[col] = reactions[source].fillna("None").values
+        df["Reaction Energy"] = reactions["reaction_energy"].values
+        df["Activation Energy"] = reactions["activation_energy"].values
+        return df.reset_index(drop=True)
+
+    def structures(self, reaction_ids, roles=("initial", "final"), first=True):
+        """
+        Reads the structures of the given roles of reactions. A structure
+        can have several roles, e.g. the bare slab is also the initial
+        state of a reaction with only gas-phase reactants.
+
+        Params:
+          reaction_ids (list):  Row ids of the reactions.
+          roles (tuple):        The structure roles, see cathub.build_role_index.
+          first (bool):         Read only the first structure of each role, in
+                                 the role order of cathub.build_role_index.
+        Returns:
+          (DataFrame):          The structures with the role and the xyz data.
+        """
+
+        reaction_ids = [int(i) for i in reaction_ids]
+        if not reaction_ids or not roles:
+            reaction_ids, roles = [], ["none"]
+        sql = (f"SELECT r.role, r.rank, s.* FROM roles r "
+               f"JOIN structures s ON s.reaction_id = r.reaction_id AND s.position = r.position "
+               f"WHERE r.reaction_id IN ({', '.join('?' for _ in reaction_ids)}) "
+               f"AND r.role IN ({', '.join('?' for _ in roles)})"
+               f"{' AND r.rank = 0' if first else ''} ORDER BY r.reaction_id, r.role, r.rank")
+        return pd.read_sql_query(sql, self.conn, params=reaction_ids + list(roles))
+
+    def stats(self):
+        """
+        Counts the reactions by source, and the species, structures and roles.
+        """
+
+        counts = dict(self.conn.execute("SELECT source, COUNT(*) FROM reactions GROUP BY source").fetchall())
+        counts["species"] = self.conn.execute("SELECT COUNT(*) FROM species").fetchone()[0]
+        counts["structures"] = self.conn.execute("SELECT COUNT(*) FROM structures").fetchone()[0]
+        counts["roles"] = self.conn.execute("SELECT COUNT(*) FROM roles").fetchone()[0]
+        return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load the fetched reactions into the SQLite reaction store.")
+    parser.add_argument("files", nargs="*", help="Json datafiles, the fetched Catalysis-hub and CatApp "
+                                                 "reactions by default")
+    parser.add_argument("--db", default=f"{ROOT_DIR}/data/reactions.db", help="SQLite database file")
+    args = parser.parse_args(argv)
+
+    files = args.files or [f for f in (f"{ROOT_DIR}/data/reactions_cathub.json",
+                                       f"{ROOT_DIR}/data/reactions_catapp.json") if os.path.isfile(f)]
+    with ReactionStore(args.db) as store:
+        for filename in files:
+            store.load_json(filename)
+        print(f"Reaction store {args.db}: {store.stats()}")
+
+if __name__ == "__main__":
+    main()
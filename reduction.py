@@ -0,0 +1,190 @@
+# Imports
+import numpy as np
+import pickle
+import os
+from scipy import sparse
+from sklearn.decomposition import IncrementalPCA
+from sklearn.random_projection import SparseRandomProjection
+from descriptors import load_descriptors
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+def iter_chunks(X, chunk_size, min_size=1):
+    """
+    Iterates over the rows of a matrix in dense chunks. The last chunk is
+    merged into the previous one if it is smaller than min_size.
+
+    Params:
+      X (csr_matrix/array):  The matrix, sparse or memory-mapped.
+      chunk_size (int):      Number of rows per chunk.
+      min_size (int):        Minimum number of rows per chunk.
+    Yields:
+      (array):               The dense rows of the chunk.
+    """
+
+    n_rows = X.shape[0]
+    starts = list(range(0, n_rows, chunk_size))
+    if len(starts) > 1 and n_rows - starts[-1] < min_size:
+        starts.pop()
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else n_rows
+        chunk = X[start:end]
+        if sparse.issparse(chunk):
+            chunk = chunk.toarray()
+        yield np.asarray(chunk, dtype=np.float64)
+
+def match_width(X, n_features):
+    """
+    Pads a matrix with zero columns, or drops the extra columns, so that it
+    has the number of features the projection was fitted on.
+
+    Params:
+      X (csr_matrix/array):  The matrix.
+      n_features (int):      The number of features.
+    Returns:
+      X (csr_matrix/array):  The matrix with n_features columns.
+    """
+
+    if X.shape[1] > n_features:
+        print(f"WARNING: Dropping {X.shape[1] - n_features} features not seen in fitting")
+        X = X[:, :n_features]
+    elif X.shape[1] < n_features:
+        X = sparse.csr_matrix(X)
+        X = sparse.hstack([X, sparse.csr_matrix((X.shape[0], n_features - X.shape[1]))], format="csr")
+
+    return X
+
+def fit_reduction(X, method="ipca", n_components=100, chunk_size=1000, random_state=0):
+    """
+    Fits a dimensionality reduction of the structure descriptors chunk by
+    chunk, so that the full-width matrix is never loaded into memory as a
+    whole. Incremental PCA is updated with each chunk, while the sparse
+    random projection only needs the number of features.
+
+    Params:
+      X (csr_matrix/array):  The descriptors, sparse or memory-mapped.
+      method (string):       "ipca" for incremental PCA or "srp" for
+                              sparse random projection.
+      n_components (int):    Dimension of the projection.
+      chunk_size (int):      Number of rows per chunk.
+      random_state (int):    Seed of the random projection.
+    Returns:
+      reducer (estimator):   The fitted projection.
+    """
+
+    if method == "ipca":
+        n_components = min(n_components, X.shape[0], X.shape[1])
+        reducer = IncrementalPCA(n_components=n_components)
+        chunk_size = max(chunk_size, n_components)
+        for chunk in iter_chunks(X, chunk_size, min_size=n_components):
+            reducer.partial_fit(chunk)
+    elif method == "srp":
+        reducer = SparseRandomProjection(n_components=n_components, random_state=random_state)
+        reducer.fit(X[:1])
+    else:
+        raise ValueError(f"Unknown reduction method: {method}")
+
+    return reducer
+
+def transform_descriptors(reducer, X, chunk_size=1000):
+    """
+    Applies a fitted projection to the descriptors chunk by chunk.
+
+    Params:
+      reducer (estimator):   The fitted projection.
+      X (csr_matrix/array):  The descriptors, sparse or memory-mapped.
+      chunk_size (int):      Number of rows per chunk.
+    Returns:
+      (array):               The reduced descriptors.
+    """
+
+    X = match_width(X, reducer.components_.shape[1])
+    reduced = [np.asarray(reducer.transform(chunk)) for chunk in iter_chunks(X, chunk_size)]
+
+    return np.vstack(reduced)
+
+def save_reduction(reducer, filename, method, n_components):
+    """
+    Saves a fitted projection to a pickle file with the settings it was
+    fitted with, so that a later call can check that they still match.
+
+    Params:
+      reducer (estimator):  The fitted projection.
+      filename (string):    Name of the pickle file.
+      method (string):      "ipca" or "srp".
+      n_components (int):   The requested dimension of the projection.
+    """
+
+    reduction = {"reducer": reducer, "method": method, "n_components": n_components,
+                 "n_features": reducer.components_.shape[1]}
+    with open(filename, "wb") as file:
+        pickle.dump(reduction, file)
+
+def load_reduction(filename):
+    """
+    Loads a fitted projection from a pickle file. A file with a bare
+    projection, saved by an older version, has no settings.
+
+    Params:
+      filename (string):  Name of the pickle file.
+    Returns:
+      (dict):             The projection under "reducer", and its method,
+                           n_components and n_features.
+    """
+
+    with open(filename, "rb") as file:
+        reduction = pickle.load(file)
+    if not isinstance(reduction, dict):
+        reduction = {"reducer": reduction, "method": None, "n_components": None,
+                     "n_features": reduction.components_.shape[1]}
+    return reduction
+
+def reduce_descriptor_file(filename, reduction_file, method="ipca", n_components=100, chunk_size=1000, refit=True):
+    """
+    Reduces the structure descriptors saved with save_descriptors. The
+    projection is fitted and saved on the first call, and loaded from
+    reduction_file on the later calls, e.g. at prediction time. If the
+    saved projection was fitted with another method or dimension, it is
+    refitted, or an error is raised when refit is False. A descriptor
+    width differing from the fitted one also refits the projection, and
+    is otherwise padded or cut with match_width.
+
+    Params:
+      filename (string):        Name of the descriptor .npz file.
+      reduction_file (string):  Name of the projection pickle file.
+      method (string):          "ipca" or "srp".
+      n_components (int):       Dimension of the projection.
+      chunk_size (int):         Number of rows per chunk.
+      refit (bool):             Refit a mismatching projection, False at
+                                 prediction time.
+    Returns:
+      X (array):                The reduced descriptors.
+      y (array):                The activation energies.
+      ids (array):              The reaction ids.
+    """
+
+    X, y, ids = load_descriptors(filename)
+    reducer = None
+    if os.path.isfile(reduction_file):
+        reduction = load_reduction(reduction_file)
+        saved = (reduction["method"], reduction["n_components"])
+        if saved != (method, n_components):
+            if not refit:
+                raise ValueError(f"The projection in {reduction_file} was fitted with method {saved[0]} and "
+                                 f"{saved[1]} components, not {method} and {n_components}")
+            print(f"Refitting the projection in {reduction_file}, fitted with method {saved[0]} "
+                  f"and {saved[1]} components")
+        elif refit and reduction["n_features"] != X.shape[1]:
+            print(f"Refitting the projection in {reduction_file}, fitted on {reduction['n_features']} "
+                  f"features instead of {X.shape[1]}")
+        else:
+            reducer = reduction["reducer"]
+    if reducer is None:
+        reducer = fit_reduction(X, method=method, n_components=n_components, chunk_size=chunk_size)
+        save_reduction(reducer, reduction_file, method, n_components)
+        print(f"Saved the {method} projection into {reduction_file}")
+    X = transform_descriptors(reducer, X, chunk_size=chunk_size)
+    print(f"Reduced the descriptors into {X.shape[1]} features")
+
+    return X, y, ids
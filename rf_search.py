@@ -0,0 +1,241 @@
+# Imports
+import numpy as np
+import hashlib
+import json
+import time
+import os
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.ensemble import RandomForestRegressor as RFR
+from sklearn.model_selection import KFold, ParameterSampler, cross_val_score
+from encoding import data_hash
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Parameters that do not change the scores, left out of the trial keys
+IGNORED_PARAMS = ("n_jobs", "verbose")
+
+def describe_estimator(estimator):
+    """
+    Describes the full configuration of an estimator for the trial keys,
+    e.g. the encoding of the featurizer and the fixed parameters of the
+    model of a pipeline. The nested estimators are described by their
+    class, their own parameters being listed separately.
+
+    Params:
+      estimator (estimator):  The estimator.
+    Returns:
+      (list):                 The class name and the sorted parameters.
+    """
+
+    params = []
+    for name, value in sorted(estimator.get_params(deep=True).items()):
+        if name.split("__")[-1] in IGNORED_PARAMS:
+            continue
+        if hasattr(value, "get_params"):
+            value = type(value).__name__
+        elif isinstance(value, (list, tuple)):
+            value = [(v[0], type(v[1]).__name__) if isinstance(v, tuple) and hasattr(v[-1], "get_params")
+                     else v for v in value]
+        elif not isinstance(value, (str, int, float, bool, type(None))):
+            value = repr(value)
+        params.append((name, value))
+    return [type(estimator).__name__, params]
+
+class TrialStore:
+    """
+    An on-disk store of evaluated search trials. Each trial is one Json
+    line keyed by the estimator, the parameters, the resources and the
+    hash of the training data, so reruns and extended searches skip the
+    configurations already evaluated.
+
+    Params:
+      filename (string):  Name of the Json lines file.
+    """
+
+    def __init__(self, filename=f"{ROOT_DIR}/data/rf_trials.jsonl"):
+        self.filename = filename
+        self.trials = {}
+        if os.path.isfile(filename):
+            with open(filename, "r") as file:
+                for line in file:
+                    try:
+                        trial = json.loads(line)
+                    except ValueError:
+                        # Skip a line left incomplete by an interrupted run
+                        continue
+                    self.trials[trial["key"]] = trial
+
+    @staticmethod
+    def key(estimator, params, resources, data):
+        """
+        Builds the key of a trial.
+
+        Params:
+          estimator (list):    Description of the estimator, see describe_estimator.
+          params (dict):       The searched parameters.
+          resources (dict):    The resources, e.g. n_estimators and n_samples.
+          data (string):       Hash of the training data.
+        Returns:
+          (string):            The trial key.
+        """
+
+        content = json.dumps([estimator, params, resources, data], sort_keys=True, default=str)
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def get(self, key):
+        return self.trials.get(key)
+
+    def put(self, trial):
+        self.trials[trial["key"]] = trial
+        with open(self.filename, "a") as file:
+            file.write(json.dumps(trial, default=str) + "\n")
+
+    def __len__(self):
+        return len(self.trials)
+
+class SuccessiveHalvingSearch(BaseEstimator, RegressorMixin):
+    """
+    Randomized hyperparameter search with successive halving. All sampled
+    candidates are first evaluated with few trees on a subsample of the
+    data, and only the best 1/factor of them advance to the next rung,
+    where the number of trees and samples grows by the factor. The number
+    of trees is the budget resource, so it is not sampled.
+
+    Every evaluated trial is saved into a TrialStore, and the search stops
+    early once the wall-clock budget is used up. The best candidate of the
+    highest completed rung, i.e. a rung with all of its candidates scored,
+    is refitted on all data with max_resource trees.
+
+    Params:
+      param_distributions (dict):  The parameter lists or distributions.
+      estimator (estimator):       The model, a random forest by default.
+                                    Can be a pipeline from encoding.make_model.
+      resource (string):           Name of the number of trees parameter,
+                                    e.g. "model__n_estimators" for pipelines.
+      n_candidates (int):          Number of sampled candidates.
+      factor (int):                Reduction factor between the rungs.
+      min_resource (int):          Number of trees on the first rung.
+      max_resource (int):          Number of trees on the last rung.
+      min_samples (int):           Minimum number of samples on the first rung.
+      cv (int):                    Number of cross-validation folds.
+      time_budget (float):         Wall-clock budget in seconds, or None.
+      store (TrialStore):          Optional store of the evaluated trials.
+      n_jobs (int):                Number of jobs for the cross-validation.
+      random_state (int):          Seed of the sampling and the folds.
+      verbose (int):               Print the progress of each rung.
+    """
+
+    def __init__(self, param_distributions, estimator=None, resource="n_estimators",
+                 n_candidates=400, factor=3, min_resource=10, max_resource=300,
+                 min_samples=100, cv=5, time_budget=None, store=None, n_jobs=-1,
+                 random_state=0, verbose=1):
+        self.param_distributions = param_distributions
+        self.estimator = estimator
+        self.resource = resource
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.min_samples = min_samples
+        self.cv = cv
+        self.time_budget = time_budget
+        self.store = store
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.verbose = verbose
+
+    def _rungs(self, n_samples):
+        """
+        Plans the rungs as (n_candidates, n_trees, n_samples) tuples, so
+        that the last rung uses max_resource trees and all samples.
+        """
+
+        n_rungs = 1
+        while (self.n_candidates // self.factor**n_rungs >= 1
+               and self.max_resource // self.factor**n_rungs >= self.min_resource
+               and n_samples // self.factor**n_rungs >= self.min_samples):
+            n_rungs += 1
+        rungs = []
+        for k in range(n_rungs):
+            scale = self.factor**(n_rungs - 1 - k)
+            rungs.append((
+                max(self.n_candidates // self.factor**k, 1),
+                max(self.max_resource // scale, 1),
+                max(n_samples // scale, 1),
+            ))
+        return rungs
+
+    def fit(self, X, y):
+        start = time.perf_counter()
+        y = np.asarray(y, dtype=np.float64)
+        estimator = RFR() if self.estimator is None else self.estimator
+        description = describe_estimator(estimator)
+        distributions = {k: v for k, v in self.param_distributions.items() if k != self.resource}
+        candidates = list(ParameterSampler(distributions, self.n_candidates, random_state=self.random_state))
+        # Subsamples are taken from the same shuffled order on every rung
+        order = np.random.RandomState(self.random_state).permutation(len(y))
+        folds = KFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+
+        self.results_ = []
+        self.n_evaluated_ = 0
+        self.n_cached_ = 0
+        best = None
+        for rung, (n_keep, n_trees, n_samples) in enumerate(self._rungs(len(y))):
+            candidates = candidates[:n_keep]
+            rows = np.sort(order[:n_samples])
+            X_rung = X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+            y_rung = y[rows]
+            data = data_hash(X_rung, y_rung)
+            scores = []
+            for params in candidates:
+                if self.time_budget is not None and time.perf_counter() - start > self.time_budget:
+                    break
+                resources = {self.resource: n_trees, "n_samples": n_samples, "cv": self.cv,
+                             "random_state": self.random_state}
+                key = TrialStore.key(description, params, resources, data)
+                trial = self.store.get(key) if self.store is not None else None
+                if trial is None:
+                    model = clone(estimator).set_params(**params, **{self.resource: n_trees})
+                    t0 = time.perf_counter()
+                    score = cross_val_score(model, X_rung, y_rung, cv=folds, n_jobs=self.n_jobs).mean()
+                    trial = {"key": key, "params": params, "resources": resources,
+                             "score": score, "fit_time": time.perf_counter() - t0}
+                    if self.store is not None:
+                        self.store.put(trial)
+                    self.n_evaluated_ += 1
+                else:
+                    self.n_cached_ += 1
+                scores.append(trial["score"])
+                self.results_.append({"rung": rung, "params": params, "n_trees": n_trees,
+                                      "n_samples": n_samples, "score": trial["score"]})
+            if len(scores) < len(candidates):
+                # A rung cut short by the budget is not ranked
+                print("Time budget used up, stopping the search")
+                break
+            # Sort the evaluated candidates by decreasing score
+            ranking = np.argsort(scores)[::-1]
+            candidates = [candidates[i] for i in ranking]
+            best = (candidates[0], scores[ranking[0]], rung)
+            if self.verbose:
+                print(f"Rung {rung}: {len(scores)} candidates, {n_trees} trees, {n_samples} samples, "
+                      f"best score {best[1]:.4f} ({time.perf_counter() - start:.1f} s)")
+
+        if best is None:
+            if not self.results_:
+                raise RuntimeError(f"The time budget of {self.time_budget} s ran out before any trial finished")
+            # Fall back to the best trial of the incomplete first rung
+            trial = max(self.results_, key=lambda result: result["score"])
+            best = (trial["params"], trial["score"], trial["rung"])
+            print("No rung was completed, using the best trial of the first rung")
+
+        self.best_params_ = {**best[0], self.resource: self.max_resource}
+        self.best_score_ = best[1]
+        self.best_rung_ = best[2]
+        self.best_estimator_ = clone(estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y)
+
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
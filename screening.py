@@ -0,0 +1,155 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import itertools
+import time
+import sys
+import os
+from bundle import Bundle
+from predict import normalize_reactions
+from reaction_index import ReactionIndex
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Columns that define a reaction template
+TEMPLATE_COLUMNS = [
+    "Reactant 1",
+    "Reactant 2",
+    "Reactant 3",
+    "Product 1",
+    "Product 2",
+    "Product 3",
+    "Reaction Equation",
+]
+
+def reaction_templates(df, min_count=1):
+    """
+    Collects the distinct reaction templates of the training data, i.e.
+    the reactants, products and reaction equation without the catalyst,
+    with the mean reaction energy of each template.
+
+    The mean reaction energy is over all the catalysts of the template, and
+    iter_candidates gives it to every metal, facet and site. The candidates
+    of a template differ only in the catalyst columns, so the ranking
+    reflects how the model scores the catalysts, not per-surface reaction
+    energies.
+
+    Params:
+      df (DataFrame):   The cleaned reaction data.
+      min_count (int):  Minimum number of reactions of a template.
+    Returns:
+      (DataFrame):      The templates with the "Reaction Energy" and "count" columns.
+    """
+
+    columns = [col for col in TEMPLATE_COLUMNS if col in df]
+    templates = df.groupby(columns, sort=False)["Reaction Energy"].agg(["mean", "size"]).reset_index()
+    templates = templates.rename(columns={"mean": "Reaction Energy", "size": "count"})
+    return templates[templates["count"] >= min_count].reset_index(drop=True)
+
+def iter_candidates(templates, metals, facets, sites, chunk_size=100000):
+    """
+    Enumerates the cross product of the reaction templates, metals,
+    facets and adsorption sites lazily, in chunks of candidate reactions.
+    The catalyst surface of each candidate is the pure metal, and the
+    reaction energy is the template mean, see reaction_templates.
+
+    Params:
+      templates (DataFrame):  The templates, see reaction_templates.
+      metals (list):          The metals.
+      facets (list):          The facets.
+      sites (list):           The adsorption sites.
+      chunk_size (int):       Number of candidates per chunk.
+    Yields:
+      (DataFrame):            A chunk of candidate reactions.
+    """
+
+    template_columns = [col for col in templates.columns if col != "count"]
+    combinations = itertools.product(range(len(templates)), metals, facets, sites)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(combinations, chunk_size))
+        if not chunk:
+            break
+        rows, chunk_metals, chunk_facets, chunk_sites = zip(*chunk)
+        candidates = templates[template_columns].iloc[list(rows)].reset_index(drop=True)
+        candidates["Chemical Composition"] = chunk_metals
+        candidates["Surface Composition"] = chunk_metals
+        candidates["Facet"] = chunk_facets
+        candidates["Adsorption Site"] = chunk_sites
+        candidates.index = pd.RangeIndex(start, start + len(candidates))
+        start += len(candidates)
+        yield candidates
+
+def screen(model, chunks, schema, top_k=100):
+    """
+    Predicts the activation energies of candidate chunks in vectorized
+    batches, and keeps only the top_k candidates with the lowest barriers,
+    so the memory usage does not depend on the number of candidates.
+
+    Params:
+      model (Pipeline):  The trained model pipeline.
+      chunks (iterable): The candidate chunks, see iter_candidates.
+      schema (dict):     The feature schema of the model bundle.
+      top_k (int):       Number of kept candidates.
+    Returns:
+      best (DataFrame):  The kept candidates sorted by the predicted barrier,
+                          an empty frame of the schema columns if there
+                          were no candidates.
+      n_screened (int):  Number of screened candidates.
+    """
+
+    best = None
+    n_screened = 0
+    for chunk in chunks:
+        chunk = normalize_reactions(chunk, schema)
+        chunk["Predicted Activation Energy"] = model.predict(chunk)
+        n_screened += len(chunk)
+        if len(chunk) > top_k:
+            keep = np.argpartition(chunk["Predicted Activation Energy"].values, top_k - 1)[:top_k]
+            chunk = chunk.iloc[keep]
+        best = chunk if best is None else pd.concat([best, chunk])
+        best = best.nsmallest(top_k, "Predicted Activation Energy")
+    if best is None:
+        columns = schema["categorical"] + schema["composition"] + schema["numeric"]
+        best = pd.DataFrame(columns=columns + ["Predicted Activation Energy"])
+    return best, n_screened
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Screen the cross product of reaction templates, metals, facets and sites.")
+    parser.add_argument("-d", "--data", default=f"{ROOT_DIR}/data/data.csv", help="Cleaned reaction data")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Model bundle directory")
+    parser.add_argument("-m", "--model", default="rfr_enc", help="Name of the model")
+    parser.add_argument("-o", "--output", default="-", help="Output CSV file, stdout by default")
+    parser.add_argument("--metals", nargs="+", help="Metals, the pure metals of the data by default")
+    parser.add_argument("--facets", nargs="+", help="Facets, the facets of the data by default")
+    parser.add_argument("--sites", nargs="+", help="Adsorption sites, the sites of the data by default")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum number of reactions per template")
+    parser.add_argument("-c", "--chunk-size", type=int, default=100000, help="Candidates per chunk")
+    parser.add_argument("-k", "--top-k", type=int, default=100, help="Number of kept candidates")
+    args = parser.parse_args(argv)
+
+    df = pd.read_pickle(args.data)
+    index = ReactionIndex(df)
+    pure = index.subset(df, pure_metal=True)
+    templates = reaction_templates(df, min_count=args.min_count)
+    metals = args.metals or sorted(pure["Chemical Composition"].astype(str).unique())
+    facets = args.facets or index.values("facet")
+    sites = args.sites or ["None"] + index.values("site")
+    n_total = len(templates) * len(metals) * len(facets) * len(sites)
+    print(f"Screening {n_total} candidates from {len(templates)} templates, {len(metals)} metals, "
+          f"{len(facets)} facets and {len(sites)} sites", file=sys.stderr)
+
+    bundle = Bundle(args.bundle)
+    start = time.perf_counter()
+    chunks = iter_candidates(templates, metals, facets, sites, chunk_size=args.chunk_size)
+    best, n_screened = screen(bundle.load(args.model), chunks, bundle.schema, top_k=args.top_k)
+    if n_screened == 0:
+        print("No candidates to screen, check the templates, metals, facets and sites", file=sys.stderr)
+    best.to_csv(sys.stdout if args.output == "-" else args.output, index=False)
+    print(f"Screened {n_screened} candidates in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
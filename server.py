@@ -0,0 +1,265 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import json
+import queue
+import threading
+import time
+import os
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bundle import Bundle
+from predict import normalize_reactions
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests of a model into micro-batches.
+    A worker thread waits for the first request, collects more requests
+    until max_batch reactions or max_wait seconds are reached, and predicts
+    the whole batch with one vectorized predict call.
+
+    Params:
+      model (Pipeline):  The warm model pipeline.
+      max_batch (int):   Maximum number of reactions per batch.
+      max_wait (float):  Maximum time to wait for more requests in seconds.
+    """
+
+    def __init__(self, model, max_batch=1024, max_wait=0.005):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.n_batches = 0
+        self.n_reactions = 0
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, reactions):
+        """
+        Queues reactions for prediction.
+
+        Params:
+          reactions (DataFrame):  The reactions.
+        Returns:
+          (Future):               The future of the predictions array.
+        """
+
+        future = Future()
+        self.requests.put((reactions, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            try:
+                predictions = self.model.predict(pd.concat([reactions for reactions, _ in batch], ignore_index=True))
+            except Exception:
+                # Retry the requests one by one, so only the failing ones get the error
+                for reactions, future in batch:
+                    try:
+                        future.set_result(self.model.predict(reactions))
+                    except Exception as e:
+                        future.set_exception(e)
+            else:
+                start = 0
+                for reactions, future in batch:
+                    future.set_result(predictions[start:start + len(reactions)])
+                    start += len(reactions)
+            with self.lock:
+                self.n_batches += 1
+                self.n_reactions += size
+
+def validate_reactions(records, schema):
+    """
+    Converts the reactions of a request into the cleaned data layout, and
+    checks that the numerical columns are present and numeric, so that a
+    malformed request fails before it is batched with the others.
+
+    Params:
+      records (list):  The reactions as dictionaries of the cleaned data columns.
+      schema (dict):   The feature schema of the model bundle.
+    Returns:
+      (DataFrame):     The reactions.
+    """
+
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise TypeError("The reactions must be a list of objects")
+    reactions = normalize_reactions(pd.DataFrame.from_records(records), schema)
+    for col in schema["numeric"]:
+        if col not in reactions:
+            raise KeyError(f"Missing column: {col}")
+        values = pd.to_numeric(reactions[col], errors="coerce")
+        if values.isna().any():
+            raise ValueError(f"Non-numeric values in column {col}: {reactions[col][values.isna()].tolist()}")
+        reactions[col] = values
+    return reactions
+
+class InferenceService:
+    """
+    Keeps the models of a bundle warm in memory with a micro-batcher per
+    model, and records the request latencies and throughput.
+
+    Params:
+      bundle (Bundle):   The model bundle.
+      names (list):      Names of the served models, all by default.
+      max_batch (int):   Maximum number of reactions per batch.
+      max_wait (float):  Maximum batching delay in seconds.
+    """
+
+    def __init__(self, bundle, names=None, max_batch=1024, max_wait=0.005):
+        self.bundle = bundle
+        self.batchers = {
+            name: MicroBatcher(bundle.load(name), max_batch=max_batch, max_wait=max_wait)
+            for name in (names or bundle.names)
+        }
+        self.started = time.perf_counter()
+        self.latencies = []
+        self.n_requests = 0
+        self.lock = threading.Lock()
+
+    def predict(self, records, names=None):
+        """
+        Predicts the activation energies of reactions with the given models.
+
+        Params:
+          records (list):  The reactions as dictionaries of the cleaned data columns.
+          names (list):    Names of the models, all served models by default.
+        Returns:
+          (dict):          The predictions by model name.
+        """
+
+        start = time.perf_counter()
+        reactions = validate_reactions(records, self.bundle.schema)
+        names = names or list(self.batchers)
+        futures = {name: self.batchers[name].submit(reactions) for name in names}
+        predictions = {name: future.result().tolist() for name, future in futures.items()}
+        with self.lock:
+            self.n_requests += 1
+            self.latencies.append(time.perf_counter() - start)
+            # Keep only the recent latencies
+            self.latencies = self.latencies[-10000:]
+        return predictions
+
+    def metrics(self):
+        """
+        Returns the latency percentiles in milliseconds, the request and
+        reaction throughput per second, and the mean batch size per model.
+        """
+
+        with self.lock:
+            latencies = np.array(self.latencies) * 1e3
+            n_requests = self.n_requests
+        uptime = time.perf_counter() - self.started
+        metrics = {
+            "uptime": uptime,
+            "requests": n_requests,
+            "requests_per_second": n_requests / uptime,
+            "latency_ms": {
+                f"p{p}": float(np.percentile(latencies, p)) if len(latencies) else None
+                for p in (50, 95, 99)
+            },
+            "models": {},
+        }
+        for name, batcher in self.batchers.items():
+            with batcher.lock:
+                metrics["models"][name] = {
+                    "batches": batcher.n_batches,
+                    "reactions": batcher.n_reactions,
+                    "reactions_per_second": batcher.n_reactions / uptime,
+                    "mean_batch_size": batcher.n_reactions / batcher.n_batches if batcher.n_batches else 0,
+                }
+        return metrics
+
+def make_handler(service):
+    """
+    Builds the HTTP request handler of an inference service. The endpoints
+    are POST /predict with a Json body {"reactions": [...], "models": [...]},
+    GET /metrics and GET /models.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, status, content):
+            body = json.dumps(content).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, service.metrics())
+            elif self.path == "/models":
+                self._send(200, {name: service.bundle.metrics(name) for name in service.batchers})
+            else:
+                self._send(404, {"error": f"Unknown path: {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": f"Unknown path: {self.path}"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if isinstance(request, list):
+                    request = {"reactions": request}
+                names = request.get("models")
+                unknown = [name for name in names or [] if name not in service.batchers]
+                if unknown:
+                    self._send(400, {"error": f"Unknown models: {unknown}"})
+                    return
+                self._send(200, {"predictions": service.predict(request["reactions"], names)})
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, format, *args):
+            # Keep the request logging out of the hot path
+            pass
+
+    return Handler
+
+class InferenceServer(ThreadingHTTPServer):
+    # Accept bursts of concurrent connections from screening clients
+    request_queue_size = 128
+    daemon_threads = True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve activation energy predictions over HTTP.")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Model bundle directory")
+    parser.add_argument("-m", "--models", nargs="+", help="Names of the served models, all by default")
+    parser.add_argument("--host", default="127.0.0.1", help="Host address")
+    parser.add_argument("--port", type=int, default=8000, help="Port")
+    parser.add_argument("--max-batch", type=int, default=1024, help="Maximum reactions per batch")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Maximum batching delay in milliseconds")
+    args = parser.parse_args(argv)
+
+    service = InferenceService(Bundle(args.bundle), names=args.models,
+                               max_batch=args.max_batch, max_wait=args.max_wait_ms / 1e3)
+    server = InferenceServer((args.host, args.port), make_handler(service))
+    print(f"Serving models {list(service.batchers)} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
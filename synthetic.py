@@ -0,0 +1,410 @@
+# Imports
+import numpy as np
+import argparse
+import json
+import io
+import os
+from ase import Atoms
+from ase.build import molecule, fcc100, fcc110, fcc111, fcc211, hcp0001, hcp10m10, bcc100, bcc110
+from ase.collections import g2
+from ase.data import atomic_numbers, reference_states
+from ase.io import write
+from cathub import build_role_index
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# Elementary steps AB -> A + B. The first n_species templates of the list
+# are used, so the species diversity grows with n_species.
+REACTION_TEMPLATES = [
+    ("OH", "O", "H"),
+    ("H2O", "OH", "H"),
+    ("CO", "C", "O"),
+    ("H2", "H", "H"),
+    ("O2", "O", "O"),
+    ("N2", "N", "N"),
+    ("NH", "N", "H"),
+    ("CO2", "CO", "O"),
+    ("CH", "C", "H"),
+    ("CH2", "CH", "H"),
+    ("CH3", "CH2", "H"),
+    ("CH4", "CH3", "H"),
+    ("NH2", "NH", "H"),
+    ("NH3", "NH2", "H"),
+    ("NO", "N", "O"),
+    ("HCO", "CO", "H"),
+    ("COH", "C", "OH"),
+    ("COOH", "CO2", "H"),
+    ("CH3O", "CH3", "O"),
+    ("H2CO", "HCO", "H"),
+]
+
+# Species that also appear as gas phase reactants or products
+GAS_SPECIES = {"H2", "O2", "N2", "H2O", "CO", "CO2", "CH4", "NH3", "NO"}
+
+# Default catalyst metals
+METALS = ["Pt", "Pd", "Cu", "Ni", "Au", "Ag", "Rh", "Ir", "Ru", "Co", "Os", "Fe", "Mo", "W"]
+
+# Slab builders of the facets of each lattice
+FACETS = {
+    "fcc": {"111": fcc111, "100": fcc100, "110": fcc110, "211": fcc211},
+    "hcp": {"0001": hcp0001, "10-10": hcp10m10},
+    "bcc": {"110": bcc110, "100": bcc100},
+}
+
+# Repetitions along x and y that the slab builders of some facets need
+SIZE_MULTIPLES = {"211": (3, 1), "10-10": (1, 2)}
+
+# Adsorption sites of the Catalysis-hub sites keyvalue and of CatApp
+SITES = ["ontop", "bridge", "fcc", "hcp", "hollow"]
+
+FUNCTIONALS = ["BEEF-vdW", "RPBE", "PBE"]
+
+def _lattice(metal):
+    return reference_states[atomic_numbers[metal]]["symmetry"]
+
+def build_slab(metal, facet, size=(3, 3, 3), vacuum=7.5, alloy=None, alloy_fraction=0.25, rng=None):
+    """
+    Builds a clean slab of a metal, optionally with a fraction of the
+    atoms replaced by an alloying metal.
+
+    Params:
+      metal (string):          The host metal.
+      facet (string):          A facet of the lattice of the metal, see FACETS.
+      size (tuple):            The slab size as repetitions along x and y, and layers.
+      vacuum (float):          The vacuum above and below the slab in Å.
+      alloy (string):          Optional alloying metal.
+      alloy_fraction (float):  The fraction of replaced atoms.
+      rng (Generator):         The random generator.
+    Returns:
+      (Atoms):                 The slab.
+    """
+
+    rng = rng or np.random.default_rng()
+    mx, my = SIZE_MULTIPLES.get(facet, (1, 1))
+    size = (mx * max(1, size[0] // mx), my * max(1, size[1] // my), size[2])
+    slab = FACETS[_lattice(metal)][facet](metal, size=size, vacuum=vacuum)
+    if alloy is not None:
+        symbols = slab.get_chemical_symbols()
+        n_alloy = max(1, int(round(alloy_fraction * len(slab))))
+        for i in rng.choice(len(slab), n_alloy, replace=False):
+            symbols[i] = alloy
+        slab.set_chemical_symbols(symbols)
+    slab.info = {}
+    return slab
+
+def build_adsorbate(species):
+    """
+    Builds an adsorbate from the g2 collection of ase, or as a vertical
+    chain of its atoms if it is not in the collection.
+    """
+
+    if species in g2.names:
+        atoms = molecule(species)
+    else:
+        atoms = Atoms(species)
+        atoms.positions[:, 2] = 1.2 * np.arange(len(atoms))
+    atoms.positions -= atoms.positions[np.argmin(atoms.positions[:, 2])]
+    return atoms
+
+def adsorb(slab, species, height=1.8, rng=None):
+    """
+    Places an adsorbate above a random top layer atom of a slab.
+
+    Params:
+      slab (Atoms):      The clean slab.
+      species (string):  The adsorbate.
+      height (float):    The height of the adsorbate above the surface in Å.
+      rng (Generator):   The random generator.
+    Returns:
+      (Atoms):           The slab with the adsorbate.
+    """
+
+    rng = rng or np.random.default_rng()
+    top = np.flatnonzero(slab.positions[:, 2] > slab.positions[:, 2].max() - 0.5)
+    adsorbate = build_adsorbate(species)
+    adsorbate.positions += slab.positions[rng.choice(top)] + [0, 0, height]
+    return slab + adsorbate
+
+def to_xyz(atoms):
+    """
+    Writes a structure in the extended XYZ format of the InputFile field
+    of Catalysis-hub.
+    """
+
+    stream = io.StringIO()
+    write(stream, atoms, format="extxyz")
+    return stream.getvalue()
+
+def _equation(reactants, products):
+    """
+    Formats a reaction equation of Catalysis-hub, e.g.
+    "H2Ostar + star -> OHstar + Hstar" into "H2O* + * -> OH* + H*".
+    """
+
+    def side(species):
+        terms = []
+        for name, count in species.items():
+            prefix = str(count) if count > 1 else ""
+            if name == "star":
+                terms.append(f"{prefix}*")
+            elif name.endswith("gas"):
+                terms.append(f"{prefix}{name[:-3]}(g)")
+            else:
+                terms.append(f"{prefix}{name[:-4]}*")
+        return " + ".join(terms)
+
+    return f"{side(reactants)} -> {side(products)}"
+
+class ReactionGenerator:
+    """
+    Generates synthetic reactions with the layouts of the fetched
+    Catalysis-hub and CatApp data, so that the preprocessing, the
+    descriptors and the training can be load tested offline at any data
+    volume.
+
+    The reaction energies depend on the step, the metal and the facet, and
+    the activation energies follow a Brønsted-Evans-Polanyi relation with
+    noise, so the models have something to learn. The structure energies
+    are consistent with the reaction and activation energies.
+
+    Params:
+      n_species (int):          Number of reaction templates used, see REACTION_TEMPLATES.
+      metals (list):            The catalyst metals.
+      size (tuple):             The slab size as repetitions along x and y, and layers.
+      alloy_probability (float): Probability of a bimetallic catalyst.
+      rattle (float):           Standard deviation of the atom displacements in Å,
+                                 so that no two structures are identical.
+      seed (int):               The random seed.
+    """
+
+    def __init__(self, n_species=len(REACTION_TEMPLATES), metals=METALS, size=(3, 3, 3),
+                 alloy_probability=0.2, rattle=0.02, seed=0):
+        if not 1 <= n_species <= len(REACTION_TEMPLATES):
+            raise ValueError(f"n_species must be between 1 and {len(REACTION_TEMPLATES)}")
+        unknown = [metal for metal in metals if _lattice(metal) not in FACETS]
+        if unknown:
+            raise ValueError(f"Unsupported metals {unknown}, use fcc, hcp or bcc metals")
+        self.templates = REACTION_TEMPLATES[:n_species]
+        self.metals = list(metals)
+        self.size = tuple(size)
+        self.alloy_probability = alloy_probability
+        self.rattle = rattle
+        self.rng = np.random.default_rng(seed)
+
+        # Fixed random effects of the steps, metals and facets
+        self.step_energy = self.rng.normal(0, 0.8, len(self.templates))
+        self.metal_shift = dict(zip(self.metals, self.rng.normal(0, 0.3, len(self.metals))))
+        facets = {facet for lattice in FACETS.values() for facet in lattice}
+        self.facet_shift = {facet: self.rng.normal(0, 0.15) for facet in sorted(facets)}
+        self.cohesive = dict(zip(self.metals, self.rng.uniform(-7, -3, len(self.metals))))
+
+    def _catalyst(self):
+        metal = self.metals[self.rng.integers(len(self.metals))]
+        lattice = _lattice(metal)
+        facet = self.rng.choice(list(FACETS[lattice]))
+        alloy = None
+        if self.rng.random() < self.alloy_probability:
+            partners = [m for m in self.metals if m != metal and _lattice(m) == lattice]
+            if partners:
+                alloy = partners[self.rng.integers(len(partners))]
+        return metal, alloy, facet
+
+    def _energies(self, step, metal, alloy, facet):
+        """
+        Returns the reaction and activation energies of a dissociation step.
+        The activation energies are kept apart from zero and from the
+        reaction energy, so preprocess.py does not discard the reaction.
+        """
+
+        shift = self.metal_shift[metal] + (0.5 * self.metal_shift[alloy] if alloy else 0)
+        er = self.step_energy[step] + shift + self.facet_shift[facet] + self.rng.normal(0, 0.1)
+        ea = 0.9 + 0.7 * er + self.rng.normal(0, 0.15)
+        ea = max(ea, er + 0.05 + 0.1 * self.rng.random(), 0.05 + 0.1 * self.rng.random())
+        return float(er), float(ea)
+
+    def _rattled(self, atoms):
+        if self.rattle > 0:
+            atoms.rattle(self.rattle, seed=int(self.rng.integers(2**31)))
+        return atoms
+
+    def _structures(self, slab, metal, reactants, products, ea, er, gas):
+        """
+        Builds the bare slab, the gas references, the adsorbed initial and
+        final states and the transition state of a reaction, with the
+        keyValuePairs that cathub.build_role_index tags.
+        """
+
+        e_slab = self.cohesive[metal] * len(slab) + self.rng.normal(0, 0.5)
+        structures = []
+
+        def add(atoms, energy, name, state, species):
+            structures.append({
+                "energy": float(energy),
+                "InputFile": to_xyz(self._rattled(atoms)),
+                "keyValuePairs": json.dumps({"name": name, "state": state, "species": species}),
+            })
+
+        add(slab.copy(), e_slab, "star", "star", "")
+        e_initial = e_slab + self.rng.normal(-5, 1)
+        for name in reactants:
+            if name.endswith("gas"):
+                add(build_adsorbate(name[:-3]), self.rng.normal(-15, 5), name, "gas", name)
+            elif name != "star":
+                add(adsorb(slab, name[:-4], rng=self.rng), e_initial, name[:-4], "star", name)
+        for name in products:
+            if name.endswith("gas"):
+                add(build_adsorbate(name[:-3]), self.rng.normal(-15, 5), name, "gas", name)
+            elif name != "star":
+                add(adsorb(slab, name[:-4], rng=self.rng), e_initial + er, name[:-4], "star", name)
+        ts = gas if gas is not None else next(n[:-4] for n in reactants if n.endswith("star") and n != "star")
+        add(adsorb(slab, ts, rng=self.rng), e_initial + ea, f"{ts}-TS", "star", f"{ts}TSstar")
+        return structures
+
+    def cathub_reaction(self, reaction_id, structures=True):
+        """
+        Generates one reaction with the layout of reactions_cathub.json,
+        see cathub.parse_reaction.
+
+        Params:
+          reaction_id (int):   The reaction id.
+          structures (bool):   Whether to build the structures.
+        Returns:
+          (dict):              The reaction.
+        """
+
+        step = self.rng.integers(len(self.templates))
+        ab, a, b = self.templates[step]
+        metal, alloy, facet = self._catalyst()
+        er, ea = self._energies(step, metal, alloy, facet)
+
+        gas = ab if ab in GAS_SPECIES and self.rng.random() < 0.3 else None
+        if gas is not None:
+            reactants = {f"{ab}gas": 1, "star": 2}
+        else:
+            reactants = {f"{ab}star": 1, "star": 1}
+        products = {f"{a}star": 2} if a == b else {f"{a}star": 1, f"{b}star": 1}
+        if self.rng.random() < 0.5:
+            sites = json.dumps({ab: SITES[self.rng.integers(len(SITES))]})
+        else:
+            sites = "None"
+
+        slab = build_slab(metal, facet, self.size, alloy=alloy, rng=self.rng)
+        key_value_pairs = {
+            "chemicalComposition": slab.get_chemical_formula(mode="metal"),
+            "surfaceComposition": slab.get_chemical_formula(mode="metal", empirical=True),
+            "facet": facet,
+            "sites": sites,
+            "coverages": "None",
+            "reactants": json.dumps(reactants),
+            "products": json.dumps(products),
+            "Equation": _equation(reactants, products),
+            "reactionEnergy": er,
+            "activationEnergy": ea,
+            "dftCode": "VASP",
+            "dftFunctional": FUNCTIONALS[self.rng.integers(len(FUNCTIONALS))],
+            "username": "synthetic",
+            "pubId": "SyntheticCatalysis",
+            "id": str(reaction_id),
+        }
+        reaction = {"key_value_pairs": key_value_pairs, "structures": []}
+        if structures:
+            reaction["structures"] = self._structures(slab, metal, reactants, products, ea, er, gas)
+        reaction["roles"] = build_role_index(key_value_pairs, reaction["structures"])
+        return reaction
+
+    def catapp_reaction(self):
+        """
+        Generates one association reaction A + B -> AB with the layout of
+        reactions_catapp.json, see catapp.extract_reaction.
+        """
+
+        step = self.rng.integers(len(self.templates))
+        ab, a, b = self.templates[step]
+        metal, _, facet = self._catalyst()
+        er, ea = self._energies(step, metal, None, facet)
+        # The association is the reverse of the dissociation step
+        er, ea = -er, ea - er
+        lattice_facet = f"{_lattice(metal)}({facet})"
+        return {
+            "reactant_a": f"{a}star",
+            "reactant_b": f"{b}star",
+            "product_ab": f"{ab}star",
+            "reactant_surface": f"{metal}{lattice_facet}",
+            "reactant_facet": lattice_facet,
+            "site": SITES[self.rng.integers(len(SITES))] if self.rng.random() < 0.5 else "None",
+            "reaction_energy": er,
+            "activation_energy": ea,
+            "dft_functional": "RPBE",
+        }
+
+def _write_json(filename, items):
+    """
+    Streams the (key, value) pairs into a Json object one at a time, so
+    that large datasets are never held in memory.
+    """
+
+    n = 0
+    with open(filename, "w") as file:
+        file.write("{")
+        for key, value in items:
+            file.write(f"{', ' if n else ''}{json.dumps(str(key))}: {json.dumps(value)}")
+            n += 1
+        file.write("}")
+    return n
+
+def generate(root_dir, n_cathub=1000, n_catapp=1000, structures=True, overwrite=False, **kwargs):
+    """
+    Writes synthetic data/reactions_cathub.json and data/reactions_catapp.json
+    files into a project root directory, to be processed by the same
+    pipeline as the fetched data, e.g.
+    `python catalysis.py --data-root <root_dir> preprocess`.
+
+    Params:
+      root_dir (string):   The project root directory.
+      n_cathub (int):      Number of Catalysis-hub reactions.
+      n_catapp (int):      Number of CatApp reactions.
+      structures (bool):   Whether to build the Catalysis-hub structures.
+      overwrite (bool):    Whether to overwrite existing data files.
+      kwargs:              Options of ReactionGenerator.
+    Returns:
+      (list):              Names of the written files.
+    """
+
+    os.makedirs(f"{root_dir}/data", exist_ok=True)
+    files = [f"{root_dir}/data/reactions_cathub.json", f"{root_dir}/data/reactions_catapp.json"]
+    if not overwrite:
+        existing = [f for f in files if os.path.isfile(f)]
+        if existing:
+            raise FileExistsError(f"Refusing to overwrite {existing}, pass overwrite=True or use another root")
+
+    generator = ReactionGenerator(**kwargs)
+    n = _write_json(files[0], ((i, generator.cathub_reaction(i, structures)) for i in range(1, n_cathub + 1)))
+    print(f"Wrote {n} synthetic Catalysis-hub reactions into {files[0]}")
+    n = _write_json(files[1], ((i, generator.catapp_reaction()) for i in range(n_catapp)))
+    print(f"Wrote {n} synthetic CatApp reactions into {files[1]}")
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Catalysis-hub and CatApp reaction data.")
+    parser.add_argument("-r", "--root", default=f"{ROOT_DIR}/synthetic",
+                        help="Project root directory of the generated data/ files")
+    parser.add_argument("-n", "--cathub", type=int, default=1000, help="Number of Catalysis-hub reactions")
+    parser.add_argument("-c", "--catapp", type=int, default=1000, help="Number of CatApp reactions")
+    parser.add_argument("-s", "--species", type=int, default=len(REACTION_TEMPLATES),
+                        help="Number of reaction templates, i.e. the species diversity")
+    parser.add_argument("-m", "--metals", nargs="+", default=METALS, help="Catalyst metals")
+    parser.add_argument("--size", type=int, nargs=3, default=[3, 3, 3], metavar=("X", "Y", "LAYERS"),
+                        help="Slab size as repetitions along x and y, and layers")
+    parser.add_argument("--alloys", type=float, default=0.2, help="Fraction of bimetallic catalysts")
+    parser.add_argument("--no-structures", action="store_true", help="Skip the Catalysis-hub structures")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("-f", "--force", action="store_true", help="Overwrite existing data files")
+    args = parser.parse_args(argv)
+
+    generate(args.root, n_cathub=args.cathub, n_catapp=args.catapp, structures=not args.no_structures,
+             overwrite=args.force, n_species=args.species, metals=args.metals, size=args.size,
+             alloy_probability=args.alloys, seed=args.seed)
+
+if __name__ == "__main__":
+    main()
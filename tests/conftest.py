@@ -0,0 +1,6 @@
+# Imports
+import os
+import sys
+
+# The modules live in the project root directory
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
@@ -0,0 +1,19 @@
+# Imports
+from sklearn.ensemble import RandomForestRegressor
+from benchmark import synthetic_reactions
+from encoding import make_model, split_target
+from active_learning import update_model
+
+def test_update_adds_trees_and_resets_warm_start():
+    X, y = split_target(synthetic_reactions(200))
+    model = make_model(RandomForestRegressor(n_estimators=10, random_state=0), "enc").fit(X[:100], y[:100])
+    first = model.named_steps["model"].estimators_[0]
+    update_model(model, X, y, n_new_trees=5)
+    forest = model.named_steps["model"]
+    assert len(forest.estimators_) == 15
+    assert forest.estimators_[0] is first
+    assert forest.warm_start is False
+    # A plain fit retrains the forest instead of adding trees
+    model.fit(X, y)
+    assert len(forest.estimators_) == 15
+    assert forest.estimators_[0] is not first
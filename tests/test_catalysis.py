@@ -0,0 +1,11 @@
+# Imports
+from catalysis import build_parser
+
+def test_profile_flag_does_not_consume_the_command():
+    args, rest = build_parser().parse_known_args(["--profile", "train", "-n", "2"])
+    assert args.profile and args.profile_mode == "sample"
+    assert args.command == "train" and rest == ["-n", "2"]
+
+def test_profile_mode():
+    args, _ = build_parser().parse_known_args(["-p", "--profile-mode", "all", "preprocess"])
+    assert args.profile_mode == "all" and args.command == "preprocess"
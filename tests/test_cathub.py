@@ -0,0 +1,32 @@
+# Imports
+import json
+from cathub import build_role_index
+
+def _structure(n_atoms, energy, **key_value_pairs):
+    return {"InputFile": f"{n_atoms}\n", "energy": energy, "keyValuePairs": json.dumps(key_value_pairs)}
+
+def test_fallback_uses_order_and_energies():
+    structures = [_structure(2, -5.0), _structure(12, -10.0), _structure(12, -8.0), _structure(20, -9.5)]
+    roles = build_role_index({"reactants": "None", "products": "None"}, structures)
+    assert roles["gas"] == [0]
+    assert roles["initial"] == [1] and roles["final"] == [3]
+    assert roles["ts"] == [2]
+
+def test_no_transition_state_below_the_end_states():
+    structures = [_structure(12, -10.0), _structure(12, -11.0), _structure(12, -9.5)]
+    roles = build_role_index({}, structures)
+    assert roles["initial"] == [0] and roles["final"] == [2]
+    assert roles["ts"] == []
+
+def test_key_value_pairs_keep_the_structure_order():
+    key_value_pairs = {"reactants": json.dumps({"COstar": 1}), "products": json.dumps({"Cstar": 1, "Ostar": 1})}
+    structures = [
+        _structure(12, -50.0, name="star", state="star", species=""),
+        _structure(14, -60.0, name="CO", state="star", species="COstar"),
+        _structure(13, -55.0, name="C", state="star", species="Cstar"),
+        _structure(20, -56.0, name="O", state="star", species="Ostar"),
+        _structure(14, -58.0, name="CO-TS", state="star", species="COTSstar"),
+        _structure(2, -15.0, name="COgas", state="gas", species="COgas"),
+    ]
+    roles = build_role_index(key_value_pairs, structures)
+    assert roles == {"slab": [0], "gas": [5], "initial": [1], "final": [2, 3], "ts": [4]}
@@ -0,0 +1,18 @@
+# Imports
+import pytest
+from composition import parse_composition, featurize_compositions
+
+def test_parse_composition_fractions():
+    assert parse_composition("Pt3Ni") == pytest.approx({"Pt": 0.75, "Ni": 0.25})
+    assert parse_composition("Ag-fcc") == {"Ag": 1.0}
+    assert parse_composition("Pt0.5Ni.5") == pytest.approx({"Pt": 0.5, "Ni": 0.5})
+    assert parse_composition("Cu2.") == {"Cu": 1.0}
+
+@pytest.mark.parametrize("composition", ["Pt.", "Pt.Ni", "Pt..5", "Xx2", "pt", "", "None", None])
+def test_parse_composition_invalid(composition):
+    assert parse_composition(composition) is None
+
+def test_unparsed_compositions_are_flagged():
+    features = featurize_compositions(["Pt", "Pt."])
+    unknown = [col for col in features if col.endswith("unknown")]
+    assert unknown and features[unknown[0]].tolist() == [0, 1]
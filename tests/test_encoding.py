@@ -0,0 +1,31 @@
+# Imports
+import pandas as pd
+from encoding import CategoryEncoder, UNKNOWN
+
+def _encoder(output="onehot"):
+    return CategoryEncoder(columns=["Facet", "Site"], output=output).fit(
+        pd.DataFrame({"Facet": ["111", "100", "111"], "Site": ["fcc", "hcp", "top"]}))
+
+def test_unknown_categories_get_code_zero():
+    codes = _encoder().codes(pd.DataFrame({"Facet": ["100", "211"], "Site": ["bridge", "top"]}))
+    assert codes.tolist() == [[2, 0], [0, 3]]
+
+def test_missing_column_is_unknown():
+    codes = _encoder().codes(pd.DataFrame({"Facet": ["111"]}))
+    assert codes.tolist() == [[1, 0]]
+
+def test_onehot_has_an_unknown_column_per_category():
+    encoder = _encoder()
+    X = encoder.transform(pd.DataFrame({"Facet": ["211"], "Site": ["fcc"]}))
+    names = encoder.get_feature_names()
+    assert X.shape == (1, 3 + 4)
+    assert [names[j] for j in X.indices] == [f"Facet_{UNKNOWN}", "Site_fcc"]
+
+def test_extend_keeps_the_known_codes():
+    encoder = _encoder("ordinal")
+    new = pd.DataFrame({"Facet": ["211", "111"], "Site": ["fcc", "fcc"]})
+    before = encoder.codes(new)
+    assert encoder.extend(new) == 1
+    after = encoder.codes(new)
+    assert after[1].tolist() == before[1].tolist()
+    assert before[0, 0] == 0 and after[0, 0] == 3
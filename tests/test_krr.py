@@ -0,0 +1,32 @@
+# Imports
+import numpy as np
+from sklearn.kernel_ridge import KernelRidge
+from benchmark import synthetic_reactions
+from encoding import ReactionFeaturizer, split_target
+from krr import ApproxKRR, KRRSearch
+import train
+
+def _features(n):
+    X, y = split_target(synthetic_reactions(n))
+    return ReactionFeaturizer(encoding="enc").fit_transform(X), y.to_numpy()
+
+def test_search_refits_the_best_kernel_ridge():
+    X, y = _features(150)
+    search = KRRSearch(alphas=[1e-1, 1e-2], gammas=[0.1], kernels=["rbf"], cv=3).fit(X, y)
+    assert isinstance(search.best_estimator_, KernelRidge)
+    assert search.best_score_ == np.max(search.cv_results_["mean_test_score"])
+
+def test_full_rank_nystroem_matches_the_exact_model():
+    X, y = _features(120)
+    exact = KernelRidge(alpha=0.1, kernel="rbf", gamma=0.1).fit(X, y)
+    approx = ApproxKRR(alpha=0.1, kernel="rbf", gamma=0.1, rank=len(X)).fit(X, y)
+    assert np.allclose(approx.predict(X[:10]), exact.predict(X[:10]), atol=1e-2)
+
+def test_approximate_krr_search_is_registered(tmp_path):
+    X, y = _features(200)
+    settings = {"store": str(tmp_path / "akrr.jsonl"), "n_candidates": 2, "min_resource": 20,
+                "max_resource": 60, "cv": 2, "time_budget": None}
+    estimator, params, score = train.SEARCHES["akrr"]["search"](X, y, 1, settings)
+    assert isinstance(estimator, ApproxKRR)
+    assert estimator.rank == 60
+    assert set(params) <= {*train.AKRR_GRID, "rank"}
@@ -0,0 +1,46 @@
+# Imports
+import pandas as pd
+import pytest
+import network
+from network import ReactionNetwork
+
+# Reactions of a diamond A -> B/C -> D with a direct step A -> D
+STEPS = [("A*", "B*", 0.1), ("B*", "D*", 0.1), ("A*", "C*", 0.3), ("C*", "D*", 0.3), ("A*", "D*", 1.0)]
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "Reactant 1": [source for source, _, _ in STEPS],
+        "Product 1": [target for _, target, _ in STEPS],
+        "Facet": "111",
+        "Chemical Composition": "Pt",
+        "Surface Composition": "None",
+        "Reaction Energy": -0.1,
+        "Activation Energy": [ea for _, _, ea in STEPS],
+    })
+
+def test_k_shortest_paths_in_increasing_cost(df):
+    paths = ReactionNetwork(df, reversible=False).k_shortest_paths("A", "D", "Pt", "111", k=5)
+    assert [path["species"] for path in paths] == [["A", "B", "D"], ["A", "C", "D"], ["A", "D"]]
+    assert [path["cost"] for path in paths] == pytest.approx([0.2, 0.6, 1.0])
+
+def test_k_shortest_paths_are_loopless(df):
+    paths = ReactionNetwork(df).k_shortest_paths("A", "D", "Pt", "111", k=10)
+    for path in paths:
+        assert len(set(path["species"])) == len(path["species"])
+    assert len({tuple(path["species"]) for path in paths}) == len(paths)
+
+def test_shortest_path_of_unconnected_species(df):
+    assert ReactionNetwork(df, reversible=False).shortest_path("D", "A", "Pt", "111") is None
+
+@pytest.mark.parametrize("argv, message", [
+    (["A", "X", "-s", "Pt", "-f", "111"], "Species X does not react on this surface"),
+    (["A", "D", "-s", "Cu", "-f", "111"], "No reactions on Cu(111)"),
+])
+def test_main_reports_unknown_species_and_surfaces(df, tmp_path, capsys, argv, message):
+    filename = str(tmp_path / "data.csv")
+    df.to_pickle(filename)
+    with pytest.raises(SystemExit) as e:
+        network.main(argv + ["-d", filename])
+    assert e.value.code == 1
+    assert message in capsys.readouterr().err
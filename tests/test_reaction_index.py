@@ -0,0 +1,24 @@
+# Imports
+import pandas as pd
+from reaction_index import ReactionIndex
+
+DATA = pd.DataFrame({
+    "Chemical Composition": ["Pt", "Pt16", "NaPt27H24O12", "Pt-hcp", "Cu3Pd", "Pt-fcc"],
+    "Surface Composition": ["Pt", "None", "Pt", "None", "None", "None"],
+    "Facet": ["111", "111", "211", "0001", "111", "110"],
+    "Reactant 1": ["O*", "H*", "O*", "CO*", "O*", "H*"],
+    "Product 1": ["OH*", "H2", "OH*", "C*", "O2", "H2"],
+})
+
+def test_pure_metal_matches_exact_metal_symbols():
+    index = ReactionIndex(DATA)
+    assert index.query(pure_metal=True).tolist() == [0, 2, 5]
+    assert index.query(pure_metal=False).tolist() == [1, 3, 4]
+
+def test_queries_intersect_fields():
+    index = ReactionIndex(DATA)
+    assert index.query(facet="111", species="O*").tolist() == [0, 4]
+    assert index.query(facet=["111", "211"], species="OH*").tolist() == [0, 2]
+    assert index.query(element="Pd").tolist() == [4]
+    assert index.query(facet="100").tolist() == []
+    assert index.subset(DATA, pure_metal=True, facet="211")["Chemical Composition"].tolist() == ["NaPt27H24O12"]
@@ -0,0 +1,83 @@
+# Imports
+import json
+import pytest
+from reaction_store import ReactionStore, _parse_species
+
+def _cathub_reaction(reaction_id, activation_energy=0.5):
+    return {
+        "key_value_pairs": {
+            "id": reaction_id, "Equation": "COstar + star -> Cstar + Ostar",
+            "chemicalComposition": "Pt27", "surfaceComposition": "Pt", "facet": "111",
+            "sites": '{"CO": "ontop"}', "coverages": "None",
+            "reactants": json.dumps({"COstar": 1, "star": 1}), "products": json.dumps({"Cstar": 1, "Ostar": 1}),
+            "reactionEnergy": 1.0, "activationEnergy": activation_energy, "dftCode": "VASP",
+            "dftFunctional": "BEEF-vdW", "pubId": "Test",
+        },
+        "structures": [{"InputFile": "27\n", "energy": -100.0, "keyValuePairs": "{}"}],
+        "roles": {"slab": [0], "initial": [0]},
+    }
+
+CATAPP_REACTION = {
+    "reactant_a": "Ostar", "reactant_b": "Hstar", "product_ab": "OHstar", "reactant_surface": "Ptfcc(111)",
+    "reactant_facet": "fcc(111)", "site": "None", "reaction_energy": -0.5, "activation_energy": 0.8,
+    "dft_functional": "RPBE",
+}
+
+@pytest.fixture
+def store(tmp_path):
+    with ReactionStore(str(tmp_path / "reactions.db")) as store:
+        yield store
+
+def test_upserts_are_idempotent(store):
+    store.upsert_cathub(_cathub_reaction(1))
+    store.upsert_cathub(_cathub_reaction(1, activation_energy=0.7))
+    store.upsert_catapp(CATAPP_REACTION)
+    store.upsert_catapp(CATAPP_REACTION)
+    assert store.stats() == {"cathub": 1, "catapp": 1, "species": 7, "structures": 1, "roles": 2}
+    assert store.query(source="cathub")["activation_energy"].tolist() == [0.7]
+
+def test_dataframe_uses_the_cleaned_notation(store):
+    store.upsert_cathub(_cathub_reaction(1))
+    store.upsert_catapp(CATAPP_REACTION)
+    df = store.dataframe()
+    cathub, catapp = df.iloc[0], df.iloc[1]
+    assert [cathub[f"Reactant {i}"] for i in (1, 2, 3)] == ["CO*", "*", "None"]
+    assert cathub["Reaction Equation"] == "CO* + * -> C* + O*"
+    assert cathub["Adsorption Site"] == "CO-ontop"
+    assert [catapp["Reactant 1"], catapp["Reactant 2"], catapp["Product 1"]] == ["O*", "H*", "OH*"]
+    assert catapp["Chemical Composition"] == "Pt" and catapp["Facet"] == "111"
+    assert catapp["Reaction Equation"] == "None" and catapp["Surface Composition"] == "None"
+
+def test_queries(store):
+    store.upsert_cathub(_cathub_reaction(1, activation_energy=0.5))
+    store.upsert_cathub(_cathub_reaction(2, activation_energy=1.5))
+    store.upsert_catapp(CATAPP_REACTION)
+    assert len(store.query(facet="111", max_ea=1.0)) == 2
+    assert len(store.query(species="CO*")) == 2
+    assert len(store.query(composition=["Pt27", "Pt"])) == 3
+    assert len(store.query(source="catapp", species=["OH*"])) == 1
+
+def test_empty_value_lists_match_nothing(store):
+    store.upsert_cathub(_cathub_reaction(1))
+    assert len(store.query(facet=[])) == 0
+    assert len(store.query(species=[])) == 0
+    assert len(store.dataframe(composition=[])) == 0
+    assert len(store.structures([])) == 0
+
+def test_species_are_parsed_without_eval():
+    assert _parse_species("{'Hstar': 2}") == [("H*", 2.0)]
+    with pytest.raises(ValueError):
+        _parse_species("{'H': __import__('os').getpid()}")
+
+def test_sites_are_parsed_without_eval(store):
+    reaction = _cathub_reaction(1)
+    reaction["key_value_pairs"]["sites"] = "{'CO': __import__('os').getpid()}"
+    with pytest.raises(ValueError, match="reaction 1"):
+        store.upsert_cathub(reaction)
+
+def test_malformed_species_name_the_reaction(store):
+    reaction = _cathub_reaction(7)
+    reaction["key_value_pairs"]["reactants"] = "{'COstar': 1"
+    with pytest.raises(ValueError, match="reaction 7"):
+        store.upsert_cathub(reaction)
+    assert store.stats()["species"] == 0
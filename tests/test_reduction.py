@@ -0,0 +1,60 @@
+# Imports
+import numpy as np
+import subprocess
+import sys
+import os
+import pytest
+from descriptors import save_descriptors
+from reduction import reduce_descriptor_file, load_reduction
+import train
+
+@pytest.fixture
+def descriptor_file(tmp_path):
+    rng = np.random.default_rng(0)
+    descriptors = [rng.random(40) * (rng.random(40) < 0.3) for _ in range(60)]
+    filename = str(tmp_path / "descriptors.npz")
+    save_descriptors(filename, descriptors, rng.random(60), np.arange(60))
+    return filename
+
+def test_saved_projection_is_reused(descriptor_file, tmp_path):
+    reduction_file = str(tmp_path / "reduction.pkl")
+    X, _, _ = reduce_descriptor_file(descriptor_file, reduction_file, method="srp", n_components=5)
+    X_again, _, _ = reduce_descriptor_file(descriptor_file, reduction_file, method="srp", n_components=5)
+    assert X.shape == (60, 5)
+    assert np.allclose(X, X_again)
+
+def test_mismatching_projection_is_refitted(descriptor_file, tmp_path):
+    reduction_file = str(tmp_path / "reduction.pkl")
+    reduce_descriptor_file(descriptor_file, reduction_file, method="srp", n_components=5)
+    X, _, _ = reduce_descriptor_file(descriptor_file, reduction_file, method="ipca", n_components=3)
+    assert X.shape == (60, 3)
+    reduction = load_reduction(reduction_file)
+    assert (reduction["method"], reduction["n_components"], reduction["n_features"]) == ("ipca", 3, 40)
+
+def test_mismatching_projection_raises_without_refit(descriptor_file, tmp_path):
+    reduction_file = str(tmp_path / "reduction.pkl")
+    reduce_descriptor_file(descriptor_file, reduction_file, method="srp", n_components=5)
+    with pytest.raises(ValueError):
+        reduce_descriptor_file(descriptor_file, reduction_file, method="srp", n_components=8, refit=False)
+
+def test_changed_width_is_refitted(descriptor_file, tmp_path):
+    reduction_file = str(tmp_path / "reduction.pkl")
+    reduce_descriptor_file(descriptor_file, reduction_file, method="srp", n_components=5)
+    rng = np.random.default_rng(1)
+    wider = str(tmp_path / "wider.npz")
+    save_descriptors(wider, [rng.random(50) for _ in range(10)], rng.random(10), np.arange(10))
+    reduce_descriptor_file(wider, reduction_file, method="srp", n_components=5)
+    assert load_reduction(reduction_file)["n_features"] == 50
+
+def test_train_on_reduced_descriptors(descriptor_file, tmp_path):
+    results = train.train_descriptors(descriptor_file, str(tmp_path / "reduction.pkl"), models=["krr"],
+                                      n_components=4, n_workers=1,
+                                      settings={"krr": {"alphas": [1e-1], "gammas": [1.0], "kernels": ["rbf"]}})
+    assert list(results) == ["krr_descr"]
+    assert results["krr_descr"]["model"].predict(np.zeros((2, 4))).shape == (2,)
+
+def test_train_does_not_import_the_descriptors():
+    code = "import sys, train; print('descriptors' in sys.modules, 'reduction' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert output.stdout.split() == ["False", "False"]
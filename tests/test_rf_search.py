@@ -0,0 +1,82 @@
+# Imports
+import types
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import cross_val_score
+import rf_search
+from rf_search import SuccessiveHalvingSearch, TrialStore, describe_estimator
+from benchmark import synthetic_reactions
+from encoding import make_model, split_target
+
+def test_trial_key_depends_on_encoding():
+    enc = describe_estimator(make_model(RandomForestRegressor(), "enc"))
+    bin = describe_estimator(make_model(RandomForestRegressor(), "bin"))
+    assert TrialStore.key(enc, {}, {}, "data") != TrialStore.key(bin, {}, {}, "data")
+
+def test_trial_key_depends_on_fixed_params():
+    a = describe_estimator(RandomForestRegressor(max_depth=3))
+    b = describe_estimator(RandomForestRegressor(max_depth=5))
+    assert TrialStore.key(a, {}, {}, "data") != TrialStore.key(b, {}, {}, "data")
+
+def test_trial_key_ignores_n_jobs():
+    a = describe_estimator(make_model(RandomForestRegressor(n_jobs=1), "enc"))
+    b = describe_estimator(make_model(RandomForestRegressor(n_jobs=4), "enc"))
+    assert TrialStore.key(a, {}, {}, "data") == TrialStore.key(b, {}, {}, "data")
+
+def test_store_is_not_shared_between_encodings(tmp_path):
+    X, y = split_target(synthetic_reactions(300))
+    store = TrialStore(str(tmp_path / "trials.jsonl"))
+    settings = dict(param_distributions={"model__max_depth": [3, 5]}, resource="model__n_estimators",
+                    n_candidates=2, min_resource=5, max_resource=5, min_samples=50, cv=2, store=store,
+                    n_jobs=1, verbose=0)
+    SuccessiveHalvingSearch(estimator=make_model(RandomForestRegressor(random_state=0), "enc"), **settings).fit(X, y)
+    search = SuccessiveHalvingSearch(estimator=make_model(RandomForestRegressor(random_state=0), "bin"), **settings)
+    search.fit(X, y)
+    assert search.n_cached_ == 0
+    assert search.n_evaluated_ == 2
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """
+    Replaces the clock of the search with one that advances a second per
+    cross-validated trial.
+    """
+
+    clock = {"now": 0.0}
+
+    def scored(*args, **kwargs):
+        clock["now"] += 1
+        return cross_val_score(*args, **kwargs)
+
+    monkeypatch.setattr(rf_search, "time", types.SimpleNamespace(perf_counter=lambda: clock["now"]))
+    monkeypatch.setattr(rf_search, "cross_val_score", scored)
+    return clock
+
+def _search(time_budget):
+    return SuccessiveHalvingSearch({"model__max_depth": [2, 3, 4, 5, 6, 7, 8, 9, 10]},
+                                   estimator=make_model(RandomForestRegressor(random_state=0), "enc"),
+                                   resource="model__n_estimators", n_candidates=9, factor=3, min_resource=2,
+                                   max_resource=6, min_samples=20, cv=2, time_budget=time_budget,
+                                   n_jobs=1, verbose=0)
+
+def test_no_finished_trial_raises(fake_clock):
+    X, y = split_target(synthetic_reactions(200))
+    with pytest.raises(RuntimeError, match="time budget"):
+        _search(-1).fit(X, y)
+
+def test_incomplete_rung_is_not_promoted(fake_clock):
+    X, y = split_target(synthetic_reactions(200))
+    search = _search(9.5)
+    rungs = search._rungs(len(y))
+    assert rungs[0][0] == 9 and len(rungs) > 1
+    search.fit(X, y)
+    # The second rung is cut short after one trial
+    assert [result["rung"] for result in search.results_].count(1) == 1
+    assert search.best_rung_ == 0
+    assert search.best_score_ == max(r["score"] for r in search.results_ if r["rung"] == 0)
+
+def test_incomplete_first_rung_falls_back(fake_clock):
+    X, y = split_target(synthetic_reactions(200))
+    search = _search(2.5).fit(X, y)
+    assert len(search.results_) == 3
+    assert search.best_score_ == max(r["score"] for r in search.results_)
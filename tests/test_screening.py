@@ -0,0 +1,27 @@
+# Imports
+from sklearn.ensemble import RandomForestRegressor
+from benchmark import synthetic_reactions
+from bundle import feature_schema
+from encoding import make_model, split_target
+from screening import reaction_templates, iter_candidates, screen
+
+def _model(df):
+    return make_model(RandomForestRegressor(n_estimators=5, random_state=0), "enc").fit(*split_target(df))
+
+def test_screen_keeps_the_lowest_barriers():
+    df = synthetic_reactions(200)
+    templates = reaction_templates(df)
+    chunks = iter_candidates(templates, ["Pt", "Cu"], ["111"], ["None"], chunk_size=50)
+    best, n_screened = screen(_model(df), chunks, feature_schema(), top_k=10)
+    assert n_screened == 2 * len(templates)
+    assert len(best) == 10
+    assert best["Predicted Activation Energy"].is_monotonic_increasing
+
+def test_screen_without_candidates():
+    df = synthetic_reactions(200)
+    chunks = iter_candidates(reaction_templates(df), [], ["111"], ["None"])
+    best, n_screened = screen(_model(df), chunks, feature_schema())
+    assert n_screened == 0
+    assert best.empty
+    assert "Predicted Activation Energy" in best
+    assert set(feature_schema()["categorical"]) <= set(best.columns)
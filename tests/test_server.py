@@ -0,0 +1,64 @@
+# Imports
+import json
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from bundle import feature_schema
+from server import InferenceServer, MicroBatcher, make_handler, validate_reactions
+
+class FailingModel:
+    """
+    Predicts the reaction energies, and fails on batches containing a
+    reaction on the "bad" facet.
+    """
+
+    def predict(self, X):
+        if (X["Facet"] == "bad").any():
+            raise ValueError("bad reaction")
+        return X["Reaction Energy"].values.astype(float)
+
+def test_failing_request_does_not_fail_the_batch():
+    batcher = MicroBatcher(FailingModel(), max_wait=0.5)
+    schema = feature_schema()
+    good = batcher.submit(validate_reactions([{"Facet": "111", "Reaction Energy": 1.0}], schema))
+    bad = batcher.submit(validate_reactions([{"Facet": "bad", "Reaction Energy": 2.0}], schema))
+    other = batcher.submit(validate_reactions([{"Facet": "211", "Reaction Energy": 3.0}], schema))
+    assert np.allclose(good.result(timeout=5), [1.0])
+    assert np.allclose(other.result(timeout=5), [3.0])
+    with pytest.raises(ValueError, match="bad reaction"):
+        bad.result(timeout=5)
+    assert batcher.n_batches == 1
+
+def test_validate_reactions():
+    schema = feature_schema()
+    reactions = validate_reactions([{"Facet": "111", "Reaction Energy": "0.5"}], schema)
+    assert reactions["Reaction Energy"].tolist() == [0.5]
+    assert reactions["Adsorption Site"].tolist() == ["None"]
+    with pytest.raises(KeyError):
+        validate_reactions([{"Facet": "111"}], schema)
+    with pytest.raises(ValueError):
+        validate_reactions([{"Facet": "111", "Reaction Energy": "high"}], schema)
+    with pytest.raises(TypeError):
+        validate_reactions({"Facet": "111"}, schema)
+
+class BrokenService:
+    batchers = {"rfr_enc": None}
+
+    def predict(self, records, names=None):
+        raise RuntimeError("model failure")
+
+def test_unexpected_errors_return_500():
+    server = InferenceServer(("127.0.0.1", 0), make_handler(BrokenService()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/predict",
+                                         data=json.dumps({"reactions": []}).encode(), method="POST")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=5)
+        assert error.value.code == 500
+        assert "model failure" in json.loads(error.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
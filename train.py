@@ -0,0 +1,388 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import tempfile
+import shutil
+import time
+import os
+import joblib
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+from sklearn.ensemble import RandomForestRegressor as RFR
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from encoding import ReactionFeaturizer, split_target, data_hash, row_hashes
+from reaction_index import ReactionIndex
+from bundle import save_bundle
+from krr import KRRSearch, ApproxKRR
+from gbm import CategoricalHGB
+from rf_search import SuccessiveHalvingSearch, TrialStore
+from profiling import profile_stage
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+# The hyperparameter grid of the kernel ridge regression
+KRR_GRID = {
+    "alphas": [1e0, 1e-1, 1e-2, 1e-3],
+    "gammas": list(np.logspace(-2, 2, 5)),
+    "kernels": ["rbf", "linear"],
+}
+
+# The hyperparameter lists of the approximate kernel ridge regression. The
+# rank of the kernel approximation is the search resource.
+AKRR_GRID = {
+    "alpha": [1e0, 1e-1, 1e-2, 1e-3],
+    "gamma": list(np.logspace(-2, 2, 5)),
+    "kernel": ["rbf", "laplacian"],
+    "method": ["nystroem"],
+}
+
+# The hyperparameter lists of the random forest. A max_features of 1.0
+# uses all features, like "auto" in older scikit-learn versions.
+RFR_GRID = {
+    "n_estimators": [50, 100, 150, 200, 250, 300],
+    "max_features": [1.0, "sqrt", "log2"],
+    "max_depth": [10, 20, 30, 40, None],
+    "min_samples_split": [2, 5, 10, 15, 20],
+    "min_samples_leaf": [1, 2, 5, 10, 15, 20],
+}
+
+# The hyperparameter lists of the gradient boosting. The number of
+# iterations is the search resource, and early stopping ends the boosting
+# before it when the validation loss stops improving.
+HGB_GRID = {
+    "learning_rate": [0.03, 0.05, 0.1, 0.2],
+    "max_leaf_nodes": [15, 31, 63],
+    "min_samples_leaf": [5, 10, 20, 40],
+    "l2_regularization": [0.0, 0.1, 1.0],
+}
+
+# The models trained on the reduced structure descriptors. The gradient
+# boosting is left out, as it takes the leading columns as categories.
+DESCRIPTOR_MODELS = ["krr", "akrr", "rfr"]
+
+# Registry of the model searches by name
+SEARCHES = {}
+
+def register_search(name, encodings=("enc", "bin"), weight=1):
+    """
+    Function decorator that adds a model search into the registry. The
+    search is called with the training features, the targets, the number of
+    workers it may use and the search settings, and returns the fitted best
+    estimator, its parameters and its cross-validation score.
+
+    Params:
+      name (string):     Name of the model, e.g. "krr".
+      encodings (tuple): The encodings the model is trained with.
+      weight (float):    Relative cost of the search, used to split the workers.
+    """
+
+    def decorator(func):
+        SEARCHES[name] = {"search": func, "encodings": list(encodings), "weight": weight}
+        return func
+
+    return decorator
+
+@register_search("krr", weight=1)
+def search_krr(X, y, n_jobs, settings):
+    # The kernel matrices are decomposed with the threads of the BLAS library
+    with threadpool_limits(limits=n_jobs):
+        search = KRRSearch(**{**KRR_GRID, **settings}).fit(X, y)
+    return search.best_estimator_, search.best_params_, search.best_score_
+
+@register_search("akrr", weight=1)
+def search_akrr(X, y, n_jobs, settings):
+    settings = dict(settings)
+    store = TrialStore(settings.pop("store", f"{ROOT_DIR}/data/akrr_trials.jsonl"))
+    search_settings = {"n_candidates": 40, "min_resource": 100, "max_resource": 1000,
+                       "cv": 5, "time_budget": 3600, **settings}
+    # The feature maps and the ridge solutions use the threads of the BLAS library
+    with threadpool_limits(limits=n_jobs):
+        search = SuccessiveHalvingSearch(AKRR_GRID, estimator=ApproxKRR(), resource="rank",
+                                         store=store, n_jobs=1, **search_settings)
+        search.fit(X, y)
+    return search.best_estimator_, search.best_params_, search.best_score_
+
+@register_search("rfr", weight=3)
+def search_rfr(X, y, n_jobs, settings):
+    settings = dict(settings)
+    store = TrialStore(settings.pop("store", f"{ROOT_DIR}/data/rf_trials.jsonl"))
+    search_settings = {"n_candidates": 400, "max_resource": max(RFR_GRID["n_estimators"]),
+                       "cv": 5, "time_budget": 3600, **settings}
+    search = SuccessiveHalvingSearch(RFR_GRID, estimator=RFR(), resource="n_estimators",
+                                     store=store, n_jobs=n_jobs, **search_settings)
+    search.fit(X, y)
+    return search.best_estimator_, search.best_params_, search.best_score_
+
+@register_search("hgb", encodings=("enc",), weight=2)
+def search_hgb(X, y, n_jobs, settings):
+    settings = dict(settings)
+    store = TrialStore(settings.pop("store", f"{ROOT_DIR}/data/hgb_trials.jsonl"))
+    search_settings = {"n_candidates": 100, "min_resource": 50, "max_resource": 1000,
+                       "cv": 5, "time_budget": 3600, **settings}
+    # The boosting is parallelized with OpenMP threads, so the folds are fitted one at a time
+    with threadpool_limits(limits=n_jobs):
+        search = SuccessiveHalvingSearch(HGB_GRID, estimator=CategoricalHGB(), resource="max_iter",
+                                         store=store, n_jobs=1, **search_settings)
+        search.fit(X, y)
+    return search.best_estimator_, search.best_params_, search.best_score_
+
+def allocate_workers(weights, n_workers):
+    """
+    Splits a global worker budget between jobs in proportion to their
+    weights, giving every job at least one worker.
+
+    Params:
+      weights (list):   The relative costs of the jobs.
+      n_workers (int):  The total number of workers.
+    Returns:
+      (list):           The number of workers of each job.
+    """
+
+    weights = np.asarray(weights, dtype=np.float64)
+    shares = weights / weights.sum() * max(n_workers - len(weights), 0)
+    workers = np.floor(shares).astype(int) + 1
+    # Hand out the remaining workers by the largest fractional shares
+    remaining = max(n_workers, len(weights)) - workers.sum()
+    for i in np.argsort(shares - np.floor(shares))[::-1][:remaining]:
+        workers[i] += 1
+    return workers.tolist()
+
+def share_features(X, encodings, folder):
+    """
+    Featurizes the training data once per encoding, and dumps the feature
+    matrices into the folder, so that every search process memory-maps the
+    same files instead of receiving its own copy.
+
+    Params:
+      X (DataFrame):      The training reactions.
+      encodings (list):   The encodings.
+      folder (string):    The directory of the shared files.
+    Returns:
+      featurizers (dict): The fitted featurizers by encoding.
+      files (dict):       The feature matrix files by encoding.
+    """
+
+    featurizers, files = {}, {}
+    for encoding in encodings:
+        featurizers[encoding] = ReactionFeaturizer(encoding=encoding).fit(X)
+        files[encoding] = os.path.join(folder, f"X_{encoding}.joblib")
+        joblib.dump(featurizers[encoding].transform(X), files[encoding])
+    return featurizers, files
+
+def run_search(name, encoding, filename, y, n_jobs, settings):
+    """
+    Runs a registered model search on a memory-mapped feature matrix. The
+    search is profiled as the stage train_<name>_<encoding> if profiling is
+    enabled, see profiling.profile_stage.
+
+    Returns:
+      (dict):  The fitted estimator, its parameters, the cross-validation
+                score and the search time.
+    """
+
+    start = time.perf_counter()
+    X = joblib.load(filename, mmap_mode="r")
+    with profile_stage(f"train_{name}_{encoding}"):
+        estimator, params, score = SEARCHES[name]["search"](X, y, n_jobs, settings)
+    return {"estimator": estimator, "params": params, "cv_score": score,
+            "time": time.perf_counter() - start}
+
+def train_all(train_set, models=None, n_workers=None, folder=None, settings=None):
+    """
+    Trains every model and encoding combination concurrently. The feature
+    matrices are featurized once and memory-mapped by all the searches,
+    and the searches run in separate processes sharing a global worker
+    budget, so the total time approaches that of the slowest search.
+
+    Params:
+      train_set (DataFrame):  The training reactions with the target.
+      models (list):          Names of the registered models, all by default.
+      n_workers (int):        The global worker budget, all cores by default.
+      folder (string):        Directory of the shared feature files, a
+                               temporary directory by default.
+      settings (dict):        Optional search settings by model name.
+    Returns:
+      (dict):                 The results by name, e.g. "rfr_enc", with the
+                               fitted pipeline under "model".
+    """
+
+    X, y = split_target(train_set)
+    y = np.asarray(y, dtype=np.float64)
+    models = models or list(SEARCHES)
+    settings = settings or {}
+    n_workers = n_workers or os.cpu_count()
+    jobs = [(name, encoding) for name in models for encoding in SEARCHES[name]["encodings"]]
+    workers = allocate_workers([SEARCHES[name]["weight"] for name, _ in jobs], n_workers)
+
+    temporary = folder is None
+    folder = tempfile.mkdtemp(prefix="catalysis_") if temporary else folder
+    os.makedirs(folder, exist_ok=True)
+    try:
+        with profile_stage("train_featurize"):
+            featurizers, files = share_features(X, sorted({encoding for _, encoding in jobs}), folder)
+        start = time.perf_counter()
+        outputs = Parallel(n_jobs=len(jobs), backend="loky")(
+            delayed(run_search)(name, encoding, files[encoding], y, n_jobs, settings.get(name, {}))
+            for (name, encoding), n_jobs in zip(jobs, workers)
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        if temporary:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    results = {}
+    for (name, encoding), n_jobs, output in zip(jobs, workers, outputs):
+        output["model"] = Pipeline([("featurizer", featurizers[encoding]), ("model", output.pop("estimator"))])
+        output["n_jobs"] = n_jobs
+        results[f"{name}_{encoding}"] = output
+        print(f"{name}_{encoding}: CV score {output['cv_score']:.4f} in {output['time']:.1f} s "
+              f"with {n_jobs} workers, using parameters: {output['params']}")
+    print(f"Trained {len(jobs)} models in {elapsed:.1f} s, the slowest in "
+          f"{max(output['time'] for output in outputs):.1f} s")
+
+    return results
+
+def train_descriptors(filename, reduction_file, models=None, method="ipca", n_components=100,
+                      n_workers=None, settings=None):
+    """
+    Trains the models on the structure descriptors of descriptors.py,
+    reduced with the projection of reduction.py, so that the searches run
+    on a compact matrix. The projection is fitted on the first call and
+    saved into reduction_file, and the reactions are split into training
+    and test sets like in main.
+
+    Params:
+      filename (string):        Name of the descriptor .npz file.
+      reduction_file (string):  Name of the projection pickle file.
+      models (list):            Names of the models, DESCRIPTOR_MODELS by default.
+      method (string):          "ipca" or "srp".
+      n_components (int):       Dimension of the projection.
+      n_workers (int):          The global worker budget, all cores by default.
+      settings (dict):          Optional search settings by model name.
+    Returns:
+      (dict):                   The results by name, e.g. "rfr_descr", with
+                                 the fitted estimator under "model" and the
+                                 test R^2 score and RMSE under "metrics".
+    """
+
+    # The descriptors module loads the structure libraries, so it is only imported here
+    from reduction import reduce_descriptor_file
+
+    X, y, ids = reduce_descriptor_file(filename, reduction_file, method=method, n_components=n_components)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
+    models = models or DESCRIPTOR_MODELS
+    settings = settings or {}
+    workers = allocate_workers([SEARCHES[name]["weight"] for name in models], n_workers or os.cpu_count())
+
+    folder = tempfile.mkdtemp(prefix="catalysis_")
+    try:
+        train_file = os.path.join(folder, "X_descr.joblib")
+        joblib.dump(X_train, train_file)
+        outputs = Parallel(n_jobs=len(models), backend="loky")(
+            delayed(run_search)(name, "descr", train_file, y_train, n_jobs, settings.get(name, {}))
+            for name, n_jobs in zip(models, workers)
+        )
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    results = {}
+    for name, n_jobs, output in zip(models, workers, outputs):
+        output["model"] = output.pop("estimator")
+        output["n_jobs"] = n_jobs
+        pred = output["model"].predict(X_test)
+        output["metrics"] = {"r2": r2_score(y_test, pred),
+                             "rmse": float(np.sqrt(mean_squared_error(y_test, pred)))}
+        results[f"{name}_descr"] = output
+        print(f"{name}_descr: CV score {output['cv_score']:.4f} in {output['time']:.1f} s, "
+              f"test R^2 {output['metrics']['r2']:.4f}, RMSE {output['metrics']['rmse']:.4f} eV")
+
+    return results
+
+def load_data(filename, pure_metal=True):
+    """
+    Loads the cleaned reaction data the models are trained on, like
+    model.ipynb: the reactions on pure metal catalysts without duplicates.
+
+    Params:
+      filename (string):  The pickled cleaned data.
+      pure_metal (bool):  Keep only the reactions on pure metal catalysts.
+    Returns:
+      (DataFrame):        The reaction data.
+    """
+
+    df = pd.read_pickle(filename)
+    if pure_metal:
+        df = ReactionIndex(df).subset(df, pure_metal=True)
+    return df.drop_duplicates(ignore_index=True)
+
+def evaluate(models, test_set):
+    """
+    Evaluates trained model pipelines on a test set.
+
+    Params:
+      models (dict):          The fitted pipelines by name.
+      test_set (DataFrame):   The test reactions with the target.
+    Returns:
+      (dict):                 The R^2 score and RMSE of each model.
+    """
+
+    X_test, y_test = split_target(test_set)
+    metrics = {}
+    for name, model in models.items():
+        pred = model.predict(X_test)
+        metrics[name] = {"r2": r2_score(y_test, pred),
+                         "rmse": float(np.sqrt(mean_squared_error(y_test, pred)))}
+    return metrics
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train all the models concurrently and save them into a bundle.")
+    parser.add_argument("-d", "--data", default=f"{ROOT_DIR}/data/data.csv", help="Cleaned reaction data")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Output bundle directory")
+    parser.add_argument("-m", "--models", nargs="+", choices=list(SEARCHES), help="Models, all by default")
+    parser.add_argument("-n", "--n-workers", type=int, help="Global worker budget, all cores by default")
+    parser.add_argument("--all-catalysts", action="store_true", help="Do not restrict to pure metal catalysts")
+    parser.add_argument("--time-budget", type=float, default=3600,
+                        help="Search budget of the approximate kernel ridge regression, the random forest "
+                             "and the gradient boosting in seconds")
+    parser.add_argument("--descriptors", help="Train on the reduced structure descriptors of this .npz file instead")
+    parser.add_argument("--reduction", default=f"{ROOT_DIR}/data/reduction.pkl",
+                        help="Projection file of the structure descriptors")
+    parser.add_argument("--reduction-method", choices=["ipca", "srp"], default="ipca",
+                        help="Incremental PCA or sparse random projection")
+    parser.add_argument("--components", type=int, default=100, help="Dimension of the projection")
+    args = parser.parse_args(argv)
+
+    if args.descriptors:
+        models = [name for name in args.models or DESCRIPTOR_MODELS if name in DESCRIPTOR_MODELS]
+        if not models:
+            parser.error(f"The structure descriptors are only used by the models {DESCRIPTOR_MODELS}")
+        results = train_descriptors(args.descriptors, args.reduction, models=models,
+                                    method=args.reduction_method, n_components=args.components,
+                                    n_workers=args.n_workers,
+                                    settings={name: {"time_budget": args.time_budget} for name in ("akrr", "rfr")})
+        filename = os.path.join(args.bundle, "descriptor_models.joblib")
+        os.makedirs(args.bundle, exist_ok=True)
+        joblib.dump({"reduction": args.reduction,
+                     "models": {name: result["model"] for name, result in results.items()},
+                     "metrics": {name: result["metrics"] for name, result in results.items()}}, filename)
+        print(f"Saved the descriptor models into {filename}")
+        return
+
+    df = load_data(args.data, pure_metal=not args.all_catalysts)
+    train_set, test_set = train_test_split(df, test_size=0.2, random_state=0)
+
+    results = train_all(train_set, models=args.models, n_workers=args.n_workers,
+                        settings={name: {"time_budget": args.time_budget} for name in ("akrr", "rfr", "hgb")})
+    models = {name: result["model"] for name, result in results.items()}
+    metrics = evaluate(models, test_set)
+    for name, values in metrics.items():
+        print(f"{name}: test R^2 {values['r2']:.4f}, RMSE {values['rmse']:.4f} eV")
+    save_bundle(args.bundle, models, data_hash=data_hash(*split_target(train_set)), metrics=metrics,
+                rows={"train": row_hashes(train_set), "test": row_hashes(test_set)})
+
+if __name__ == "__main__":
+    main()
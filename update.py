@@ -0,0 +1,148 @@
+# Imports
+import numpy as np
+import pandas as pd
+import argparse
+import os
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+from encoding import split_target, data_hash, row_hashes
+from bundle import Bundle, save_bundle
+from active_learning import update_model as add_trees
+from train import SEARCHES, train_all, evaluate, load_data
+
+# Define the project root directory
+ROOT_DIR = os.getcwd()
+
+def split_new_reactions(df, rows):
+    """
+    Splits the reaction data into the training and test reactions of a
+    bundle and the reactions added since, using the row hashes.
+
+    Params:
+      df (DataFrame):  The current reaction data.
+      rows (dict):     The row hashes of the bundle, see Bundle.rows.
+    Returns:
+      train (DataFrame):  The known training reactions.
+      test (DataFrame):   The known test reactions.
+      new (DataFrame):    The new reactions.
+    """
+
+    hashes = row_hashes(df)
+    in_train = np.isin(hashes, rows["train"])
+    in_test = np.isin(hashes, rows["test"]) & ~in_train
+    return df[in_train], df[in_test], df[~(in_train | in_test)]
+
+def rmse(model, data):
+    X, y = split_target(data)
+    return float(np.sqrt(mean_squared_error(y, model.predict(X))))
+
+def update_bundle(df, bundle_path, output=None, threshold=0.2, n_new_trees=50, test_size=0.2,
+                  n_workers=None, settings=None, random_state=0):
+    """
+    Updates the models of a bundle with the reactions added since it was
+    trained, instead of retraining everything:
+
+      1. The new reactions are found with the row hashes of the bundle.
+      2. Each model is validated on the new reactions. If its RMSE has
+         drifted more than the threshold above the RMSE of the bundle, its
+         hyperparameter search is rerun, see train.train_all.
+      3. Otherwise the category vocabulary is extended with the new
+         categories. The random forests on label encoded data keep their
+         trees and get n_new_trees trees fitted on the updated data. The
+         models whose feature width grows, i.e. the binarized ones, and the
+         other models are refitted with their current hyperparameters.
+
+    A fraction of the new reactions is added to the test set, and the
+    models are evaluated on the updated test set.
+
+    Params:
+      df (DataFrame):       The current reaction data.
+      bundle_path (string): The bundle directory.
+      output (string):      The directory of the updated bundle, the same bundle by default.
+      threshold (float):    The relative RMSE drift that triggers a new search.
+      n_new_trees (int):    Number of trees added to the random forests.
+      test_size (float):    Fraction of the new reactions added to the test set.
+      n_workers (int):      The worker budget of the searches.
+      settings (dict):      Optional search settings by model name, see train.train_all.
+      random_state (int):   Seed of the split of the new reactions.
+    Returns:
+      (dict):               The update report by model name.
+    """
+
+    bundle = Bundle(bundle_path, mmap=False)
+    rows = bundle.rows()
+    if rows is None:
+        raise ValueError(f"Bundle {bundle_path} has no row hashes, retrain it with train.py")
+    old_train, old_test, new = split_new_reactions(df, rows)
+    if new.empty:
+        print("No new reactions since the bundle was trained")
+        return {}
+    print(f"Found {len(new)} new reactions, {len(old_train)} known training and {len(old_test)} test reactions")
+
+    if len(new) * test_size >= 1:
+        new_train, new_test = train_test_split(new, test_size=test_size, random_state=random_state)
+    else:
+        new_train, new_test = new, new.iloc[:0]
+    train_set = pd.concat([old_train, new_train])
+    test_set = pd.concat([old_test, new_test])
+    X_train, y_train = split_target(train_set)
+
+    models, report, searched = {}, {}, {}
+    for name in bundle.names:
+        model = bundle.load(name)
+        kind, encoding = name.rsplit("_", 1)
+        baseline = bundle.metrics(name).get("rmse")
+        drift = rmse(model, new)
+        if baseline is not None and drift > baseline * (1 + threshold) and kind in SEARCHES:
+            action = "search"
+            # One search trains all the encodings of the model
+            if kind not in searched:
+                searched[kind] = train_all(train_set, models=[kind], n_workers=n_workers, settings=settings)
+            model = searched[kind][name]["model"]
+        else:
+            featurizer = model.named_steps["featurizer"]
+            width = featurizer.transform(X_train.iloc[:1]).shape[1]
+            n_added = featurizer.extend(X_train)
+            widened = featurizer.transform(X_train.iloc[:1]).shape[1] != width
+            estimator = model.named_steps["model"]
+            if isinstance(estimator, RandomForestRegressor) and not widened:
+                action = "warm_start"
+                add_trees(model, X_train, y_train, n_new_trees=n_new_trees)
+            else:
+                action = "refit"
+                estimator = clone(estimator)
+                estimator.fit(featurizer.transform(X_train), np.asarray(y_train))
+                model.steps[-1] = ("model", estimator)
+            print(f"{name}: added {n_added} categories")
+        models[name] = model
+        report[name] = {"baseline_rmse": baseline, "drift_rmse": drift, "action": action}
+        print(f"{name}: RMSE on the new reactions {drift:.4f} eV vs. {baseline} eV, {action}")
+
+    metrics = evaluate(models, test_set)
+    for name in metrics:
+        metrics[name]["drift_rmse"] = report[name]["drift_rmse"]
+        report[name].update(metrics[name])
+    save_bundle(output or bundle_path, models, data_hash=data_hash(*split_target(train_set)), metrics=metrics,
+                rows={"train": row_hashes(train_set), "test": row_hashes(test_set)})
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update a model bundle with the new reactions.")
+    parser.add_argument("-d", "--data", default=f"{ROOT_DIR}/data/data.csv", help="Cleaned reaction data")
+    parser.add_argument("-b", "--bundle", default=f"{ROOT_DIR}/data/models", help="Bundle directory")
+    parser.add_argument("-o", "--output", help="Output bundle directory, the same bundle by default")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2,
+                        help="Relative RMSE drift on the new reactions that triggers a new search")
+    parser.add_argument("--trees", type=int, default=50, help="Trees added to the random forests")
+    parser.add_argument("-n", "--n-workers", type=int, help="Worker budget of the searches")
+    parser.add_argument("--all-catalysts", action="store_true", help="Do not restrict to pure metal catalysts")
+    args = parser.parse_args(argv)
+
+    df = load_data(args.data, pure_metal=not args.all_catalysts)
+    update_bundle(df, args.bundle, output=args.output, threshold=args.threshold, n_new_trees=args.trees,
+                  n_workers=args.n_workers)
+
+if __name__ == "__main__":
+    main()